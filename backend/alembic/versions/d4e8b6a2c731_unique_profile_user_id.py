@@ -0,0 +1,31 @@
+"""unique profile.user_id
+
+Revision ID: d4e8b6a2c731
+Revises: 9c3f1a7e5d28
+Create Date: 2026-10-19 21:12:04.316507
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd4e8b6a2c731'
+down_revision = '9c3f1a7e5d28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the oldest profile of any user that has duplicates
+    op.execute(
+        "DELETE FROM profile a USING profile b "
+        "WHERE a.user_id = b.user_id AND a.id > b.id"
+    )
+    op.drop_index(op.f('ix_profile_user_id'), table_name='profile')
+    op.create_index(op.f('ix_profile_user_id'), 'profile', ['user_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_profile_user_id'), table_name='profile')
+    op.create_index(op.f('ix_profile_user_id'), 'profile', ['user_id'], unique=False)
@@ -0,0 +1,37 @@
+"""feed_snapshot.fetched_at with time zone
+
+Revision ID: e7a1c3f9b254
+Revises: d4e8b6a2c731
+Create Date: 2026-10-19 23:41:27.804113
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e7a1c3f9b254'
+down_revision = 'd4e8b6a2c731'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing values were written as naive UTC
+    op.alter_column(
+        'feed_snapshot',
+        'fetched_at',
+        type_=sa.DateTime(timezone=True),
+        existing_nullable=False,
+        postgresql_using="fetched_at AT TIME ZONE 'UTC'",
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'feed_snapshot',
+        'fetched_at',
+        type_=sa.DateTime(),
+        existing_nullable=False,
+        postgresql_using="fetched_at AT TIME ZONE 'UTC'",
+    )
@@ -0,0 +1,121 @@
+"""Password login throughput and database round trips per login.
+
+Usage (from `backend/`, needs DATABASE_URL and the JWT_* settings):
+
+    python benchmarks/login.py
+    python benchmarks/login.py --logins 500 --concurrency 20
+
+Registers a benchmark user if it does not exist yet, then runs `login_user`
+concurrently. SQL statements are counted on the engine, so the report
+shows how many queries a login costs; transaction control (BEGIN/COMMIT)
+is not counted. The benchmark user's login sessions are deleted at the end.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import delete, event, select  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+from src.controller.auth import login_user, register_user  # noqa: E402
+from src.database.db import engine, get_session  # noqa: E402
+from src.model.login_session import LoginSession  # noqa: E402
+from src.model.user import User  # noqa: E402
+from src.schema.auth import LoginRequest, RegisterRequest  # noqa: E402
+
+EMAIL = "login-benchmark@example.com"
+PASSWORD = "login-benchmark-password"
+
+
+def fake_request() -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/auth/login",
+            "headers": [(b"user-agent", b"login-benchmark")],
+            "client": ("127.0.0.1", 0),
+        }
+    )
+
+
+async def ensure_user() -> int:
+    try:
+        await register_user(
+            RegisterRequest(
+                email=EMAIL,
+                password=PASSWORD,
+                full_name="Login Benchmark",
+                username="login_benchmark",
+            )
+        )
+    except HTTPException as e:
+        if e.status_code != 400:
+            raise
+    async with get_session() as session:
+        result = await session.execute(select(User.id).where(User.email == EMAIL))
+        return result.scalar_one()
+
+
+async def run(logins: int, concurrency: int) -> None:
+    user_id = await ensure_user()
+    statements = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await login_user(
+                LoginRequest(email=EMAIL, password=PASSWORD), fake_request()
+            )
+            latencies.append(time.perf_counter() - started)
+
+    await one()  # warm up the pool
+    statements = 0
+    latencies.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    latencies.sort()
+    print(f"{logins} logins, concurrency {concurrency}")
+    print(f"  throughput: {logins / elapsed:8.1f} logins/s")
+    print(f"  latency:    p50 {statistics.median(latencies) * 1000:.1f}ms")
+    print(f"              p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms")
+    print(f"  queries:    {statements / logins:.2f} per login")
+
+    async with get_session() as session:
+        await session.execute(
+            delete(LoginSession).where(LoginSession.user_id == user_id)
+        )
+        await session.commit()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Per-entry cost of building and serializing arXiv feed responses.
+
+Usage (from `backend/`):
+
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --entries 100 --runs 500
+
+Compares the previous path (validate each parsed dict, then FastAPI's
+response_model handling: dump, re-validate, serialize to Python, json.dumps)
+with the current one (`model_construct` plus a single `TypeAdapter.dump_json`).
+Both produce the same JSON; the script checks that before timing.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from src.schema.arxiv import ArxivEntry, ArxivEntryList, entries_from_results  # noqa: E402
+
+
+def sample_results(count: int) -> List[Dict[str, Any]]:
+    """Dicts shaped like `ArxivClient._parse_response` output."""
+    return [
+        {
+            "id": f"http://arxiv.org/abs/2401.{10000 + i}v1",
+            "arxiv_id": f"2401.{10000 + i}v1",
+            "title": "A study of scaling behaviour in sparse mixture-of-experts models",
+            "abstract": "We investigate how routing decisions interact with capacity. " * 20,
+            "authors": [f"Author {j} (University {j})" for j in range(6)],
+            "pdf_url": f"http://arxiv.org/pdf/2401.{10000 + i}v1",
+            "paper_url": f"http://arxiv.org/abs/2401.{10000 + i}v1",
+            "categories": ["cs.LG", "cs.AI", "stat.ML"],
+            "primary_category": "cs.LG",
+            "published": "2024-01-15T18:00:00Z",
+            "updated": "2024-01-16T09:30:00Z",
+            "comment": "12 pages, 4 figures",
+            "journal_ref": None,
+            "doi": None,
+        }
+        for i in range(count)
+    ]
+
+
+def previous_path(results: List[Dict[str, Any]]) -> bytes:
+    entries = [ArxivEntry.model_validate(r) for r in results]
+    # FastAPI: dump returned models, validate against response_model, serialize
+    content = [e.model_dump(by_alias=True) for e in entries]
+    validated = ArxivEntryList.validate_python(content)
+    data = ArxivEntryList.dump_python(validated, mode="json", by_alias=True)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def current_path(results: List[Dict[str, Any]]) -> bytes:
+    return ArxivEntryList.dump_json(entries_from_results(results), by_alias=True)
+
+
+def per_entry_us(fn: Callable[[List[Dict[str, Any]]], bytes], results, runs: int) -> float:
+    fn(results)  # warm up
+    started = time.perf_counter()
+    for _ in range(runs):
+        fn(results)
+    return (time.perf_counter() - started) / (runs * len(results)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    results = sample_results(args.entries)
+    if json.loads(previous_path(results)) != json.loads(current_path(results)):
+        sys.exit("Paths disagree: serialized output differs")
+
+    previous = per_entry_us(previous_path, results, args.runs)
+    current = per_entry_us(current_path, results, args.runs)
+    print(f"{args.entries} entries x {args.runs} runs")
+    print(f"  previous: {previous:8.2f}us/entry")
+    print(f"  current:  {current:8.2f}us/entry  ({previous / current:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
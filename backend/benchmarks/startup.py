@@ -0,0 +1,109 @@
+"""Measure worker startup: import cost of `main` and the lifespan phases.
+
+Usage (from `backend/`):
+
+    python benchmarks/startup.py                 # import phase only
+    python benchmarks/startup.py --lifespan      # also run startup (needs DATABASE_URL)
+    python benchmarks/startup.py --budget-ms 1500
+
+Imports are measured in fresh interpreters with `-X importtime`, so module
+caches from earlier runs do not hide anything. Exits non-zero if the median
+import time plus lifespan time exceeds `--budget-ms`.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str) -> Tuple[float, Dict[str, int]]:
+    """Import `module` in a fresh interpreter.
+
+    Returns wall time in seconds and self-time microseconds per root
+    package (e.g. `boto3`, `fitz`, `src`).
+    """
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:") :].split("|")
+        self_us, name = fields[0].strip(), fields[2].strip()
+        # Self times are exclusive, so summing them per root package never
+        # double counts nested imports
+        if self_us.isdigit():
+            by_package[name.split(".")[0]] += int(self_us)
+    return elapsed, dict(by_package)
+
+
+async def measure_lifespan() -> Dict[str, float]:
+    sys.path.insert(0, BACKEND_DIR)
+    from main import app
+
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        timings = dict(getattr(app.state, "startup_timings", {}))
+        timings["total"] = time.perf_counter() - started
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--lifespan", action="store_true")
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    walls: List[float] = []
+    packages: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(args.runs):
+        wall, by_package = measure_import(args.module)
+        walls.append(wall)
+        for name, us in by_package.items():
+            packages[name].append(us)
+
+    import_ms = statistics.median(walls) * 1000
+    print(f"import {args.module}: median {import_ms:.0f}ms over {args.runs} runs")
+    ranked = sorted(
+        ((statistics.median(v) / 1000, k) for k, v in packages.items()), reverse=True
+    )
+    for ms, name in ranked[: args.top]:
+        print(f"  {ms:8.1f}ms  {name}")
+
+    total_ms = import_ms
+    if args.lifespan:
+        timings = asyncio.run(measure_lifespan())
+        print("lifespan:")
+        for name, seconds in timings.items():
+            print(f"  {seconds * 1000:8.1f}ms  {name}")
+        total_ms += timings["total"] * 1000
+
+    if args.budget_ms is not None:
+        status = "OK" if total_ms <= args.budget_ms else "OVER BUDGET"
+        print(f"startup {total_ms:.0f}ms / budget {args.budget_ms:.0f}ms: {status}")
+        if total_ms > args.budget_ms:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
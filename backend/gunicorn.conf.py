@@ -0,0 +1,45 @@
+"""Gunicorn settings for serving the API with several worker processes.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Each worker runs its own event loop and lifespan, so CPU-bound work
+(bcrypt, PyMuPDF rendering) in one worker does not stall the others.
+Caches and single-flight locks that must hold across workers go through
+`src.core.shared` (set REDIS_URL).
+"""
+
+import multiprocessing
+import os
+
+
+def _flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Import the app once in the master and fork it: faster boots and shared
+# copy-on-write memory. Connection pools are reset in `post_fork`.
+preload_app = _flag("WEB_PRELOAD")
+
+# On SIGTERM workers stop accepting requests and run the lifespan shutdown
+# (draining background work) for up to this many seconds before being killed
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 30))
+timeout = int(os.getenv("WEB_TIMEOUT", 60))
+keepalive = int(os.getenv("WEB_KEEPALIVE", 5))
+
+# Optional periodic worker recycling to bound memory growth
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", 0))
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    # Pooled DB connections opened in the master must not be shared by children
+    from src.database.db import engine, replica_engines
+
+    for e in (engine, *replica_engines):
+        e.sync_engine.dispose(close=False)
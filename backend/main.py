@@ -1,3 +1,6 @@
+import os
+import time
+import asyncio
 from typing import Optional
 from dotenv import load_dotenv
 import psutil
@@ -10,29 +13,63 @@ import logfire
 from fastapi import FastAPI
 from fastapi.concurrency import asynccontextmanager
 from fastapi.security import HTTPBearer
-from src.database.db import Base, engine
+from src.database.db import (
+    Base,
+    engine,
+    get_alembic_revision,
+    pool_sizers,
+    pool_telemetry,
+    replica_pools,
+)
+from src.database.resilience import breaker
+from src.database.telemetry import RouteContextMiddleware
 from src.errors import DatabaseConnectionError
 from src.core.logger import SingletonLogger
+from src.core.storage.cache import get_disk_cache
+from src.core.storage.registry import close_storage, provision_storage
+from src.core.shared import get_shared_backend
+from src.core.tasks import task_registry
+from src.core.http import CompressionMiddleware, ETagMiddleware
+from src.lib.feed import FeedMaterializer, feed_engine
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.router.auth import router as auth_router
 from src.router.profile import router as profile_router
 from src.router.arxiv import router as arxiv_router
 from src.router.paper import router as paper_router
+from src.router.chat import router as chat_router
 
 from src.model import *
 
 app = FastAPI()
 
+# "auto" skips create_all once Alembic manages the schema; "always"/"never" force it
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "auto").lower()
+
+# Seconds background tasks get to finish on shutdown before being cancelled;
+# keep it below the server's graceful timeout
+BACKGROUND_DRAIN_TIMEOUT = float(os.getenv("BACKGROUND_DRAIN_TIMEOUT", 10))
+
+# Precompute home feeds from profile topic preferences
+FEED_MATERIALIZER = os.getenv("FEED_MATERIALIZER", "false").lower() in ("1", "true", "yes")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Lifespan handler to initialize app state, create DB tables and shutdown cleanup."""
+    """Lifespan handler to initialize app state, create DB tables, provision storage and shutdown cleanup."""
     logger = SingletonLogger().get_logger()
+    timings = app.state.startup_timings = {}
 
+    started = time.perf_counter()
     try:
         async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+            revision = (
+                await get_alembic_revision(conn) if DB_CREATE_ALL == "auto" else None
+            )
+            if revision:
+                logger.info(f"Database at Alembic revision {revision}, skipping create_all")
+            elif DB_CREATE_ALL != "never":
+                await conn.run_sync(Base.metadata.create_all)
     except Exception as e:
         try:
             logger = app.state.logger
@@ -40,6 +77,24 @@ async def lifespan(app: FastAPI):
             logger = SingletonLogger().get_logger()
         logger.error(f"Error creating database tables: {e}")
         raise
+    timings["database"] = time.perf_counter() - started
+
+    # Bucket checks happen here, bounded by STORAGE_PROVISION_TIMEOUT, instead
+    # of at import time when the storage provider is constructed
+    started = time.perf_counter()
+    await provision_storage()
+    timings["storage"] = time.perf_counter() - started
+    logger.info(
+        "Startup phases: "
+        + ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items())
+    )
+
+    # Optional adaptive pool sizing (DB_POOL_ADAPTIVE) and home feed snapshots
+    periodic_tasks = [asyncio.create_task(sizer.run()) for sizer in pool_sizers()]
+    if FEED_MATERIALIZER:
+        periodic_tasks.append(
+            asyncio.create_task(FeedMaterializer(feed_engine).run())
+        )
 
     try:
         yield
@@ -47,6 +102,25 @@ async def lifespan(app: FastAPI):
         logger = getattr(app.state, "logger", SingletonLogger().get_logger())
         if logger:
             logger.info("Shutting down application")
+        for task in periodic_tasks:
+            task.cancel()
+        await asyncio.gather(*periodic_tasks, return_exceptions=True)
+        # Background work still needs storage and the DB, so drain it first
+        try:
+            await task_registry.drain(BACKGROUND_DRAIN_TIMEOUT)
+        except Exception:
+            if logger:
+                logger.exception("Error draining background tasks during shutdown")
+        try:
+            await close_storage()
+        except Exception:
+            if logger:
+                logger.exception("Error closing storage during shutdown")
+        try:
+            await get_shared_backend().close()
+        except Exception:
+            if logger:
+                logger.exception("Error closing shared cache during shutdown")
         model = getattr(app.state, "model", None)
         if model and hasattr(model, "close"):
             try:
@@ -70,6 +144,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added inner to outer: ETags hash the uncompressed body, then it is compressed.
+# The ETag is a hash of the rendered body, so the handler still runs in full:
+# a 304 saves bandwidth and client parsing, not server work.
+app.add_middleware(ETagMiddleware)
+app.add_middleware(CompressionMiddleware)
+# Lets pool telemetry attribute long-held connections to routes
+app.add_middleware(RouteContextMiddleware)
 
 security_scheme = HTTPBearer()
 app.openapi_components = {
@@ -93,6 +174,7 @@ app.include_router(auth_router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(profile_router, prefix="/api/v1/profile", tags=["Profile"])
 app.include_router(arxiv_router, prefix="/api/v1/arxiv", tags=["Arxiv"])
 app.include_router(paper_router, prefix="/api/v1/papers", tags=["Papers"])
+app.include_router(chat_router, prefix="/api/v1/chat", tags=["Chat"])
 
 
 @app.get("/health")
@@ -100,12 +182,18 @@ def health_check():
     cpu_usage: Optional[float] = psutil.cpu_percent(interval=None)  # Non-blocking
     memory_usage: Optional[float] = psutil.virtual_memory().percent
     num_threads: Optional[int] = psutil.cpu_count()
+    cache = get_disk_cache()
 
     return {
         "health": "ok",
         "cpu_usage": cpu_usage,
         "memory_usage": memory_usage,
         "num_threads": num_threads,
+        "storage_cache": cache.stats() if cache else None,
+        "database": breaker.stats(),
+        "replicas": [guard.stats() for _, guard in replica_pools],
+        "db_pools": {t.name: t.stats() for t in pool_telemetry},
+        "background_tasks": task_registry.stats(),
     }
 
 @app.get("/")
@@ -1,12 +1,16 @@
 from typing import List, Optional
 from fastapi import HTTPException
 
-from ..lib.arxiv import (
-    ArxivClient,
-    generate_first_page_thumbnail,
-    get_existing_thumbnail_url,
+from ..lib.arxiv import ArxivClient, generate_first_page_thumbnail
+from ..lib.feed import feed_engine, normalize_topics
+from ..lib.paper_version import track_versions
+from ..core.tasks import task_registry
+from ..schema.arxiv import (
+    ArxivEntry,
+    FeedDelta,
+    ThumbnailResponse,
+    entries_from_results,
 )
-from ..schema.arxiv import ArxivEntry, ThumbnailResponse
 from ..core.logger import SingletonLogger
 
 
@@ -14,32 +18,6 @@ logger = SingletonLogger().get_logger()
 client = ArxivClient()
 
 
-async def _warm_thumbnails(entries: List[ArxivEntry], user_id: int) -> None:
-    """Generate missing thumbnails in the background with limited concurrency."""
-    import asyncio
-
-    sem = asyncio.Semaphore(3)
-
-    async def worker(e: ArxivEntry):
-        if not e.pdf_url:
-            return
-        if getattr(e, "thumbnail_url", None):
-            return
-        async with sem:
-            try:
-                await generate_first_page_thumbnail(
-                    pdf_url=e.pdf_url,
-                    user_id=user_id,
-                    target_width=400,
-                    folder="thumbnails",
-                )
-            except Exception:
-                # Best-effort; swallow exceptions
-                pass
-
-    await asyncio.gather(*(worker(e) for e in entries))
-
-
 async def search_arxiv(
     search_query: str,
     start: int = 0,
@@ -55,7 +33,11 @@ async def search_arxiv(
             sort_by=sort_by,
             sort_order=sort_order,
         )
-        return [ArxivEntry.model_validate(r) for r in results]
+        if results:
+            task_registry.submit(
+                f"versions:search:{search_query}:{start}", track_versions(results)
+            )
+        return entries_from_results(results)
     except Exception as e:
         logger.error(f"Arxiv search failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to search arXiv")
@@ -73,77 +55,17 @@ async def feed_topics(
     thumbnail_timeout_sec: int = 20,
 ) -> List[ArxivEntry]:
     try:
-        results = client.feed_by_topics(
-            topics=topics,
+        return await feed_engine.build(
+            normalize_topics(topics),
             start=start,
             max_results=max_results,
             sort_by=sort_by,
             sort_order=sort_order,
+            user_id=user_id,
+            include_thumbnails=include_thumbnails,
+            max_thumbnail_concurrency=max_thumbnail_concurrency,
+            thumbnail_timeout_sec=thumbnail_timeout_sec,
         )
-        entries = [ArxivEntry.model_validate(r) for r in results]
-
-        # Populate thumbnails based on request preference
-        if user_id is not None and entries:
-            import asyncio
-
-            if include_thumbnails:
-                sem = asyncio.Semaphore(max(1, max_thumbnail_concurrency))
-
-                async def gen(e: ArxivEntry):
-                    if not e.pdf_url:
-                        return None
-                    cached = await get_existing_thumbnail_url(
-                        pdf_url=e.pdf_url,
-                        user_id=user_id,
-                        folder="thumbnails",
-                    )
-                    if cached:
-                        return cached
-                    async with sem:
-                        try:
-                            return await asyncio.wait_for(
-                                generate_first_page_thumbnail(
-                                    pdf_url=e.pdf_url,
-                                    user_id=user_id,
-                                    target_width=1024,
-                                    folder="thumbnails",
-                                ),
-                                timeout=thumbnail_timeout_sec,
-                            )
-                        except Exception:
-                            return None
-
-                urls = await asyncio.gather(*(gen(e) for e in entries))
-                for e, url in zip(entries, urls):
-                    if url:
-                        e.thumbnail_url = url
-            else:
-                tasks = [
-                    (
-                        get_existing_thumbnail_url(
-                            pdf_url=e.pdf_url or "",
-                            user_id=user_id,
-                            folder="thumbnails",
-                        )
-                        if e.pdf_url
-                        else asyncio.sleep(0)
-                    )
-                    for e in entries
-                ]
-                urls = await asyncio.gather(*tasks)
-                for e, url in zip(entries, urls):
-                    if url:
-                        e.thumbnail_url = url
-
-                missing = [
-                    e
-                    for e in entries
-                    if e.pdf_url and not getattr(e, "thumbnail_url", None)
-                ]
-                if missing:
-                    asyncio.create_task(_warm_thumbnails(missing, user_id))
-
-        return entries
     except Exception as e:
         logger.error(f"Arxiv topic feed failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch arXiv feed")
@@ -161,79 +83,40 @@ async def feed_topic_string(
     thumbnail_timeout_sec: int = 20,
 ) -> List[ArxivEntry]:
     try:
-        results = client.feed_by_topic_string(
-            topics_csv=topics_csv,
+        return await feed_engine.build(
+            normalize_topics(topics_csv.split(",") if topics_csv else []),
             start=start,
             max_results=max_results,
             sort_by=sort_by,
             sort_order=sort_order,
+            user_id=user_id,
+            include_thumbnails=include_thumbnails,
+            max_thumbnail_concurrency=max_thumbnail_concurrency,
+            thumbnail_timeout_sec=thumbnail_timeout_sec,
         )
-        entries = [ArxivEntry.model_validate(r) for r in results]
-
-        # Populate thumbnails based on request preference
-        if user_id is not None and entries:
-            import asyncio
-
-            if include_thumbnails:
-                sem = asyncio.Semaphore(max(1, max_thumbnail_concurrency))
-
-                async def gen(e: ArxivEntry):
-                    if not e.pdf_url:
-                        return None
-                    cached = await get_existing_thumbnail_url(
-                        pdf_url=e.pdf_url,
-                        user_id=user_id,
-                        folder="thumbnails",
-                    )
-                    if cached:
-                        return cached
-                    async with sem:
-                        try:
-                            return await asyncio.wait_for(
-                                generate_first_page_thumbnail(
-                                    pdf_url=e.pdf_url,
-                                    user_id=user_id,
-                                    target_width=1024,
-                                    folder="thumbnails",
-                                ),
-                                timeout=thumbnail_timeout_sec,
-                            )
-                        except Exception:
-                            return None
-
-                urls = await asyncio.gather(*(gen(e) for e in entries))
-                for e, url in zip(entries, urls):
-                    if url:
-                        e.thumbnail_url = url
-            else:
-                tasks = [
-                    (
-                        get_existing_thumbnail_url(
-                            pdf_url=e.pdf_url or "",
-                            user_id=user_id,
-                            folder="thumbnails",
-                        )
-                        if e.pdf_url
-                        else asyncio.sleep(0)
-                    )
-                    for e in entries
-                ]
-                urls = await asyncio.gather(*tasks)
-                for e, url in zip(entries, urls):
-                    if url:
-                        e.thumbnail_url = url
+    except Exception as e:
+        logger.error(f"Arxiv topic-string feed failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch arXiv feed")
 
-                missing = [
-                    e
-                    for e in entries
-                    if e.pdf_url and not getattr(e, "thumbnail_url", None)
-                ]
-                if missing:
-                    asyncio.create_task(_warm_thumbnails(missing, user_id))
 
-        return entries
+async def feed_delta(
+    topics: List[str],
+    since: Optional[str] = None,
+    max_results: int = 50,
+    user_id: Optional[int] = None,
+) -> FeedDelta:
+    try:
+        entries, cursor, has_more, reset = await feed_engine.delta(
+            normalize_topics(topics),
+            since=since,
+            max_results=max_results,
+            user_id=user_id,
+        )
+        return FeedDelta(
+            entries=entries, cursor=cursor, has_more=has_more, reset=reset
+        )
     except Exception as e:
-        logger.error(f"Arxiv topic-string feed failed: {str(e)}")
+        logger.error(f"Arxiv feed delta failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch arXiv feed")
 
 
@@ -1,16 +1,18 @@
-from authlib.integrations.httpx_client import AsyncOAuth2Client
+import asyncio
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError, DBAPIError
 from datetime import datetime
+from functools import lru_cache
 from fastapi import HTTPException, Request
 import os
-from ..database.db import session_pool
+from ..database.db import get_session, run_read
 from ..errors import DatabaseConnectionError
 from ..model.user import User
 from ..model.profile import Profile
 from ..model.login_session import LoginSession
 from ..model.user_settings import UserSettings
 from ..schema.auth import RegisterRequest, LoginRequest
+from ..lib.profile_cache import profile_cache
 from ..lib.auth import (
     hash_password,
     verify_password,
@@ -19,6 +21,7 @@ from ..lib.auth import (
     store_token_in_session,
 )
 from ..core.logger import SingletonLogger
+from ..core.storage.registry import get_storage
 from ..errors import *
 
 logger = SingletonLogger().get_logger()
@@ -27,7 +30,7 @@ logger = SingletonLogger().get_logger()
 async def register_user(register_data: RegisterRequest):
     """Register a new user with email and password"""
     try:
-        async with session_pool() as session:
+        async with get_session() as session:
             # Check if email already exists
             result = await session.execute(
                 select(User).where(User.email == register_data.email)
@@ -77,6 +80,8 @@ async def register_user(register_data: RegisterRequest):
             }
     except HTTPException:
         raise
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error during registration for email={register_data.email}: {str(e)}"
@@ -97,28 +102,37 @@ async def register_user(register_data: RegisterRequest):
 async def login_user(login_data: LoginRequest, request: Request):
     """Authenticate user with email and password"""
     try:
-        async with session_pool() as session:
-            # Find user by email
+        # User and profile in one query; the profile warms the profile cache
+        # the client reads right after logging in
+        async with get_session() as session:
             result = await session.execute(
-                select(User).where(User.email == login_data.email)
+                select(User, Profile)
+                .outerjoin(Profile, Profile.user_id == User.id)
+                .where(User.email == login_data.email)
             )
-            user = result.scalar_one_or_none()
-
-            if not user or not user.password:
-                logger.warning(f"Login attempt with invalid email: {login_data.email}")
-                raise HTTPException(status_code=401, detail="Invalid credentials")
-            if not verify_password(login_data.password, user.password):
-                logger.warning(
-                    f"Login attempt with invalid password for email: {login_data.email}"
-                )
-                raise HTTPException(status_code=401, detail="Invalid credentials")
-
-            # Create tokens
-            access_token, token_expires_at = create_access_token(
-                data={"sub": str(user.id)}
+            row = result.one_or_none()
+        user, profile = row if row else (None, None)
+
+        if not user or not user.password:
+            logger.warning(f"Login attempt with invalid email: {login_data.email}")
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        # bcrypt is CPU-bound; keep it off the event loop and outside the
+        # session, so no pooled connection waits on it
+        if not await asyncio.to_thread(
+            verify_password, login_data.password, user.password
+        ):
+            logger.warning(
+                f"Login attempt with invalid password for email: {login_data.email}"
             )
-            refresh_token, _ = create_refresh_token(subject=str(user.id))
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+
+        # Create tokens
+        access_token, token_expires_at = create_access_token(
+            data={"sub": str(user.id)}
+        )
+        refresh_token, _ = create_refresh_token(subject=str(user.id))
 
+        async with get_session() as session:
             # Store tokens in login session
             login_session = await store_token_in_session(
                 session=session,
@@ -136,23 +150,26 @@ async def login_user(login_data: LoginRequest, request: Request):
                 token_expires_at=token_expires_at,
             )
 
-            logger.info(f"User logged in successfully: {user.username} (ID: {user.id})")
-            return {
-                "access_token": access_token,
-                "refresh_token": refresh_token,
-                "token_type": "bearer",
-                "expires_in": int(
-                    (token_expires_at - datetime.utcnow()).total_seconds()
-                ),
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "email": user.email,
-                    "full_name": user.full_name,
-                },
-            }
+        if profile:
+            await profile_cache.put(profile)
+
+        logger.info(f"User logged in successfully: {user.username} (ID: {user.id})")
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": int((token_expires_at - datetime.utcnow()).total_seconds()),
+            "user": {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "full_name": user.full_name,
+            },
+        }
     except HTTPException:
         raise
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error during login for email={login_data.email}: {str(e)}"
@@ -170,20 +187,25 @@ async def login_user(login_data: LoginRequest, request: Request):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-oauth = AsyncOAuth2Client(
-    client_id=os.getenv("GOOGLE_CLIENT_ID"),
-    client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-    redirect_uri=os.getenv("GOOGLE_REDIRECT_URI"),
-    authorize_url="https://accounts.google.com/o/oauth2/auth",
-    access_token_url="https://oauth2.googleapis.com/token",
-    userinfo_url="https://www.googleapis.com/oauth2/v2/userinfo",
-)
+@lru_cache(maxsize=1)
+def get_oauth_client():
+    """Google OAuth client, built on first use so authlib loads lazily."""
+    from authlib.integrations.httpx_client import AsyncOAuth2Client
+
+    return AsyncOAuth2Client(
+        client_id=os.getenv("GOOGLE_CLIENT_ID"),
+        client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
+        redirect_uri=os.getenv("GOOGLE_REDIRECT_URI"),
+        authorize_url="https://accounts.google.com/o/oauth2/auth",
+        access_token_url="https://oauth2.googleapis.com/token",
+        userinfo_url="https://www.googleapis.com/oauth2/v2/userinfo",
+    )
 
 
 async def initiate_google_login():
     """Generate Google OAuth authorization URL"""
     try:
-        authorization_url, state = oauth.create_authorization_url(
+        authorization_url, state = get_oauth_client().create_authorization_url(
             "https://accounts.google.com/o/oauth2/auth",
             scope=["openid", "email", "profile"],
         )
@@ -197,6 +219,7 @@ async def initiate_google_login():
 async def handle_google_callback(code: str, state: str, request: Request):
     """Process Google OAuth callback and authenticate/create user"""
     try:
+        oauth = get_oauth_client()
         token = await oauth.fetch_token(
             "https://oauth2.googleapis.com/token",
             code=code,
@@ -205,7 +228,7 @@ async def handle_google_callback(code: str, state: str, request: Request):
         user_info = await oauth.get("https://www.googleapis.com/oauth2/v2/userinfo")
         user_data = user_info.json()
 
-        async with session_pool() as session:
+        async with get_session() as session:
             result = await session.execute(
                 select(User).where(User.google_id == user_data["id"])
             )
@@ -282,6 +305,8 @@ async def handle_google_callback(code: str, state: str, request: Request):
             }
     except HTTPException:
         raise
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error during Google OAuth callback: {str(e)}"
@@ -298,7 +323,7 @@ async def handle_google_callback(code: str, state: str, request: Request):
 async def logout_user(user_id: int, session_id: int | None = None):
     """Logout user by deactivating login session(s)"""
     try:
-        async with session_pool() as session:
+        async with get_session() as session:
             if session_id:
                 result = await session.execute(
                     select(LoginSession).where(
@@ -340,6 +365,8 @@ async def logout_user(user_id: int, session_id: int | None = None):
                 return {"message": f"Logged out from {len(login_sessions)} sessions"}
     except HTTPException:
         raise
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error during logout for user_id={user_id}: {str(e)}"
@@ -355,26 +382,32 @@ async def logout_user(user_id: int, session_id: int | None = None):
 
 async def get_user_sessions(user_id: int):
     """Get all login sessions for a user"""
+
+    async def _load(session):
+        result = await session.execute(
+            select(LoginSession)
+            .where(LoginSession.user_id == user_id)
+            .order_by(LoginSession.created_at.desc())
+        )
+        return result.scalars().all()
+
     try:
-        async with session_pool() as session:
-            result = await session.execute(
-                select(LoginSession)
-                .where(LoginSession.user_id == user_id)
-                .order_by(LoginSession.created_at.desc())
-            )
-            sessions = result.scalars().all()
-            return [
-                {
-                    "id": s.id,
-                    "login_method": s.login_method,
-                    "is_active": s.is_active,
-                    "created_at": s.created_at,
-                    "logout_at": s.logout_at,
-                    "device_info": s.device_info,
-                    "ip_address": s.ip_address,
-                }
-                for s in sessions
-            ]
+        # On the primary, so a logout from any worker shows up immediately
+        sessions = await run_read(_load, primary=True)
+        return [
+            {
+                "id": s.id,
+                "login_method": s.login_method,
+                "is_active": s.is_active,
+                "created_at": s.created_at,
+                "logout_at": s.logout_at,
+                "device_info": s.device_info,
+                "ip_address": s.ip_address,
+            }
+            for s in sessions
+        ]
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error fetching sessions for user_id={user_id}: {str(e)}"
@@ -395,7 +428,7 @@ async def get_user_sessions(user_id: int):
 async def delete_user_account(user_id: int):
     """Delete a user account and all associated data"""
     try:
-        async with session_pool() as session:
+        async with get_session() as session:
             result = await session.execute(select(User).where(User.id == user_id))
             user = result.scalar_one_or_none()
             if not user:
@@ -408,10 +441,25 @@ async def delete_user_account(user_id: int):
             # Delete the user (cascade will handle related records)
             await session.delete(user)
             await session.commit()
+            await profile_cache.invalidate(user_id)
             logger.info(f"User account deleted: {username} (ID: {user_id})")
-            return {"message": "User account deleted successfully"}
+
+        # Remove the user's stored objects (avatars, thumbnails) in bulk
+        try:
+            keys = await get_storage().list_files(f"{user_id}/")
+            deleted = await get_storage().delete_many(keys)
+            logger.info(
+                f"Deleted {deleted}/{len(keys)} stored files for user_id={user_id}"
+            )
+        except Exception as e:
+            logger.warning(
+                f"Failed to clean up stored files for user_id={user_id}: {str(e)}"
+            )
+        return {"message": "User account deleted successfully"}
     except HTTPException:
         raise
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error deleting user account for user_id={user_id}: {str(e)}"
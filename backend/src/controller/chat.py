@@ -0,0 +1,106 @@
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError, IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.logger import SingletonLogger
+from ..database.db import get_session
+from ..errors import DatabaseConnectionError
+from ..lib.chat import store_message_with_sources, store_messages_bulk
+from ..model.chat_session import Session
+from ..schema.message import MessageCreate, MessageCreated, MessageRequest
+
+
+logger = SingletonLogger().get_logger()
+
+
+async def _ensure_owned_session(
+    session: AsyncSession, user_id: int, session_id: int
+) -> None:
+    result = await session.execute(
+        select(Session.id).where(Session.id == session_id, Session.user_id == user_id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+
+
+def _to_create(
+    user_id: int, session_id: int, payload: MessageRequest
+) -> MessageCreate:
+    return MessageCreate(
+        session_id=session_id, user_id=user_id, **payload.model_dump()
+    )
+
+
+async def add_message(
+    user_id: int, session_id: int, payload: MessageRequest
+) -> MessageCreated:
+    """Persist one chat message and its sources in a single statement."""
+    try:
+        async with get_session() as session:
+            await _ensure_owned_session(session, user_id, session_id)
+            return await store_message_with_sources(
+                session, _to_create(user_id, session_id, payload)
+            )
+    except HTTPException:
+        raise
+    except DatabaseConnectionError:
+        raise
+    except IntegrityError as e:
+        logger.warning(
+            f"Rejected message for session_id={session_id}, user_id={user_id}: {str(e)}"
+        )
+        raise HTTPException(status_code=400, detail="Invalid parent message")
+    except DBAPIError as e:
+        logger.exception(
+            f"Database connection error storing message for session_id={session_id}: {str(e)}"
+        )
+        raise DatabaseConnectionError(str(e))
+    except SQLAlchemyError as e:
+        logger.error(
+            f"Database error storing message for session_id={session_id}: {str(e)}"
+        )
+        raise HTTPException(status_code=500, detail="Failed to store message")
+    except Exception as e:
+        logger.error(
+            f"Unexpected error storing message for session_id={session_id}: {str(e)}"
+        )
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+async def import_messages(
+    user_id: int, session_id: int, payload: List[MessageRequest]
+) -> List[MessageCreated]:
+    """Persist a batch of chat messages (e.g. restored history) in bulk."""
+    try:
+        async with get_session() as session:
+            await _ensure_owned_session(session, user_id, session_id)
+            return await store_messages_bulk(
+                session, [_to_create(user_id, session_id, m) for m in payload]
+            )
+    except HTTPException:
+        raise
+    except DatabaseConnectionError:
+        raise
+    except IntegrityError as e:
+        logger.warning(
+            f"Rejected message import for session_id={session_id}, user_id={user_id}: {str(e)}"
+        )
+        raise HTTPException(status_code=400, detail="Invalid parent message")
+    except DBAPIError as e:
+        logger.exception(
+            f"Database connection error importing messages for session_id={session_id}: {str(e)}"
+        )
+        raise DatabaseConnectionError(str(e))
+    except SQLAlchemyError as e:
+        logger.error(
+            f"Database error importing messages for session_id={session_id}: {str(e)}"
+        )
+        raise HTTPException(status_code=500, detail="Failed to import messages")
+    except Exception as e:
+        logger.error(
+            f"Unexpected error importing messages for session_id={session_id}: {str(e)}"
+        )
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -2,7 +2,7 @@ from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError, DBAPIError
 from fastapi import HTTPException
 
-from ..database.db import session_pool
+from ..database.db import get_session
 from ..errors import DatabaseConnectionError
 from ..model.paper import Paper
 from ..schema.paper import PaperCreate, PaperResponse
@@ -16,7 +16,7 @@ logger = SingletonLogger().get_logger()
 async def create_paper(user_id: int, payload: PaperCreate) -> PaperResponse:
     """Create a paper entry and automatically generate thumbnail."""
     try:
-        async with session_pool() as session:
+        async with get_session() as session:
             # Prevent duplicates by arxiv_id
             existing = await session.execute(
                 select(Paper).where(Paper.arxiv_id == payload.arxiv_id)
@@ -75,6 +75,8 @@ async def create_paper(user_id: int, payload: PaperCreate) -> PaperResponse:
             )
     except HTTPException:
         raise
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error creating paper arxiv_id={payload.arxiv_id}: {str(e)}"
@@ -1,44 +1,123 @@
-from sqlalchemy import select
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError, DBAPIError
 from fastapi import HTTPException, UploadFile
-from ..database.db import session_pool
+from ..database.db import get_session
 from ..errors import DatabaseConnectionError
 from ..model.profile import Profile
-from ..schema.profile import ProfileCreate, ProfileUpdate, ProfileResponse
-from ..core.storage.supabase import SupabaseStorage
+from ..schema.profile import (
+    AvatarConfirmRequest,
+    AvatarUploadRequest,
+    AvatarUploadResponse,
+    ProfileCreate,
+    ProfileResponse,
+    ProfileUpdate,
+)
+from ..core.storage.base import StorageProvider
+from ..core.storage.registry import get_storage
+from ..core.storage.urls import CACHE_CONTROL_IMMUTABLE
 from ..core.logger import SingletonLogger
+from ..core.tasks import task_registry
+from ..lib.profile_cache import profile_cache
 
 logger = SingletonLogger().get_logger()
 
-# Instantiate storage provider (Supabase)
-storage = SupabaseStorage.from_env()
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", 5 * 1024 * 1024))
+AVATAR_UPLOAD_URL_EXPIRES = int(os.getenv("AVATAR_UPLOAD_URL_EXPIRES", 300))
+AVATAR_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png"}
+# Direct uploads not confirmed this long after their URL expired are deleted
+AVATAR_UPLOAD_GRACE = int(os.getenv("AVATAR_UPLOAD_GRACE", 3600))
+
+
+def _writable(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Profile columns a client may set; avatar_url is derived, not stored."""
+    return {k: v for k, v in values.items() if k != "avatar_url"}
+
+
+async def _set_avatar(
+    session: AsyncSession, user_id: int, avatar_key: str
+) -> Optional[Tuple[Profile, Optional[str]]]:
+    """Point the profile at `avatar_key`; return it with the previous key.
+
+    A single `UPDATE ... FROM (SELECT ... FOR UPDATE) ... RETURNING`, so the
+    old key comes back in the same round trip. None if there is no profile.
+    """
+    old = (
+        select(Profile.id, Profile.avatar)
+        .where(Profile.user_id == user_id)
+        .with_for_update()
+        .subquery()
+    )
+    result = await session.execute(
+        update(Profile)
+        .where(Profile.id == old.c.id)
+        .values(avatar=avatar_key)
+        .returning(Profile, old.c.avatar)
+    )
+    row = result.one_or_none()
+    return (row[0], row[1]) if row else None
+
+
+def _upload_issued_at(file_key: str) -> Optional[int]:
+    """When the upload URL for a direct-upload key was issued, if it is one."""
+    stamp = file_key.rsplit("/", 1)[-1].split("-", 1)[0]
+    return int(stamp) if stamp.isdigit() else None
+
+
+async def sweep_avatar_uploads(user_id: int) -> int:
+    """Delete the user's direct uploads that were never confirmed.
+
+    Only keys issued by `create_avatar_upload_url` whose URL expired more
+    than AVATAR_UPLOAD_GRACE seconds ago are considered, and the current
+    avatar is always kept. Returns how many objects were deleted.
+    """
+    async with get_session() as session:
+        result = await session.execute(
+            select(Profile.avatar).where(Profile.user_id == user_id)
+        )
+        current = result.scalar_one_or_none()
+    cutoff = time.time() - AVATAR_UPLOAD_URL_EXPIRES - AVATAR_UPLOAD_GRACE
+    stale = []
+    for key in await get_storage().list_files(f"{user_id}/avatar/"):
+        issued_at = _upload_issued_at(key)
+        if key != current and issued_at is not None and issued_at < cutoff:
+            stale.append(key)
+    if not stale:
+        return 0
+    deleted = await get_storage().delete_many(stale)
+    logger.info(f"Deleted {deleted} unconfirmed avatar uploads for user_id={user_id}")
+    return deleted
+
+
+async def _delete_old_avatar(
+    user_id: int, old_avatar: Optional[str], new_avatar: str
+) -> None:
+    if old_avatar and old_avatar != new_avatar:
+        try:
+            await get_storage().delete_file(old_avatar)
+        except Exception as e:
+            logger.warning(
+                f"Failed to delete old avatar for user_id={user_id}: {str(e)}"
+            )
 
 
 async def get_profile(user_id: int) -> ProfileResponse:
     """Get user profile"""
-    try:
-        async with session_pool() as session:
-            result = await session.execute(
-                select(Profile).where(Profile.user_id == user_id)
-            )
-            profile = result.scalar_one_or_none()
-            if not profile:
-                raise HTTPException(status_code=404, detail="Profile not found")
 
-            # Convert to dict and add avatar_url
-            profile_dict = {
-                "id": profile.id,
-                "user_id": profile.user_id,
-                "phone": profile.phone,
-                "bio": profile.bio,
-                "avatar_url": (
-                    storage.get_file_url(profile.avatar) if profile.avatar else None
-                ),
-                "topic_preferences": profile.topic_preferences,
-            }
-            return ProfileResponse(**profile_dict)
+    try:
+        cached = await profile_cache.get(user_id)
+        if not cached:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return cached.response()
     except HTTPException:
         raise
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error fetching profile for user_id={user_id}: {str(e)}"
@@ -57,36 +136,29 @@ async def get_profile(user_id: int) -> ProfileResponse:
 async def create_profile(user_id: int, profile_data: ProfileCreate) -> ProfileResponse:
     """Create user profile"""
     try:
-        async with session_pool() as session:
-            # Check if profile already exists
+        async with get_session() as session:
+            # One round trip; the unique user_id makes a concurrent duplicate
+            # a no-op instead of a second row
             result = await session.execute(
-                select(Profile).where(Profile.user_id == user_id)
+                insert(Profile)
+                .values(user_id=user_id, **_writable(profile_data.model_dump()))
+                .on_conflict_do_nothing(index_elements=[Profile.user_id])
+                .returning(Profile)
             )
-            if result.scalar_one_or_none():
+            profile = result.scalar_one_or_none()
+            if not profile:
                 logger.warning(
                     f"Attempted to create duplicate profile for user_id={user_id}"
                 )
                 raise HTTPException(status_code=400, detail="Profile already exists")
-
-            profile = Profile(user_id=user_id, **profile_data.model_dump())
-            session.add(profile)
             await session.commit()
-            await session.refresh(profile)
-
-            # Return with avatar URL
-            profile_dict = {
-                "id": profile.id,
-                "user_id": profile.user_id,
-                "phone": profile.phone,
-                "bio": profile.bio,
-                "avatar_url": (
-                    storage.get_file_url(profile.avatar) if profile.avatar else None
-                ),
-                "topic_preferences": profile.topic_preferences,
-            }
-            return ProfileResponse(**profile_dict)
+
+            cached = await profile_cache.put(profile)
+            return cached.response()
     except HTTPException:
         raise
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error creating profile for user_id={user_id}: {str(e)}"
@@ -105,35 +177,24 @@ async def create_profile(user_id: int, profile_data: ProfileCreate) -> ProfileRe
 async def update_profile(user_id: int, profile_data: ProfileUpdate) -> ProfileResponse:
     """Update user profile"""
     try:
-        async with session_pool() as session:
+        async with get_session() as session:
             result = await session.execute(
-                select(Profile).where(Profile.user_id == user_id)
+                update(Profile)
+                .where(Profile.user_id == user_id)
+                .values(**_writable(profile_data.model_dump(exclude_unset=True)))
+                .returning(Profile)
             )
             profile = result.scalar_one_or_none()
             if not profile:
                 raise HTTPException(status_code=404, detail="Profile not found")
-
-            update_data = profile_data.model_dump(exclude_unset=True)
-            for field, value in update_data.items():
-                setattr(profile, field, value)
-
             await session.commit()
-            await session.refresh(profile)
-
-            # Return with avatar URL
-            profile_dict = {
-                "id": profile.id,
-                "user_id": profile.user_id,
-                "phone": profile.phone,
-                "bio": profile.bio,
-                "avatar_url": (
-                    storage.get_file_url(profile.avatar) if profile.avatar else None
-                ),
-                "topic_preferences": profile.topic_preferences,
-            }
-            return ProfileResponse(**profile_dict)
+
+            cached = await profile_cache.put(profile)
+            return cached.response()
     except HTTPException:
         raise
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error updating profile for user_id={user_id}: {str(e)}"
@@ -152,45 +213,26 @@ async def update_profile(user_id: int, profile_data: ProfileUpdate) -> ProfileRe
 async def upload_avatar(user_id: int, file: UploadFile) -> ProfileResponse:
     """Upload avatar for user profile"""
     try:
-        async with session_pool() as session:
-            result = await session.execute(
-                select(Profile).where(Profile.user_id == user_id)
-            )
-            profile = result.scalar_one_or_none()
-            if not profile:
-                raise HTTPException(status_code=404, detail="Profile not found")
-
-            # Delete old avatar if exists
-            if profile.avatar:
-                try:
-                    await storage.delete_file(profile.avatar)
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to delete old avatar for user_id={user_id}: {str(e)}"
-                    )
-
-            # Upload new avatar
-            avatar_key = await storage.upload_file(file, user_id, "avatar")
+        if not await profile_cache.get(user_id):
+            raise HTTPException(status_code=404, detail="Profile not found")
 
-            # Update profile
-            profile.avatar = avatar_key
+        avatar_key = await get_storage().upload_file(file, user_id, "avatar")
+        async with get_session() as session:
+            updated = await _set_avatar(session, user_id, avatar_key)
+            if not updated:
+                await get_storage().delete_file(avatar_key)
+                raise HTTPException(status_code=404, detail="Profile not found")
+            profile, old_avatar = updated
             await session.commit()
-            await session.refresh(profile)
-
-            # Return with avatar URL
-            profile_dict = {
-                "id": profile.id,
-                "user_id": profile.user_id,
-                "phone": profile.phone,
-                "bio": profile.bio,
-                "avatar_url": (
-                    storage.get_file_url(profile.avatar) if profile.avatar else None
-                ),
-                "topic_preferences": profile.topic_preferences,
-            }
-            return ProfileResponse(**profile_dict)
+
+        # Delete old avatar once the new one is committed
+        await _delete_old_avatar(user_id, old_avatar, avatar_key)
+        cached = await profile_cache.put(profile)
+        return cached.response()
     except HTTPException:
         raise
+    except DatabaseConnectionError:
+        raise
     except DBAPIError as e:
         logger.exception(
             f"Database connection error uploading avatar for user_id={user_id}: {str(e)}"
@@ -204,3 +246,98 @@ async def upload_avatar(user_id: int, file: UploadFile) -> ProfileResponse:
             f"Unexpected error uploading avatar for user_id={user_id}: {str(e)}"
         )
         raise HTTPException(status_code=500, detail="Failed to upload avatar")
+
+
+async def create_avatar_upload_url(
+    user_id: int, request: AvatarUploadRequest
+) -> AvatarUploadResponse:
+    """Issue a presigned PUT URL so the client uploads its avatar directly to storage"""
+    if request.content_type not in AVATAR_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Only JPEG and PNG files are allowed")
+    if request.content_length > AVATAR_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Avatar must be at most {AVATAR_MAX_BYTES} bytes",
+        )
+
+    # The issue time in the key lets `sweep_avatar_uploads` spot abandoned uploads
+    filename = (
+        f"{int(time.time())}-{uuid.uuid4()}.{AVATAR_EXTENSIONS[request.content_type]}"
+    )
+    file_key = StorageProvider.build_key(user_id, "avatar", filename)
+    try:
+        upload_url = await get_storage().generate_upload_url(
+            file_key,
+            content_type=request.content_type,
+            content_length=request.content_length,
+            expires_in=AVATAR_UPLOAD_URL_EXPIRES,
+            # Avatar keys are unique per upload, so the object never changes
+            cache_control=CACHE_CONTROL_IMMUTABLE,
+        )
+    except Exception as e:
+        logger.error(
+            f"Failed to presign avatar upload for user_id={user_id}: {str(e)}"
+        )
+        raise HTTPException(status_code=500, detail="Failed to create upload URL")
+
+    task_registry.submit(f"avatar-sweep:{user_id}", sweep_avatar_uploads(user_id))
+    return AvatarUploadResponse(
+        upload_url=upload_url,
+        file_key=file_key,
+        expires_in=AVATAR_UPLOAD_URL_EXPIRES,
+        headers={
+            "Content-Type": request.content_type,
+            "Content-Length": str(request.content_length),
+            "Cache-Control": CACHE_CONTROL_IMMUTABLE,
+        },
+    )
+
+
+async def confirm_avatar_upload(
+    user_id: int, request: AvatarConfirmRequest
+) -> ProfileResponse:
+    """Validate a directly uploaded avatar and attach it to the user's profile"""
+    if not request.file_key.startswith(f"{user_id}/avatar/"):
+        raise HTTPException(status_code=403, detail="Invalid avatar key")
+
+    info = await get_storage().get_file_info(request.file_key)
+    if not info:
+        raise HTTPException(status_code=404, detail="Uploaded avatar not found")
+    if (
+        info.get("content_type") not in AVATAR_EXTENSIONS
+        or not info.get("size")
+        or info["size"] > AVATAR_MAX_BYTES
+    ):
+        await get_storage().delete_file(request.file_key)
+        raise HTTPException(status_code=400, detail="Uploaded avatar is invalid")
+
+    try:
+        async with get_session() as session:
+            updated = await _set_avatar(session, user_id, request.file_key)
+            if not updated:
+                await get_storage().delete_file(request.file_key)
+                raise HTTPException(status_code=404, detail="Profile not found")
+            profile, old_avatar = updated
+            await session.commit()
+
+        # Delete old avatar once the new one is committed
+        await _delete_old_avatar(user_id, old_avatar, request.file_key)
+        cached = await profile_cache.put(profile)
+        return cached.response()
+    except HTTPException:
+        raise
+    except DatabaseConnectionError:
+        raise
+    except DBAPIError as e:
+        logger.exception(
+            f"Database connection error confirming avatar for user_id={user_id}: {str(e)}"
+        )
+        raise DatabaseConnectionError(str(e))
+    except SQLAlchemyError as e:
+        logger.error(f"Database error confirming avatar for user_id={user_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to confirm avatar")
+    except Exception as e:
+        logger.error(
+            f"Unexpected error confirming avatar for user_id={user_id}: {str(e)}"
+        )
+        raise HTTPException(status_code=500, detail="Failed to confirm avatar")
@@ -0,0 +1,205 @@
+import os
+import gzip
+import hashlib
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# Smaller bodies are sent as is; compression would not pay for itself
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+# Encoding -> compressor, in order of preference; br/zstd only if installed
+_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {}
+try:
+    import brotli
+
+    _COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=4)
+except ImportError:
+    pass
+try:
+    import zstandard
+
+    _zstd = zstandard.ZstdCompressor(level=3)
+    _COMPRESSORS["zstd"] = _zstd.compress
+except ImportError:
+    pass
+_COMPRESSORS["gzip"] = lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+# Compressed variants get their own strong ETag (`"<hash>-gzip"`)
+_ETAG_SUFFIXES = tuple(f"-{encoding}" for encoding in _COMPRESSORS)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported encoding the client accepts (q > 0), if any."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = q
+    for encoding in _COMPRESSORS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _base_etag(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in _ETAG_SUFFIXES:
+        if tag.endswith(f'{suffix}"'):
+            return tag[: -len(suffix) - 1] + '"'
+    return tag
+
+
+class _BufferedResponse(ABC):
+    """Collect a response so its complete body can be rewritten.
+
+    Streaming responses (several body chunks) and those `wants` rejects
+    are passed through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @abstractmethod
+    def wants(self, scope, start: dict) -> bool:
+        """Whether to buffer the response that `start` begins."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def rewrite(self, scope, start: dict, body: bytes, send) -> None:
+        """Send the (possibly changed) response for the complete `body`."""
+        raise NotImplementedError
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start: Optional[dict] = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def wrapped(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                if self.wants(scope, message):
+                    start = message
+                else:
+                    passthrough = True
+                    await send(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    passthrough = True
+                    await send(start)
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": b"".join(chunks),
+                            "more_body": True,
+                        }
+                    )
+                    return
+                await self.rewrite(scope, start, b"".join(chunks), send)
+            else:
+                await send(message)
+
+        await self.app(scope, receive, wrapped)
+
+
+class ETagMiddleware(_BufferedResponse):
+    """Strong ETags on successful GET responses, answering 304 on a match.
+
+    The tag hashes the uncompressed body, so it changes exactly when the
+    representation does. Responses without a Cache-Control get
+    `private, no-cache`: clients may store them but revalidate every time,
+    and an unchanged feed or profile costs a bodiless 304.
+    """
+
+    def wants(self, scope, start: dict) -> bool:
+        return (
+            scope["method"] == "GET"
+            and start["status"] == 200
+            and "etag" not in Headers(raw=start["headers"])
+        )
+
+    async def rewrite(self, scope, start: dict, body: bytes, send) -> None:
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        headers = MutableHeaders(raw=list(start["headers"]))
+        headers["etag"] = etag
+        headers.setdefault("cache-control", "private, no-cache")
+
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+        matched = next(
+            (
+                t.strip()
+                for t in if_none_match.split(",")
+                if t.strip() == "*" or _base_etag(t) == etag
+            ),
+            None,
+        )
+        if matched:
+            # Echo the variant (e.g. the gzip tag) the client holds
+            if matched != "*":
+                headers["etag"] = matched
+            for name in ("content-length", "content-type"):
+                del headers[name]
+            await send(
+                {"type": "http.response.start", "status": 304, "headers": headers.raw}
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({**start, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
+
+
+class CompressionMiddleware(_BufferedResponse):
+    """Negotiated br/zstd/gzip compression for text-like responses.
+
+    Only bodies of at least COMPRESSION_MIN_SIZE bytes are compressed.
+    Brotli and zstd are used when their packages are installed.
+    """
+
+    def wants(self, scope, start: dict) -> bool:
+        headers = Headers(raw=start["headers"])
+        content_type = headers.get("content-type", "")
+        return (
+            start["status"] not in (204, 304)
+            and "content-encoding" not in headers
+            and content_type.startswith(_COMPRESSIBLE_TYPES)
+        )
+
+    async def rewrite(self, scope, start: dict, body: bytes, send) -> None:
+        headers = MutableHeaders(raw=list(start["headers"]))
+        headers.add_vary_header("Accept-Encoding")
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding and len(body) >= COMPRESSION_MIN_SIZE:
+            body = _COMPRESSORS[encoding](body)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["etag"] = f'{etag[:-1]}-{encoding}"'
+        await send({**start, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,176 @@
+import os
+import asyncio
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncContextManager, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..errors import LockTimeoutError
+from .logger import SingletonLogger
+
+
+class SharedBackend(ABC):
+    """Key/value cache plus named locks shared by all workers of the API.
+
+    Values are bytes with an optional TTL. `lock()` gives mutual exclusion
+    per name for up to `ttl` seconds, so single-flight work (rendering a
+    thumbnail, refreshing a feed) runs once across processes.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def lock(
+        self, name: str, ttl: float = 30.0, wait: float = 30.0
+    ) -> AsyncContextManager[None]:
+        """Hold lock `name`; raise LockTimeoutError after `wait` seconds."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Release connections, if any."""
+
+
+class MemoryBackend(SharedBackend):
+    """Per-process LRU with TTLs; locks are plain asyncio locks.
+
+    The default when no Redis is configured: correct for a single worker,
+    best-effort (per worker) with several.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        # name -> [lock, holders + waiters], dropped when nobody uses it
+        self._locks: Dict[str, List] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data.pop(key, None)
+        self._data[key] = (value, expires_at)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    @asynccontextmanager
+    async def lock(
+        self, name: str, ttl: float = 30.0, wait: float = 30.0
+    ) -> AsyncIterator[None]:
+        entry = self._locks.setdefault(name, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            try:
+                await asyncio.wait_for(entry[0].acquire(), timeout=wait)
+            except asyncio.TimeoutError:
+                raise LockTimeoutError(f"Timed out waiting for lock '{name}'")
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._locks.pop(name, None)
+
+
+# Delete the lock only if we still own it (it may have expired and been retaken)
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisBackend(SharedBackend):
+    """Redis-backed cache and locks shared across workers and hosts.
+
+    Locks are `SET NX PX` with a random token and a compare-and-delete
+    release, so an expired lock taken over by another worker is never
+    released by the previous holder.
+    """
+
+    def __init__(self, url: str, prefix: str = "arxiver:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ValueError(
+                "REDIS_URL is set but the 'redis' package is not installed"
+            ) from e
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._release = self._redis.register_script(_RELEASE_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(self._key(key))
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self._redis.set(
+            self._key(key), value, px=int(ttl * 1000) if ttl else None
+        )
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(self._key(key))
+
+    @asynccontextmanager
+    async def lock(
+        self, name: str, ttl: float = 30.0, wait: float = 30.0
+    ) -> AsyncIterator[None]:
+        key = self._key(f"lock:{name}")
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + wait
+        delay = 0.05
+        while not await self._redis.set(key, token, nx=True, px=int(ttl * 1000)):
+            if time.monotonic() >= deadline:
+                raise LockTimeoutError(f"Timed out waiting for lock '{name}'")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        try:
+            yield
+        finally:
+            try:
+                await self._release(keys=[key], args=[token])
+            except Exception as e:
+                SingletonLogger().get_logger().warning(
+                    f"Failed to release lock '{name}': {e}"
+                )
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+@lru_cache(maxsize=1)
+def get_shared_backend() -> SharedBackend:
+    """Redis when REDIS_URL is set, otherwise an in-process LRU."""
+    url = os.getenv("REDIS_URL")
+    if url:
+        return RedisBackend(url, prefix=os.getenv("REDIS_KEY_PREFIX", "arxiver:"))
+    return MemoryBackend(max_entries=int(os.getenv("SHARED_CACHE_MAX_ENTRIES", 10000)))
@@ -1,11 +1,25 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
 from fastapi import UploadFile
+from .streaming import DEFAULT_CHUNK_SIZE, DEFAULT_PART_SIZE, AsyncReadable
 
 
 class StorageProvider(ABC):
     """Abstract base class for storage providers."""
 
+    ALLOWED_CONTENT_TYPES = ["image/jpeg", "image/png"]
+
+    @classmethod
+    def is_allowed_content_type(cls, content_type: str) -> bool:
+        """Whether `content_type` may be uploaded through `upload_file`."""
+        return content_type in cls.ALLOWED_CONTENT_TYPES
+
+    @staticmethod
+    def build_key(user_id: int, folder: str, filename: str) -> str:
+        """Build the `<user_id>/<folder>/<filename>` key shared by all providers."""
+        return f"{user_id}/{folder}/{filename}"
+
     @abstractmethod
     async def upload_file(
         self, file: UploadFile, user_id: int, folder: str = "avatar"
@@ -31,11 +45,105 @@ class StorageProvider(ABC):
         folder: str = "thumbnails",
         filename: Optional[str] = None,
         content_type: str = "image/png",
+        cache_control: Optional[str] = None,
     ) -> str:
-        """Upload raw bytes and return the storage key."""
+        """Upload raw bytes and return the storage key.
+
+        `cache_control` is stored as the object's Cache-Control header; the
+        provider's default is used when omitted.
+        """
         raise NotImplementedError
 
     @abstractmethod
     async def download_file(self, file_key: str) -> Optional[bytes]:
         """Download file bytes by storage key, or None if not found."""
         raise NotImplementedError
+
+    @abstractmethod
+    async def file_exists(self, file_key: str) -> bool:
+        """Check whether a file exists under the given storage key."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def upload_stream(
+        self,
+        stream: AsyncReadable,
+        user_id: int,
+        folder: str = "papers",
+        filename: Optional[str] = None,
+        content_type: str = "application/octet-stream",
+        part_size: int = DEFAULT_PART_SIZE,
+    ) -> str:
+        """Upload from an async readable with bounded memory and return the storage key.
+
+        Large objects are sent as a multipart upload, one part at a time.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def download_stream(
+        self, file_key: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Optional[AsyncIterator[bytes]]:
+        """Return an async iterator over the file's chunks, or None if not found."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def generate_upload_url(
+        self,
+        file_key: str,
+        content_type: str,
+        content_length: int,
+        expires_in: int = 300,
+        cache_control: Optional[str] = None,
+    ) -> str:
+        """Return a presigned PUT URL bound to the key, content type and exact size.
+
+        If `cache_control` is given the uploader must send the same
+        Cache-Control header.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_file_info(self, file_key: str) -> Optional[Dict[str, Any]]:
+        """Return `{"size", "content_type", "cache_control"}` for a stored file, or None if not found."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_files(self, prefix: str) -> List[str]:
+        """List all storage keys under a prefix."""
+        raise NotImplementedError
+
+    async def exists_many(self, file_keys: Iterable[str]) -> Dict[str, bool]:
+        """Check existence of many keys at once.
+
+        Falls back to concurrent `file_exists` calls; backends override this
+        with prefix listings.
+        """
+        keys = list(dict.fromkeys(file_keys))
+        results = await asyncio.gather(*(self.file_exists(k) for k in keys))
+        return dict(zip(keys, results))
+
+    async def delete_many(self, file_keys: Iterable[str]) -> int:
+        """Delete many keys at once and return how many were deleted.
+
+        Falls back to concurrent `delete_file` calls; backends override this
+        with multi-object deletes.
+        """
+        keys = list(dict.fromkeys(file_keys))
+        results = await asyncio.gather(*(self.delete_file(k) for k in keys))
+        return sum(1 for r in results if r)
+
+    def get_file_urls(self, file_keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Resolve URLs for many keys at once."""
+        return {k: self.get_file_url(k) for k in file_keys}
+
+    async def ensure_bucket(self) -> None:
+        """Verify (and provision) the backing bucket.
+
+        Run once at startup rather than in the constructor, so building a
+        provider never touches the network. Raises ValueError if the bucket
+        is missing or inaccessible.
+        """
+
+    async def close(self) -> None:
+        """Release clients and wait for background work, if any."""
@@ -0,0 +1,105 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+from botocore.exceptions import ClientError
+
+from .streaming import S3Call
+
+# S3 DeleteObjects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+
+async def list_keys(call: S3Call, bucket: str, prefix: str) -> List[str]:
+    """List every key under `prefix`, following continuation tokens."""
+    keys: List[str] = []
+    params = {"Bucket": bucket, "Prefix": prefix}
+    while True:
+        response = await call("list_objects_v2", **params)
+        keys.extend(obj["Key"] for obj in response.get("Contents", []) or [])
+        if not response.get("IsTruncated"):
+            return keys
+        params["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def _just_below(key: str) -> str:
+    """A string sorting right before `key`, for an inclusive `StartAfter`."""
+    last = ord(key[-1])
+    return key[:-1] + (chr(last - 1) if last else "")
+
+
+async def _head_exists(call: S3Call, bucket: str, key: str) -> bool:
+    try:
+        await call("head_object", Bucket=bucket, Key=key)
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NotFound", "NoSuchKey"):
+            return False
+        raise
+
+
+async def _exists_in_prefix(
+    call: S3Call, bucket: str, prefix: str, wanted: Set[str]
+) -> Set[str]:
+    """The `wanted` keys under `prefix` that exist.
+
+    Lists only the key range `min(wanted)..max(wanted)` (S3 lists keys in
+    order), so the cost does not grow with everything else stored under the
+    prefix. A listing page costs about as much as a HEAD, so once the range
+    has taken as many pages as there are keys left to resolve, the rest are
+    checked with concurrent HEADs instead.
+    """
+    first, last = min(wanted), max(wanted)
+    params = {"Bucket": bucket, "Prefix": prefix, "StartAfter": _just_below(first)}
+    found: Set[str] = set()
+    pages = 0
+    while True:
+        response = await call("list_objects_v2", **params)
+        pages += 1
+        listed = [obj["Key"] for obj in response.get("Contents", []) or []]
+        found.update(k for k in listed if k in wanted)
+        if not response.get("IsTruncated") or (listed and listed[-1] >= last):
+            return found
+        remaining = [k for k in wanted if not listed or k > listed[-1]]
+        if pages >= len(remaining):
+            results = await asyncio.gather(
+                *(_head_exists(call, bucket, k) for k in remaining)
+            )
+            found.update(k for k, exists in zip(remaining, results) if exists)
+            return found
+        params["ContinuationToken"] = response["NextContinuationToken"]
+
+
+async def exists_many(call: S3Call, bucket: str, keys: Iterable[str]) -> Dict[str, bool]:
+    """Resolve existence of many keys with one bounded listing per parent prefix.
+
+    Keys sharing a "directory" (e.g. the thumbnails of one feed page) cost a
+    listing of just their key range instead of one HEAD each.
+    """
+    by_prefix: Dict[str, Set[str]] = defaultdict(set)
+    for key in keys:
+        prefix = key.rsplit("/", 1)[0] + "/" if "/" in key else ""
+        by_prefix[prefix].add(key)
+
+    found: Set[str] = set()
+    for prefix, wanted in by_prefix.items():
+        found |= await _exists_in_prefix(call, bucket, prefix, wanted)
+    return {key: key in found for keys_ in by_prefix.values() for key in keys_}
+
+
+async def delete_many(call: S3Call, bucket: str, keys: Iterable[str]) -> int:
+    """Delete keys with multi-object delete, 1000 per request.
+
+    Returns the number of keys deleted.
+    """
+    unique = list(dict.fromkeys(keys))
+    deleted = 0
+    for i in range(0, len(unique), DELETE_BATCH_SIZE):
+        chunk = unique[i : i + DELETE_BATCH_SIZE]
+        response = await call(
+            "delete_objects",
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": k} for k in chunk], "Quiet": True},
+        )
+        deleted += len(chunk) - len(response.get("Errors", []) or [])
+    return deleted
@@ -0,0 +1,446 @@
+import os
+import json
+import asyncio
+import hashlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import logfire
+from fastapi import UploadFile
+
+from ..logger import SingletonLogger
+from .base import StorageProvider
+from .streaming import DEFAULT_CHUNK_SIZE, DEFAULT_PART_SIZE, AsyncReadable, iter_body
+
+
+class DiskCache:
+    """Size-bounded on-disk read-through cache, evicting LRU by bytes.
+
+    Each entry is stored as `<sha256(key)>.bin` plus a `.meta` JSON sidecar
+    holding the original key, size and content sha256. Writes go to a temp
+    file and are moved into place with `os.replace` (data first, then the
+    sidecar), so readers never see a partial object. Every hit checks the
+    size; the checksum is verified once per entry version per process,
+    outside the lock. Entries that fail either check are dropped.
+
+    The directory is shared by every worker on the node, so it is the source
+    of truth: a hit touches the file's mtime (LRU order across workers), an
+    entry written by another worker is picked up on first read, and the
+    in-memory index is only a running estimate. When the estimate passes the
+    budget, or `rescan_interval` seconds after the last rebuild, a write
+    rebuilds the index from the directory and evicts the least recently
+    used entries down to EVICT_TO of the budget.
+    """
+
+    # Evict down to this fraction of max_bytes, so rescans stay infrequent
+    EVICT_TO = 0.9
+
+    def __init__(self, directory: str, max_bytes: int, rescan_interval: float = 60.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rescan_interval = rescan_interval
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        # digest -> checksum this process has already verified (or written)
+        self._verified: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._hit_counter = logfire.metric_counter(
+            "storage_cache.hits", unit="1", description="Disk cache hits"
+        )
+        self._miss_counter = logfire.metric_counter(
+            "storage_cache.misses", unit="1", description="Disk cache misses"
+        )
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    @classmethod
+    def from_env(cls) -> "DiskCache":
+        """Factory constructor using per-node environment variables."""
+        return cls(
+            directory=os.getenv(
+                "STORAGE_CACHE_DIR",
+                os.path.join(tempfile.gettempdir(), "arxiver-cache"),
+            ),
+            max_bytes=int(os.getenv("STORAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+            rescan_interval=float(os.getenv("STORAGE_CACHE_RESCAN_SECONDS", 60)),
+        )
+
+    def _paths(self, key: str) -> tuple[str, str, str]:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, digest)
+        return digest, f"{base}.bin", f"{base}.meta"
+
+    def _load_index(self, clean_temp: bool = True) -> None:
+        """Rebuild the LRU index from the directory (oldest mtime first)."""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if ".tmp" in name:
+                # Leftover from a write interrupted by a crash; while running,
+                # another worker may be mid-write, so only clean up at start
+                if clean_temp:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                continue
+            if not name.endswith(".bin"):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[: -len(".bin")], st.st_size))
+        with self._lock:
+            self._scanned_at = time.monotonic()
+            self._index.clear()
+            self._size = 0
+            for _, digest, size in sorted(entries):
+                self._index[digest] = size
+                self._size += size
+            self._verified = {
+                d: c for d, c in self._verified.items() if d in self._index
+            }
+            self._evict()
+
+    def _remove(self, digest: str) -> None:
+        size = self._index.pop(digest, 0)
+        self._size -= size
+        self._verified.pop(digest, None)
+        base = os.path.join(self.directory, digest)
+        for path in (f"{base}.bin", f"{base}.meta"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self) -> None:
+        if self._size <= self.max_bytes:
+            return
+        while self._size > self.max_bytes * self.EVICT_TO and self._index:
+            digest = next(iter(self._index))
+            self._remove(digest)
+            self.evictions += 1
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+            self._hit_counter.add(1)
+        else:
+            self.misses += 1
+            self._miss_counter.add(1)
+
+    def get_path(self, key: str) -> Optional[str]:
+        """Return the verified on-disk path for `key`, or None on a miss."""
+        return self._verified_path(key, record=True)
+
+    @staticmethod
+    def _read_meta(meta_path: str) -> Dict[str, Any]:
+        with open(meta_path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+    @staticmethod
+    def _checksum(path: str) -> str:
+        checksum = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                checksum.update(chunk)
+        return checksum.hexdigest()
+
+    def _miss(self, digest: str, record: bool, drop: bool) -> None:
+        with self._lock:
+            if drop:
+                self._remove(digest)
+            else:
+                self._size -= self._index.pop(digest, 0)
+                self._verified.pop(digest, None)
+            if record:
+                self._record(False)
+
+    def _verified_path(self, key: str, record: bool) -> Optional[str]:
+        digest, data_path, meta_path = self._paths(key)
+        # Sidecar before data: writers replace the data first, so a current
+        # sidecar always sits next to current data
+        try:
+            meta = self._read_meta(meta_path)
+            size = os.stat(data_path).st_size
+        except FileNotFoundError:
+            # Evicted or never cached (possibly by another worker)
+            self._miss(digest, record, drop=False)
+            return None
+        except (OSError, ValueError) as e:
+            SingletonLogger().get_logger().warning(
+                f"Dropping invalid cache entry for {key}: {e}"
+            )
+            self._miss(digest, record, drop=True)
+            return None
+        try:
+            if meta.get("key") != key or meta.get("size") != size:
+                raise ValueError("size mismatch")
+            if self._verified.get(digest) != meta.get("sha256"):
+                if self._checksum(data_path) != meta.get("sha256"):
+                    raise ValueError("checksum mismatch")
+                self._verified[digest] = meta["sha256"]
+        except (OSError, ValueError) as e:
+            try:
+                replaced = self._read_meta(meta_path) != meta
+            except (OSError, ValueError):
+                replaced = False
+            if replaced:
+                # Another worker is rewriting the entry; leave it alone
+                self._miss(digest, record, drop=False)
+                return None
+            SingletonLogger().get_logger().warning(
+                f"Dropping invalid cache entry for {key}: {e}"
+            )
+            self._miss(digest, record, drop=True)
+            return None
+        try:
+            os.utime(data_path)
+        except OSError:
+            pass
+        with self._lock:
+            if digest not in self._index:
+                self._size += size
+            self._index[digest] = size
+            self._index.move_to_end(digest)
+            if record:
+                self._record(True)
+        return data_path
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes for `key`, or None on a miss."""
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def put(self, key: str, content: bytes) -> None:
+        """Atomically store `content` under `key` and evict down to the budget."""
+        if len(content) > self.max_bytes:
+            return
+        digest, data_path, meta_path = self._paths(key)
+        checksum = hashlib.sha256(content).hexdigest()
+        meta = {"key": key, "size": len(content), "sha256": checksum}
+        fd, tmp_data = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(content)
+            tmp_meta = f"{tmp_data}.meta"
+            with open(tmp_meta, "w", encoding="utf-8") as fh:
+                json.dump(meta, fh)
+            with self._lock:
+                # Data first: a reader that sees the new sidecar sees new data
+                os.replace(tmp_data, data_path)
+                os.replace(tmp_meta, meta_path)
+                self._verified[digest] = checksum
+                self._size -= self._index.pop(digest, 0)
+                self._index[digest] = len(content)
+                self._size += len(content)
+                rescan = (
+                    self._size > self.max_bytes
+                    or time.monotonic() - self._scanned_at >= self.rescan_interval
+                )
+            if rescan:
+                # Other workers write here too; account for their entries
+                self._load_index(clean_temp=False)
+        except OSError as e:
+            SingletonLogger().get_logger().warning(f"Cache write failed for {key}: {e}")
+            for path in (tmp_data, f"{tmp_data}.meta"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def invalidate(self, key: str) -> None:
+        digest, _, _ = self._paths(key)
+        with self._lock:
+            self._remove(digest)
+
+    async def get_async(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def put_async(self, key: str, content: bytes) -> None:
+        await asyncio.to_thread(self.put, key, content)
+
+    async def invalidate_async(self, key: str) -> None:
+        await asyncio.to_thread(self.invalidate, key)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._index),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_disk_cache() -> Optional[DiskCache]:
+    """Return the node-local disk cache, or None if STORAGE_CACHE_ENABLED is off."""
+    enabled = os.getenv("STORAGE_CACHE_ENABLED", "true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    return DiskCache.from_env() if enabled else None
+
+
+class CachedStorage(StorageProvider):
+    """Read-through disk cache in front of another `StorageProvider`.
+
+    `download_file` and `download_stream` are served from the local cache
+    when possible; writes and deletes through this wrapper invalidate the
+    affected keys. Everything else is delegated to the wrapped provider.
+    """
+
+    def __init__(self, inner: StorageProvider, cache: DiskCache):
+        self.inner = inner
+        self.cache = cache
+
+    @classmethod
+    def wrap(cls, inner: StorageProvider) -> StorageProvider:
+        """Wrap `inner` with the node cache if caching is enabled."""
+        cache = get_disk_cache()
+        return cls(inner, cache) if cache is not None else inner
+
+    def __getattr__(self, name: str):
+        return getattr(self.inner, name)
+
+    @staticmethod
+    def _cache_key(file_key: str) -> str:
+        return f"storage:{file_key}"
+
+    async def upload_file(
+        self, file: UploadFile, user_id: int, folder: str = "avatar"
+    ) -> str:
+        return await self.inner.upload_file(file, user_id, folder)
+
+    def get_file_url(self, file_key: str) -> Optional[str]:
+        return self.inner.get_file_url(file_key)
+
+    async def delete_file(self, file_key: str) -> bool:
+        await self.cache.invalidate_async(self._cache_key(file_key))
+        return await self.inner.delete_file(file_key)
+
+    async def upload_bytes(
+        self,
+        content: bytes,
+        user_id: int,
+        folder: str = "thumbnails",
+        filename: Optional[str] = None,
+        content_type: str = "image/png",
+        cache_control: Optional[str] = None,
+    ) -> str:
+        key = await self.inner.upload_bytes(
+            content,
+            user_id,
+            folder=folder,
+            filename=filename,
+            content_type=content_type,
+            cache_control=cache_control,
+        )
+        await self.cache.put_async(self._cache_key(key), content)
+        return key
+
+    async def download_file(self, file_key: str) -> Optional[bytes]:
+        cached = await self.cache.get_async(self._cache_key(file_key))
+        if cached is not None:
+            return cached
+        content = await self.inner.download_file(file_key)
+        if content is not None:
+            await self.cache.put_async(self._cache_key(file_key), content)
+        return content
+
+    async def file_exists(self, file_key: str) -> bool:
+        return await self.inner.file_exists(file_key)
+
+    async def upload_stream(
+        self,
+        stream: AsyncReadable,
+        user_id: int,
+        folder: str = "papers",
+        filename: Optional[str] = None,
+        content_type: str = "application/octet-stream",
+        part_size: int = DEFAULT_PART_SIZE,
+    ) -> str:
+        key = await self.inner.upload_stream(
+            stream,
+            user_id,
+            folder=folder,
+            filename=filename,
+            content_type=content_type,
+            part_size=part_size,
+        )
+        await self.cache.invalidate_async(self._cache_key(key))
+        return key
+
+    async def download_stream(
+        self, file_key: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Optional[AsyncIterator[bytes]]:
+        path = await asyncio.to_thread(self.cache.get_path, self._cache_key(file_key))
+        if path is None:
+            return await self.inner.download_stream(file_key, chunk_size)
+        fh = await asyncio.to_thread(open, path, "rb")
+        return iter_body(
+            lambda n: asyncio.to_thread(fh.read, n), fh.close, chunk_size
+        )
+
+    async def generate_upload_url(
+        self,
+        file_key: str,
+        content_type: str,
+        content_length: int,
+        expires_in: int = 300,
+        cache_control: Optional[str] = None,
+    ) -> str:
+        await self.cache.invalidate_async(self._cache_key(file_key))
+        return await self.inner.generate_upload_url(
+            file_key, content_type, content_length, expires_in, cache_control
+        )
+
+    async def get_file_info(self, file_key: str) -> Optional[Dict[str, Any]]:
+        return await self.inner.get_file_info(file_key)
+
+    async def list_files(self, prefix: str) -> List[str]:
+        return await self.inner.list_files(prefix)
+
+    async def exists_many(self, file_keys: Iterable[str]) -> Dict[str, bool]:
+        return await self.inner.exists_many(file_keys)
+
+    async def delete_many(self, file_keys: Iterable[str]) -> int:
+        keys = list(file_keys)
+        for key in keys:
+            await self.cache.invalidate_async(self._cache_key(key))
+        return await self.inner.delete_many(keys)
+
+    def get_file_urls(self, file_keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        return self.inner.get_file_urls(file_keys)
+
+    async def ensure_bucket(self) -> None:
+        await self.inner.ensure_bucket()
+
+    async def close(self) -> None:
+        await self.inner.close()
@@ -0,0 +1,83 @@
+import os
+import asyncio
+import threading
+from typing import Callable, Optional
+
+from ..logger import SingletonLogger
+from .base import StorageProvider
+
+PROVISION_TIMEOUT = float(os.getenv("STORAGE_PROVISION_TIMEOUT", 10))
+PROVISION_STRICT = os.getenv("STORAGE_PROVISION_STRICT", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+
+def _default_factory() -> StorageProvider:
+    from .cache import CachedStorage
+    from .tiered import TieredStorage
+
+    return CachedStorage.wrap(TieredStorage.from_env())
+
+
+_factory: Callable[[], StorageProvider] = _default_factory
+_storage: Optional[StorageProvider] = None
+_lock = threading.Lock()
+
+
+def get_storage() -> StorageProvider:
+    """Return the process-wide storage provider, building it on first use.
+
+    Construction only reads the environment and creates clients; it never
+    talks to the network (see `provision_storage`). Usable as a FastAPI
+    dependency.
+    """
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                _storage = _factory()
+    return _storage
+
+
+def register_storage(
+    provider: Optional[StorageProvider] = None,
+    factory: Optional[Callable[[], StorageProvider]] = None,
+) -> None:
+    """Install a provider instance or factory, replacing the current one.
+
+    Calling it with no arguments restores the env-configured default.
+    """
+    global _storage, _factory
+    with _lock:
+        _storage = provider
+        _factory = factory or _default_factory
+
+
+async def provision_storage(timeout: float = PROVISION_TIMEOUT) -> bool:
+    """Verify/provision buckets at startup, bounded by `timeout` seconds.
+
+    Returns True on success. Failures are logged and the app keeps starting
+    unless STORAGE_PROVISION_STRICT is set, in which case they are raised.
+    """
+    logger = SingletonLogger().get_logger()
+    try:
+        storage = get_storage()
+        await asyncio.wait_for(storage.ensure_bucket(), timeout=timeout)
+        return True
+    except asyncio.TimeoutError:
+        logger.warning(f"Storage provisioning timed out after {timeout}s")
+        if PROVISION_STRICT:
+            raise
+    except Exception as e:
+        logger.warning(f"Storage provisioning failed: {e}")
+        if PROVISION_STRICT:
+            raise
+    return False
+
+
+async def close_storage() -> None:
+    """Close the provider if it was ever created."""
+    if _storage is not None:
+        await _storage.close()
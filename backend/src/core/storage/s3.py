@@ -0,0 +1,582 @@
+import os
+import asyncio
+import uuid
+from contextlib import AsyncExitStack
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+import aiohttp
+import botocore.session
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from botocore.config import Config
+from botocore.exceptions import ClientError, NoCredentialsError
+from fastapi import HTTPException, UploadFile
+
+from ..logger import SingletonLogger
+from .base import StorageProvider
+from .batch import delete_many, exists_many, list_keys
+from .streaming import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_PART_SIZE,
+    AsyncReadable,
+    iter_body,
+    multipart_upload,
+)
+from .urls import (
+    CACHE_CONTROL_DEFAULT,
+    CACHE_CONTROL_IMMUTABLE,
+    SIGNED_URLS,
+    SignedUrlCache,
+    UploadSigner,
+)
+
+
+async def make_supabase_bucket_public(
+    project_ref: str,
+    bucket_name: str,
+    service_role_key: Optional[str],
+    supabase_api_key: Optional[str],
+) -> None:
+    """Mark the bucket public through the Supabase Storage REST API.
+
+    Async counterpart of `SupabaseStorage._make_bucket_public`; failures are
+    logged, never raised, so provisioning continues.
+    """
+    logger = SingletonLogger().get_logger()
+    if not service_role_key or not supabase_api_key:
+        logger.warning(
+            "SUPABASE_SERVICE_ROLE_KEY or SUPABASE_API_KEY not found. Bucket may not be public."
+        )
+        logger.warning(
+            "Please ensure the bucket is set to public in your Supabase dashboard."
+        )
+        return
+
+    url = f"https://{project_ref}.supabase.co/storage/v1/bucket/{bucket_name}"
+    headers = {
+        "apikey": service_role_key,
+        "Authorization": f"Bearer {service_role_key}",
+        "Content-Type": "application/json",
+    }
+    try:
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10)
+        ) as session:
+            async with session.put(
+                url, headers=headers, json={"name": bucket_name, "public": True}
+            ) as response:
+                if response.status == 200:
+                    logger.info(f"Successfully made bucket '{bucket_name}' public")
+                    return
+                logger.warning(
+                    f"Could not make bucket public. Status: {response.status}"
+                )
+                logger.debug(f"Response: {await response.text()}")
+    except Exception as e:
+        logger.warning(f"Error making bucket public: {e}")
+    logger.warning(
+        "Please ensure the bucket is set to public in your Supabase dashboard."
+    )
+
+
+class AsyncS3Storage(StorageProvider):
+    """Native async S3-compatible storage provider built on aiobotocore.
+
+    Unlike `SupabaseStorage` and `SynologyStorage`, no call goes through
+    `asyncio.to_thread`: requests share one pooled aiohttp connector sized by
+    `max_pool_connections`, and `max_concurrency` caps in-flight operations so
+    bursts of thumbnail/avatar traffic queue instead of exhausting the pool.
+
+    The underlying client is created lazily on first use and released by
+    `close()`. Presets can pass `on_provision`, run by `ensure_bucket` once the
+    bucket is known to exist (Supabase uses it to make the bucket public).
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        key_id: str,
+        application_key: str,
+        bucket_name: str,
+        region_name: Optional[str] = None,
+        public_url_base: Optional[str] = None,
+        default_acl: Optional[str] = None,
+        max_pool_connections: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        s3_config: Optional[Dict[str, Any]] = None,
+        signature_version: Optional[str] = None,
+        on_provision: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        if not all([endpoint_url, key_id, application_key, bucket_name]):
+            raise ValueError(
+                "S3 storage credentials not properly configured. "
+                "endpoint_url, key_id, application_key and bucket_name are required."
+            )
+
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.key_id = key_id
+        self.application_key = application_key
+        self.bucket_name = bucket_name
+        self.region_name = region_name
+        self.public_url_base = (
+            public_url_base or f"{self.endpoint_url}/{self.bucket_name}"
+        ).rstrip("/")
+        self.default_acl = default_acl
+        self.on_provision = on_provision
+
+        self.max_pool_connections = max_pool_connections or int(
+            os.getenv("S3_MAX_POOL_CONNECTIONS", 50)
+        )
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("S3_MAX_CONCURRENCY", 32)
+        )
+        config_kwargs: Dict[str, Any] = {
+            "max_pool_connections": self.max_pool_connections,
+            "connect_timeout": connect_timeout
+            or float(os.getenv("S3_CONNECT_TIMEOUT", 5)),
+            "read_timeout": read_timeout or float(os.getenv("S3_READ_TIMEOUT", 60)),
+            "retries": {"max_attempts": 3, "mode": "standard"},
+        }
+        signing_kwargs: Dict[str, Any] = {}
+        if s3_config:
+            signing_kwargs["s3"] = s3_config
+        if signature_version:
+            signing_kwargs["signature_version"] = signature_version
+        config_kwargs.update(signing_kwargs)
+        self._signing_config = Config(**signing_kwargs)
+
+        self._client_kwargs: Dict[str, Any] = {
+            "endpoint_url": self.endpoint_url,
+            "aws_access_key_id": self.key_id,
+            "aws_secret_access_key": self.application_key,
+            "config": AioConfig(**config_kwargs),
+        }
+        if self.region_name:
+            self._client_kwargs["region_name"] = self.region_name
+
+        self._session = get_session()
+        self._client = None
+        self._client_lock = asyncio.Lock()
+        self._exit_stack = AsyncExitStack()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Presigned GET URLs are signed locally by a sync botocore client so
+        # `get_file_url` stays synchronous; it never makes a network call.
+        self.signed_urls = SIGNED_URLS
+        self._signed_url_cache = SignedUrlCache()
+        self._signing_client = None
+        self._upload_signer = UploadSigner(
+            self.endpoint_url,
+            self.key_id,
+            self.application_key,
+            self.bucket_name,
+            region_name=self.region_name,
+            s3_config=s3_config,
+        )
+
+    @classmethod
+    def supabase_from_env(cls) -> "AsyncS3Storage":
+        """Async provider configured from the Supabase S3 environment variables."""
+        endpoint_url = os.getenv("S3_STORAGE_URL")
+        bucket_name = os.getenv("S3_STORAGE_BUCKET_NAME")
+        if not endpoint_url or not bucket_name:
+            raise ValueError(
+                "Supabase storage credentials not properly configured. "
+                "Make sure S3_STORAGE_URL, S3_ACCESS_KEY_ID, S3_SECRET_ACCESS_KEY, "
+                "and S3_STORAGE_BUCKET_NAME are set in your .env file."
+            )
+        # S3_STORAGE_URL format: https://<project_ref>.storage.supabase.co/storage/v1/s3
+        project_ref = endpoint_url.split(".")[0].replace("https://", "")
+        return cls(
+            endpoint_url=endpoint_url,
+            key_id=os.getenv("S3_ACCESS_KEY_ID"),
+            application_key=os.getenv("S3_SECRET_ACCESS_KEY"),
+            bucket_name=bucket_name,
+            region_name=os.getenv("S3_STORAGE_REGION"),
+            public_url_base=f"https://{project_ref}.supabase.co/storage/v1/object/public/{bucket_name}",
+            default_acl="public-read",
+            on_provision=partial(
+                make_supabase_bucket_public,
+                project_ref,
+                bucket_name,
+                os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
+                os.getenv("SUPABASE_API_KEY"),
+            ),
+        )
+
+    @classmethod
+    def synology_from_env(cls) -> "AsyncS3Storage":
+        """Async provider configured from the Synology S3 environment variables."""
+        return cls(
+            endpoint_url=os.getenv("SYNOLOGY_BUCKET_URL"),
+            key_id=os.getenv("SYNOLOGY_KEY_ID"),
+            application_key=os.getenv("SYNOLOGY_MASTER_KEY"),
+            bucket_name=os.getenv("SYNOLOGY_BUCKET_NAME"),
+            region_name=os.getenv("SYNOLOGY_REGION") or None,
+            # Synology S3 compatibility (avoid aws-chunked)
+            s3_config={"addressing_style": "path", "payload_signing_enabled": False},
+            signature_version="s3",
+        )
+
+    async def _get_client(self):
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    self._client = await self._exit_stack.enter_async_context(
+                        self._session.create_client("s3", **self._client_kwargs)
+                    )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the pooled client and its connections."""
+        async with self._client_lock:
+            await self._exit_stack.aclose()
+            self._client = None
+            self._exit_stack = AsyncExitStack()
+
+    async def ensure_bucket(self) -> None:
+        """Raise ValueError if the bucket is missing or inaccessible, then run
+        the preset's `on_provision` hook."""
+        client = await self._get_client()
+        try:
+            async with self._semaphore:
+                await client.head_bucket(Bucket=self.bucket_name)
+        except ClientError as e:
+            error_code = e.response.get("Error", {}).get("Code")
+            if error_code in {"404", "NoSuchBucket"}:
+                raise ValueError(
+                    f"Bucket '{self.bucket_name}' does not exist at {self.endpoint_url}. Create it first."
+                )
+            raise ValueError(f"Bucket access error: {e}")
+        if self.on_provision is not None:
+            await self.on_provision()
+
+    async def _put_object(
+        self,
+        key: str,
+        body: bytes,
+        content_type: str,
+        cache_control: Optional[str] = None,
+    ) -> None:
+        client = await self._get_client()
+        params: Dict[str, Any] = {
+            "Bucket": self.bucket_name,
+            "Key": key,
+            "Body": body,
+            "ContentLength": len(body),
+            "ContentType": content_type,
+            "CacheControl": cache_control or CACHE_CONTROL_DEFAULT,
+        }
+        if self.default_acl:
+            params["ACL"] = self.default_acl
+        async with self._semaphore:
+            await client.put_object(**params)
+
+    async def upload_file(
+        self, file: UploadFile, user_id: int, folder: str = "avatar"
+    ) -> str:
+        """Upload file to S3 storage and return the file key"""
+        if not self.is_allowed_content_type(file.content_type):
+            raise HTTPException(
+                status_code=400, detail="Only JPEG and PNG files are allowed"
+            )
+
+        file_extension = file.filename.split(".")[-1] if "." in file.filename else "jpg"
+        unique_filename = f"{uuid.uuid4()}.{file_extension}"
+        key = AsyncS3Storage.build_key(user_id, folder, unique_filename)
+
+        try:
+            await multipart_upload(
+                self._call,
+                bucket=self.bucket_name,
+                key=key,
+                stream=file,
+                content_type=file.content_type,
+                # Keys are unique per upload, so the object never changes
+                extra_args=self._extra_args(CacheControl=CACHE_CONTROL_IMMUTABLE),
+            )
+            return key
+        except NoCredentialsError as e:
+            SingletonLogger().get_logger().error(f"Storage credentials error: {e}")
+            raise HTTPException(status_code=500, detail="Storage credentials error")
+        except ClientError as e:
+            SingletonLogger().get_logger().error(f"Storage upload error: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"Storage upload error: {str(e)}"
+            )
+        except Exception as e:
+            SingletonLogger().get_logger().error(f"Upload failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    def _extra_args(self, **extra: Any) -> Optional[Dict[str, Any]]:
+        if self.default_acl:
+            extra["ACL"] = self.default_acl
+        return extra or None
+
+    def _presign_get(self, file_key: str, expires_in: int) -> str:
+        if self._signing_client is None:
+            self._signing_client = botocore.session.get_session().create_client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                aws_access_key_id=self.key_id,
+                aws_secret_access_key=self.application_key,
+                region_name=self.region_name,
+                config=self._signing_config,
+            )
+        return self._signing_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket_name, "Key": file_key},
+            ExpiresIn=expires_in,
+        )
+
+    def get_file_url(self, file_key: str) -> Optional[str]:
+        """Generate public URL for the file, or a presigned URL if enabled"""
+        if not file_key:
+            return None
+        if self.signed_urls:
+            return self._signed_url_cache.get(file_key, self._presign_get)
+        return f"{self.public_url_base}/{file_key}"
+
+    async def delete_file(self, file_key: str) -> bool:
+        """Delete file from S3 storage"""
+        self._signed_url_cache.invalidate(file_key)
+        try:
+            client = await self._get_client()
+            async with self._semaphore:
+                await client.delete_object(Bucket=self.bucket_name, Key=file_key)
+            return True
+        except ClientError as e:
+            SingletonLogger().get_logger().error(
+                f"Client error deleting file {file_key}: {e}"
+            )
+            return False
+        except Exception as e:
+            SingletonLogger().get_logger().error(f"Error deleting file {file_key}: {e}")
+            return False
+
+    async def upload_bytes(
+        self,
+        content: bytes,
+        user_id: int,
+        folder: str = "thumbnails",
+        filename: Optional[str] = None,
+        content_type: str = "image/png",
+        cache_control: Optional[str] = None,
+    ) -> str:
+        """Upload raw bytes to S3 storage and return the file key."""
+        try:
+            name = filename or f"{uuid.uuid4()}.png"
+            key = AsyncS3Storage.build_key(user_id, folder, name)
+            await self._put_object(key, content, content_type, cache_control)
+            SingletonLogger().get_logger().info(
+                f"Uploaded object to storage: bucket={self.bucket_name} key={key} bytes={len(content)}"
+            )
+            return key
+        except NoCredentialsError as e:
+            SingletonLogger().get_logger().error(f"Storage credentials error: {e}")
+            raise HTTPException(status_code=500, detail="Storage credentials error")
+        except ClientError as e:
+            SingletonLogger().get_logger().error(f"Storage upload error: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"Storage upload error: {str(e)}"
+            )
+        except Exception as e:
+            SingletonLogger().get_logger().error(f"Upload failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    async def download_file(self, file_key: str) -> Optional[bytes]:
+        """Download file bytes from S3 storage."""
+        try:
+            client = await self._get_client()
+            async with self._semaphore:
+                response = await client.get_object(
+                    Bucket=self.bucket_name, Key=file_key
+                )
+                body = response.get("Body")
+                if body is None:
+                    return None
+                async with body as stream:
+                    return await stream.read()
+        except ClientError as e:
+            SingletonLogger().get_logger().error(
+                f"Client error downloading file {file_key}: {e}"
+            )
+            return None
+        except Exception as e:
+            SingletonLogger().get_logger().error(
+                f"Error downloading file {file_key}: {e}"
+            )
+            return None
+
+    async def file_exists(self, file_key: str) -> bool:
+        """Check if a file exists in the bucket via HEAD."""
+        try:
+            client = await self._get_client()
+            async with self._semaphore:
+                await client.head_object(Bucket=self.bucket_name, Key=file_key)
+            return True
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code in ("404", "NotFound", "NoSuchKey"):
+                return False
+            SingletonLogger().get_logger().error(
+                f"Error checking existence for {file_key}: {e}"
+            )
+            return False
+        except Exception as e:
+            SingletonLogger().get_logger().error(
+                f"Unexpected error checking existence for {file_key}: {e}"
+            )
+            return False
+
+    async def _call(self, operation: str, **params):
+        """Run one S3 operation on the pooled client under the concurrency cap."""
+        client = await self._get_client()
+        async with self._semaphore:
+            return await getattr(client, operation)(**params)
+
+    async def upload_stream(
+        self,
+        stream: AsyncReadable,
+        user_id: int,
+        folder: str = "papers",
+        filename: Optional[str] = None,
+        content_type: str = "application/octet-stream",
+        part_size: int = DEFAULT_PART_SIZE,
+    ) -> str:
+        """Stream an upload using multipart upload for large objects.
+
+        At most one part (`part_size` bytes) is held in memory at a time, and
+        the concurrency slot is only held per part, not for the whole upload.
+        """
+        name = filename or str(uuid.uuid4())
+        key = AsyncS3Storage.build_key(user_id, folder, name)
+        try:
+            size = await multipart_upload(
+                self._call,
+                bucket=self.bucket_name,
+                key=key,
+                stream=stream,
+                content_type=content_type,
+                part_size=part_size,
+                extra_args=self._extra_args(),
+            )
+            SingletonLogger().get_logger().info(
+                f"Streamed upload to storage: bucket={self.bucket_name} key={key} bytes={size}"
+            )
+            return key
+        except NoCredentialsError as e:
+            SingletonLogger().get_logger().error(f"Storage credentials error: {e}")
+            raise HTTPException(status_code=500, detail="Storage credentials error")
+        except ClientError as e:
+            SingletonLogger().get_logger().error(f"Storage upload error: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"Storage upload error: {str(e)}"
+            )
+        except Exception as e:
+            SingletonLogger().get_logger().error(f"Upload failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    async def download_stream(
+        self, file_key: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Optional[AsyncIterator[bytes]]:
+        """Stream file bytes in `chunk_size` pieces straight off the connection."""
+        try:
+            response = await self._call(
+                "get_object", Bucket=self.bucket_name, Key=file_key
+            )
+        except ClientError as e:
+            SingletonLogger().get_logger().error(
+                f"Client error downloading file {file_key}: {e}"
+            )
+            return None
+        except Exception as e:
+            SingletonLogger().get_logger().error(
+                f"Error downloading file {file_key}: {e}"
+            )
+            return None
+        body = response.get("Body")
+        if body is None:
+            return None
+        return iter_body(body.read, body.close, chunk_size)
+
+    async def generate_upload_url(
+        self,
+        file_key: str,
+        content_type: str,
+        content_length: int,
+        expires_in: int = 300,
+        cache_control: Optional[str] = None,
+    ) -> str:
+        """Presign a direct PUT to S3 storage.
+
+        Signed with SigV4 (see `UploadSigner`) regardless of
+        `signature_version`: content type, length and Cache-Control are part
+        of the signature, so the client must upload exactly the declared
+        object.
+        """
+        return self._upload_signer.presign_put(
+            file_key, content_type, content_length, expires_in, cache_control
+        )
+
+    async def get_file_info(self, file_key: str) -> Optional[Dict[str, Any]]:
+        """Return size and content type of a stored object via HEAD."""
+        try:
+            response = await self._call(
+                "head_object", Bucket=self.bucket_name, Key=file_key
+            )
+            return {
+                "size": response.get("ContentLength"),
+                "content_type": response.get("ContentType"),
+                "cache_control": response.get("CacheControl"),
+            }
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code not in ("404", "NotFound", "NoSuchKey"):
+                SingletonLogger().get_logger().error(
+                    f"Error reading metadata for {file_key}: {e}"
+                )
+            return None
+        except Exception as e:
+            SingletonLogger().get_logger().error(
+                f"Unexpected error reading metadata for {file_key}: {e}"
+            )
+            return None
+
+    async def list_files(self, prefix: str) -> List[str]:
+        """List all keys under `prefix` in the bucket."""
+        return await list_keys(self._call, self.bucket_name, prefix)
+
+    async def exists_many(self, file_keys: Iterable[str]) -> Dict[str, bool]:
+        """Check existence of many keys with one listing per parent prefix."""
+        keys = list(file_keys)
+        try:
+            return await exists_many(self._call, self.bucket_name, keys)
+        except Exception as e:
+            SingletonLogger().get_logger().warning(
+                f"Batch existence check failed, falling back to HEAD: {e}"
+            )
+            return await super().exists_many(keys)
+
+    async def delete_many(self, file_keys: Iterable[str]) -> int:
+        """Delete many keys from the bucket with multi-object delete."""
+        try:
+            return await delete_many(self._call, self.bucket_name, file_keys)
+        except ClientError as e:
+            SingletonLogger().get_logger().error(f"Client error in batch delete: {e}")
+            return 0
+        except Exception as e:
+            SingletonLogger().get_logger().error(f"Error in batch delete: {e}")
+            return 0
@@ -0,0 +1,126 @@
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Protocol
+
+# S3 requires every part except the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = max(
+    MIN_PART_SIZE, int(os.getenv("STORAGE_MULTIPART_PART_SIZE", 8 * 1024 * 1024))
+)
+DEFAULT_CHUNK_SIZE = int(os.getenv("STORAGE_DOWNLOAD_CHUNK_SIZE", 256 * 1024))
+
+S3Call = Callable[..., Awaitable[Dict[str, Any]]]
+
+
+class AsyncReadable(Protocol):
+    """Anything with an async `read(size)`, e.g. FastAPI's `UploadFile`."""
+
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+async def read_part(stream: AsyncReadable, size: int) -> bytes:
+    """Read up to `size` bytes, looping over short reads until EOF."""
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = await stream.read(size - len(buf))
+        if not chunk:
+            break
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+async def multipart_upload(
+    call: S3Call,
+    bucket: str,
+    key: str,
+    stream: AsyncReadable,
+    content_type: str,
+    part_size: int = DEFAULT_PART_SIZE,
+    extra_args: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Upload `stream` to `bucket/key` holding at most one part in memory.
+
+    Objects smaller than one part go through a single `put_object`; larger
+    ones use S3 multipart upload, which is aborted on failure so no orphaned
+    parts are left behind. `call(operation, **params)` performs one S3 API
+    operation on whichever client (sync or async) the provider wraps.
+
+    Returns the number of bytes uploaded.
+    """
+    part_size = max(MIN_PART_SIZE, part_size)
+    extra_args = extra_args or {}
+
+    first = await read_part(stream, part_size)
+    if len(first) < part_size:
+        await call(
+            "put_object",
+            Bucket=bucket,
+            Key=key,
+            Body=first,
+            ContentLength=len(first),
+            ContentType=content_type,
+            **extra_args,
+        )
+        return len(first)
+
+    created = await call(
+        "create_multipart_upload",
+        Bucket=bucket,
+        Key=key,
+        ContentType=content_type,
+        **extra_args,
+    )
+    upload_id = created["UploadId"]
+    parts = []
+    total = 0
+    try:
+        part = first
+        part_number = 1
+        while part:
+            response = await call(
+                "upload_part",
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=part,
+                ContentLength=len(part),
+            )
+            parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+            total += len(part)
+            part_number += 1
+            part = await read_part(stream, part_size)
+
+        await call(
+            "complete_multipart_upload",
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+        return total
+    except BaseException:
+        try:
+            await call(
+                "abort_multipart_upload", Bucket=bucket, Key=key, UploadId=upload_id
+            )
+        except Exception:
+            pass
+        raise
+
+
+async def iter_body(
+    read: Callable[[int], Awaitable[bytes]],
+    close: Callable[[], Any],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yield an object body in `chunk_size` pieces and close it afterwards."""
+    try:
+        while True:
+            chunk = await read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        result = close()
+        if hasattr(result, "__await__"):
+            await result
@@ -1,13 +1,28 @@
 import boto3
 import os
 import asyncio
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
 from botocore.config import Config
 from botocore.exceptions import NoCredentialsError, ClientError
 from fastapi import UploadFile, HTTPException
 import uuid
 from ..logger import SingletonLogger
 from .base import StorageProvider
+from .batch import delete_many, exists_many, list_keys
+from .urls import (
+    CACHE_CONTROL_DEFAULT,
+    CACHE_CONTROL_IMMUTABLE,
+    SIGNED_URLS,
+    SignedUrlCache,
+    UploadSigner,
+)
+from .streaming import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_PART_SIZE,
+    AsyncReadable,
+    iter_body,
+    multipart_upload,
+)
 
 
 class SynologyStorage(StorageProvider):
@@ -70,9 +85,22 @@ class SynologyStorage(StorageProvider):
         else:
             self.s3_client = s3_client
 
-        # Ensure bucket exists
+        # Serve presigned GET URLs instead of public ones (private buckets)
+        self.signed_urls = SIGNED_URLS
+        self._signed_url_cache = SignedUrlCache()
+        self._upload_signer = UploadSigner(
+            self.endpoint_url,
+            self.key_id,
+            self.application_key,
+            self.bucket_name,
+            region_name=self.region_name,
+            s3_config={"addressing_style": "path"},
+        )
+
+    async def ensure_bucket(self) -> None:
+        """Raise ValueError if the configured bucket is missing or inaccessible."""
         try:
-            self.s3_client.head_bucket(Bucket=self.bucket_name)
+            await self._call("head_bucket", Bucket=self.bucket_name)
         except ClientError as e:
             error_code = e.response.get("Error", {}).get("Code")
             if error_code in {"404", "NoSuchBucket"}:
@@ -112,17 +140,15 @@ class SynologyStorage(StorageProvider):
         key = SynologyStorage.build_key(user_id, folder, unique_filename)
 
         try:
-            # Read file content
-            file_content = await file.read()
-
-            # Upload to Synology S3 (wrap blocking boto3 call)
-            await asyncio.to_thread(
-                self.s3_client.put_object,
-                Bucket=self.bucket_name,
-                Key=key,
-                Body=file_content,
-                ContentLength=len(file_content),
-                ContentType=file.content_type,
+            # Stream to Synology S3 without buffering the whole file
+            await multipart_upload(
+                self._call,
+                bucket=self.bucket_name,
+                key=key,
+                stream=file,
+                content_type=file.content_type,
+                # Keys are unique per upload, so the object never changes
+                extra_args={"CacheControl": CACHE_CONTROL_IMMUTABLE},
             )
 
             return key
@@ -140,14 +166,27 @@ class SynologyStorage(StorageProvider):
             raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
     def get_file_url(self, file_key: str) -> Optional[str]:
-        """Generate public URL for the file (if bucket/server serves it)."""
+        """Generate public URL for the file (if bucket/server serves it).
+
+        Returns a presigned URL instead when signed URLs are enabled.
+        """
         if not file_key:
             return None
+        if self.signed_urls:
+            return self._signed_url_cache.get(file_key, self._presign_get)
         base = (self.endpoint_url or "").rstrip("/")
         return f"{base}/{self.bucket_name}/{file_key}"
 
+    def _presign_get(self, file_key: str, expires_in: int) -> str:
+        return self.s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket_name, "Key": file_key},
+            ExpiresIn=expires_in,
+        )
+
     async def delete_file(self, file_key: str) -> bool:
         """Delete file from Synology S3"""
+        self._signed_url_cache.invalidate(file_key)
         try:
             await asyncio.to_thread(
                 self.s3_client.delete_object, Bucket=self.bucket_name, Key=file_key
@@ -169,6 +208,7 @@ class SynologyStorage(StorageProvider):
         folder: str = "thumbnails",
         filename: Optional[str] = None,
         content_type: str = "image/png",
+        cache_control: Optional[str] = None,
     ) -> str:
         """Upload raw bytes to Synology S3 and return the file key.
 
@@ -184,6 +224,7 @@ class SynologyStorage(StorageProvider):
                 Body=content,
                 ContentLength=len(content),
                 ContentType=content_type,
+                CacheControl=cache_control or CACHE_CONTROL_DEFAULT,
             )
             return key
         except NoCredentialsError as e:
@@ -221,4 +262,161 @@ class SynologyStorage(StorageProvider):
             )
             return None
 
-storage = SynologyStorage.from_env()
\ No newline at end of file
+    async def file_exists(self, file_key: str) -> bool:
+        """Check if a file exists in the Synology bucket via HEAD."""
+        try:
+            await asyncio.to_thread(
+                self.s3_client.head_object, Bucket=self.bucket_name, Key=file_key
+            )
+            return True
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code in ("404", "NotFound", "NoSuchKey"):
+                return False
+            SingletonLogger().get_logger().error(
+                f"Error checking existence for {file_key}: {e}"
+            )
+            return False
+        except Exception as e:
+            SingletonLogger().get_logger().error(
+                f"Unexpected error checking existence for {file_key}: {e}"
+            )
+            return False
+
+    async def _call(self, operation: str, **params):
+        """Run a blocking boto3 operation in a worker thread."""
+        return await asyncio.to_thread(getattr(self.s3_client, operation), **params)
+
+    async def upload_stream(
+        self,
+        stream: AsyncReadable,
+        user_id: int,
+        folder: str = "papers",
+        filename: Optional[str] = None,
+        content_type: str = "application/octet-stream",
+        part_size: int = DEFAULT_PART_SIZE,
+    ) -> str:
+        """Stream an upload to Synology S3 using multipart upload for large objects.
+
+        At most one part (`part_size` bytes) is held in memory at a time.
+        """
+        name = filename or str(uuid.uuid4())
+        key = SynologyStorage.build_key(user_id, folder, name)
+        try:
+            size = await multipart_upload(
+                self._call,
+                bucket=self.bucket_name,
+                key=key,
+                stream=stream,
+                content_type=content_type,
+                part_size=part_size,
+                extra_args=None,
+            )
+            SingletonLogger().get_logger().info(
+                f"Streamed upload to storage: bucket={self.bucket_name} key={key} bytes={size}"
+            )
+            return key
+        except NoCredentialsError as e:
+            SingletonLogger().get_logger().error(f"Storage credentials error: {e}")
+            raise HTTPException(status_code=500, detail="Storage credentials error")
+        except ClientError as e:
+            SingletonLogger().get_logger().error(f"Storage upload error: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"Storage upload error: {str(e)}"
+            )
+        except Exception as e:
+            SingletonLogger().get_logger().error(f"Upload failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    async def download_stream(
+        self, file_key: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Optional[AsyncIterator[bytes]]:
+        """Stream file bytes from Synology S3 in `chunk_size` pieces."""
+        try:
+            response = await self._call(
+                "get_object", Bucket=self.bucket_name, Key=file_key
+            )
+        except ClientError as e:
+            SingletonLogger().get_logger().error(
+                f"Client error downloading file {file_key}: {e}"
+            )
+            return None
+        except Exception as e:
+            SingletonLogger().get_logger().error(
+                f"Error downloading file {file_key}: {e}"
+            )
+            return None
+        body = response.get("Body")
+        if body is None:
+            return None
+        return iter_body(
+            lambda n: asyncio.to_thread(body.read, n), body.close, chunk_size
+        )
+
+    async def generate_upload_url(
+        self,
+        file_key: str,
+        content_type: str,
+        content_length: int,
+        expires_in: int = 300,
+        cache_control: Optional[str] = None,
+    ) -> str:
+        """Presign a direct PUT to Synology S3.
+
+        Signed with SigV4 (see `UploadSigner`): content type, length and
+        Cache-Control are part of the signature, so the client must upload
+        exactly the declared object.
+        """
+        return self._upload_signer.presign_put(
+            file_key, content_type, content_length, expires_in, cache_control
+        )
+
+    async def get_file_info(self, file_key: str) -> Optional[Dict[str, Any]]:
+        """Return size and content type of a stored object via HEAD."""
+        try:
+            response = await self._call(
+                "head_object", Bucket=self.bucket_name, Key=file_key
+            )
+            return {
+                "size": response.get("ContentLength"),
+                "content_type": response.get("ContentType"),
+                "cache_control": response.get("CacheControl"),
+            }
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code not in ("404", "NotFound", "NoSuchKey"):
+                SingletonLogger().get_logger().error(
+                    f"Error reading metadata for {file_key}: {e}"
+                )
+            return None
+        except Exception as e:
+            SingletonLogger().get_logger().error(
+                f"Unexpected error reading metadata for {file_key}: {e}"
+            )
+            return None
+
+    async def list_files(self, prefix: str) -> List[str]:
+        """List all keys under `prefix` in Synology S3."""
+        return await list_keys(self._call, self.bucket_name, prefix)
+
+    async def exists_many(self, file_keys: Iterable[str]) -> Dict[str, bool]:
+        """Check existence of many keys with one listing per parent prefix."""
+        keys = list(file_keys)
+        try:
+            return await exists_many(self._call, self.bucket_name, keys)
+        except Exception as e:
+            SingletonLogger().get_logger().warning(
+                f"Batch existence check failed, falling back to HEAD: {e}"
+            )
+            return await super().exists_many(keys)
+
+    async def delete_many(self, file_keys: Iterable[str]) -> int:
+        """Delete many keys from Synology S3 with multi-object delete."""
+        try:
+            return await delete_many(self._call, self.bucket_name, file_keys)
+        except ClientError as e:
+            SingletonLogger().get_logger().error(f"Client error in batch delete: {e}")
+            return 0
+        except Exception as e:
+            SingletonLogger().get_logger().error(f"Error in batch delete: {e}")
+            return 0
@@ -0,0 +1,404 @@
+import os
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from fastapi import UploadFile
+
+from ..logger import SingletonLogger
+from ..tasks import task_registry
+from .base import StorageProvider
+from .streaming import DEFAULT_CHUNK_SIZE, DEFAULT_PART_SIZE, AsyncReadable
+
+
+def _supabase() -> StorageProvider:
+    from .supabase import SupabaseStorage
+
+    return SupabaseStorage.from_env()
+
+
+def _synology() -> StorageProvider:
+    from .synology import SynologyStorage
+
+    return SynologyStorage.from_env()
+
+
+def _supabase_async() -> StorageProvider:
+    from .s3 import AsyncS3Storage
+
+    return AsyncS3Storage.supabase_from_env()
+
+
+def _synology_async() -> StorageProvider:
+    from .s3 import AsyncS3Storage
+
+    return AsyncS3Storage.synology_from_env()
+
+
+BACKEND_FACTORIES: Dict[str, Callable[[], StorageProvider]] = {
+    "supabase": _supabase,
+    "synology": _synology,
+    "supabase-async": _supabase_async,
+    "synology-async": _synology_async,
+}
+
+
+class TieredStorage(StorageProvider):
+    """Composite provider routing objects to ordered backend tiers by folder.
+
+    Keys follow `<user_id>/<folder>/<filename>`; the folder selects a tier list
+    (fastest first). Writes land on the first tier and are replicated to the
+    remaining tiers in the background (write-behind). Reads walk the tiers in
+    order, and an object downloaded from a slower tier is promoted to the
+    faster ones (read-through promotion); existence checks never copy data.
+    Both copies run as named tasks on the background task registry, so they
+    are bounded, deduplicated per key and drained on shutdown. A failing tier is logged
+    and skipped, so one slow or broken backend does not fail the request.
+    """
+
+    MAX_TRACKED_KEYS = 10000
+
+    def __init__(
+        self,
+        backends: Dict[str, StorageProvider],
+        routes: Optional[Dict[str, List[str]]] = None,
+        default_tiers: Optional[List[str]] = None,
+        replicate: bool = True,
+    ):
+        if not backends:
+            raise ValueError("TieredStorage requires at least one backend")
+        self.backends = backends
+        self.routes = routes or {}
+        self.default_tiers = default_tiers or [next(iter(backends))]
+        self.replicate = replicate
+        for tiers in [self.default_tiers, *self.routes.values()]:
+            unknown = [t for t in tiers if t not in self.backends]
+            if unknown:
+                raise ValueError(f"Unknown storage tiers in route: {unknown}")
+
+        # Last tier each key was seen on, so URLs point at a tier that has it
+        self._locations: Dict[str, str] = {}
+
+    @classmethod
+    def from_env(cls) -> "TieredStorage":
+        """Build tiers from STORAGE_ROUTES / STORAGE_DEFAULT_TIERS.
+
+        Example: `STORAGE_ROUTES="thumbnails=synology,supabase;avatar=supabase"`
+        with `STORAGE_DEFAULT_TIERS="supabase-async"`. Only referenced backends are
+        instantiated.
+        """
+        default_tiers = cls._parse_tiers(
+            os.getenv("STORAGE_DEFAULT_TIERS", "supabase-async")
+        )
+        routes: Dict[str, List[str]] = {}
+        for spec in os.getenv("STORAGE_ROUTES", "").split(";"):
+            if "=" not in spec:
+                continue
+            folder, tiers = spec.split("=", 1)
+            routes[folder.strip()] = cls._parse_tiers(tiers)
+
+        names = dict.fromkeys(default_tiers + [t for v in routes.values() for t in v])
+        backends: Dict[str, StorageProvider] = {}
+        for name in names:
+            factory = BACKEND_FACTORIES.get(name)
+            if factory is None:
+                raise ValueError(
+                    f"Unknown storage backend '{name}'. "
+                    f"Expected one of: {', '.join(BACKEND_FACTORIES)}"
+                )
+            backends[name] = factory()
+
+        replicate = os.getenv("STORAGE_REPLICATE", "true").lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+        return cls(backends, routes, default_tiers, replicate=replicate)
+
+    @staticmethod
+    def _parse_tiers(value: str) -> List[str]:
+        return [t.strip() for t in value.split(",") if t.strip()]
+
+    @staticmethod
+    def build_key(user_id: int, folder: str, filename: str) -> str:
+        return f"{user_id}/{folder}/{filename}"
+
+    @staticmethod
+    def _split_key(file_key: str) -> Optional[tuple[int, str, str]]:
+        parts = file_key.split("/", 2)
+        if len(parts) != 3 or not parts[0].isdigit():
+            return None
+        return int(parts[0]), parts[1], parts[2]
+
+    def _tiers_for_folder(self, folder: str) -> List[str]:
+        return self.routes.get(folder, self.default_tiers)
+
+    def _tiers_for_key(self, file_key: str) -> List[str]:
+        parsed = self._split_key(file_key)
+        return self._tiers_for_folder(parsed[1]) if parsed else self.default_tiers
+
+    def _remember(self, file_key: str, tier: str) -> None:
+        self._locations.pop(file_key, None)
+        self._locations[file_key] = tier
+        if len(self._locations) > self.MAX_TRACKED_KEYS:
+            self._locations.pop(next(iter(self._locations)))
+
+    async def ensure_bucket(self) -> None:
+        """Provision every tier concurrently; raise the first failure."""
+        results = await asyncio.gather(
+            *(b.ensure_bucket() for b in self.backends.values()),
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+
+    async def close(self) -> None:
+        # Pending copies are drained with the task registry before this runs
+        for backend in self.backends.values():
+            await backend.close()
+
+    async def _copy_to(
+        self,
+        file_key: str,
+        tiers: List[str],
+        content: Optional[bytes] = None,
+        content_type: str = "application/octet-stream",
+        cache_control: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> None:
+        parsed = self._split_key(file_key)
+        if not parsed or not tiers:
+            return
+        user_id, folder, filename = parsed
+        logger = SingletonLogger().get_logger()
+        if source is not None:
+            info = await self.backends[source].get_file_info(file_key) or {}
+            content_type = info.get("content_type") or content_type
+            cache_control = info.get("cache_control") or cache_control
+            if content is None:
+                content = await self.backends[source].download_file(file_key)
+        if content is None:
+            return
+        for name in tiers:
+            try:
+                await self.backends[name].upload_bytes(
+                    content,
+                    user_id,
+                    folder=folder,
+                    filename=filename,
+                    content_type=content_type,
+                    cache_control=cache_control,
+                )
+            except Exception as e:
+                logger.warning(f"Replication of {file_key} to tier '{name}' failed: {e}")
+
+    async def upload_file(
+        self, file: UploadFile, user_id: int, folder: str = "avatar"
+    ) -> str:
+        tiers = self._tiers_for_folder(folder)
+        key = await self.backends[tiers[0]].upload_file(file, user_id, folder)
+        self._remember(key, tiers[0])
+        if self.replicate and len(tiers) > 1:
+            task_registry.submit(
+                f"storage-replicate:{key}",
+                self._copy_to(key, tiers[1:], source=tiers[0]),
+            )
+        return key
+
+    async def upload_bytes(
+        self,
+        content: bytes,
+        user_id: int,
+        folder: str = "thumbnails",
+        filename: Optional[str] = None,
+        content_type: str = "image/png",
+        cache_control: Optional[str] = None,
+    ) -> str:
+        tiers = self._tiers_for_folder(folder)
+        key = await self.backends[tiers[0]].upload_bytes(
+            content,
+            user_id,
+            folder=folder,
+            filename=filename,
+            content_type=content_type,
+            cache_control=cache_control,
+        )
+        self._remember(key, tiers[0])
+        if self.replicate and len(tiers) > 1:
+            task_registry.submit(
+                f"storage-replicate:{key}",
+                self._copy_to(
+                    key,
+                    tiers[1:],
+                    content=content,
+                    content_type=content_type,
+                    cache_control=cache_control,
+                ),
+            )
+        return key
+
+    async def upload_stream(
+        self,
+        stream: AsyncReadable,
+        user_id: int,
+        folder: str = "papers",
+        filename: Optional[str] = None,
+        content_type: str = "application/octet-stream",
+        part_size: int = DEFAULT_PART_SIZE,
+    ) -> str:
+        tiers = self._tiers_for_folder(folder)
+        key = await self.backends[tiers[0]].upload_stream(
+            stream,
+            user_id,
+            folder=folder,
+            filename=filename,
+            content_type=content_type,
+            part_size=part_size,
+        )
+        self._remember(key, tiers[0])
+        if self.replicate and len(tiers) > 1:
+            task_registry.submit(
+                f"storage-replicate:{key}",
+                self._copy_to(key, tiers[1:], source=tiers[0]),
+            )
+        return key
+
+    def get_file_url(self, file_key: str) -> Optional[str]:
+        if not file_key:
+            return None
+        tier = self._locations.get(file_key) or self._tiers_for_key(file_key)[0]
+        return self.backends[tier].get_file_url(file_key)
+
+    async def delete_file(self, file_key: str) -> bool:
+        self._locations.pop(file_key, None)
+        tiers = self._tiers_for_key(file_key)
+        results = await asyncio.gather(
+            *(self.backends[t].delete_file(file_key) for t in tiers),
+            return_exceptions=True,
+        )
+        return any(r is True for r in results)
+
+    def _promote(self, file_key: str, found_on: str, content: Optional[bytes] = None):
+        tiers = self._tiers_for_key(file_key)
+        faster = tiers[: tiers.index(found_on)] if found_on in tiers else []
+        if not faster:
+            return
+
+        async def promote():
+            await self._copy_to(file_key, faster, content=content, source=found_on)
+            self._remember(file_key, faster[0])
+
+        # Named per key, so concurrent reads of one object promote it once
+        task_registry.submit(f"storage-promote:{file_key}", promote())
+
+    async def download_file(self, file_key: str) -> Optional[bytes]:
+        for name in self._tiers_for_key(file_key):
+            try:
+                content = await self.backends[name].download_file(file_key)
+            except Exception as e:
+                SingletonLogger().get_logger().warning(
+                    f"Tier '{name}' failed downloading {file_key}: {e}"
+                )
+                continue
+            if content is not None:
+                self._remember(file_key, name)
+                self._promote(file_key, name, content)
+                return content
+        return None
+
+    async def download_stream(
+        self, file_key: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Optional[AsyncIterator[bytes]]:
+        for name in self._tiers_for_key(file_key):
+            stream = await self.backends[name].download_stream(file_key, chunk_size)
+            if stream is not None:
+                self._remember(file_key, name)
+                self._promote(file_key, name)
+                return stream
+        return None
+
+    async def file_exists(self, file_key: str) -> bool:
+        for name in self._tiers_for_key(file_key):
+            try:
+                if await self.backends[name].file_exists(file_key):
+                    self._remember(file_key, name)
+                    return True
+            except Exception as e:
+                SingletonLogger().get_logger().warning(
+                    f"Tier '{name}' failed checking {file_key}: {e}"
+                )
+        return False
+
+    async def generate_upload_url(
+        self,
+        file_key: str,
+        content_type: str,
+        content_length: int,
+        expires_in: int = 300,
+        cache_control: Optional[str] = None,
+    ) -> str:
+        tier = self._tiers_for_key(file_key)[0]
+        self._remember(file_key, tier)
+        return await self.backends[tier].generate_upload_url(
+            file_key, content_type, content_length, expires_in, cache_control
+        )
+
+    async def get_file_info(self, file_key: str) -> Optional[Dict[str, Any]]:
+        for name in self._tiers_for_key(file_key):
+            info = await self.backends[name].get_file_info(file_key)
+            if info is not None:
+                self._remember(file_key, name)
+                return info
+        return None
+
+    async def list_files(self, prefix: str) -> List[str]:
+        results = await asyncio.gather(
+            *(b.list_files(prefix) for b in self.backends.values()),
+            return_exceptions=True,
+        )
+        keys: Dict[str, None] = {}
+        for name, result in zip(self.backends, results):
+            if isinstance(result, BaseException):
+                SingletonLogger().get_logger().warning(
+                    f"Tier '{name}' failed listing {prefix}: {result}"
+                )
+                continue
+            keys.update(dict.fromkeys(result))
+        return list(keys)
+
+    async def exists_many(self, file_keys: Iterable[str]) -> Dict[str, bool]:
+        by_tiers: Dict[tuple, List[str]] = {}
+        for key in dict.fromkeys(file_keys):
+            by_tiers.setdefault(tuple(self._tiers_for_key(key)), []).append(key)
+
+        found: Dict[str, bool] = {}
+        for tiers, keys in by_tiers.items():
+            remaining = keys
+            for name in tiers:
+                if not remaining:
+                    break
+                try:
+                    result = await self.backends[name].exists_many(remaining)
+                except Exception as e:
+                    SingletonLogger().get_logger().warning(
+                        f"Tier '{name}' failed batch existence check: {e}"
+                    )
+                    continue
+                for key in remaining:
+                    if result.get(key):
+                        found[key] = True
+                        self._remember(key, name)
+                remaining = [k for k in remaining if k not in found]
+            for key in remaining:
+                found[key] = False
+        return found
+
+    async def delete_many(self, file_keys: Iterable[str]) -> int:
+        keys = list(dict.fromkeys(file_keys))
+        for key in keys:
+            self._locations.pop(key, None)
+        results = await asyncio.gather(
+            *(b.delete_many(keys) for b in self.backends.values()),
+            return_exceptions=True,
+        )
+        return max((r for r in results if isinstance(r, int)), default=0)
@@ -0,0 +1,121 @@
+import os
+import re
+import time
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Objects whose key never points at different content (uuid avatars,
+# thumbnails of versioned arXiv PDFs) can be cached forever by browsers/CDNs.
+CACHE_CONTROL_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_CONTROL_DEFAULT = os.getenv(
+    "STORAGE_DEFAULT_CACHE_CONTROL", "public, max-age=3600"
+)
+
+SIGNED_URLS = os.getenv("STORAGE_SIGNED_URLS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+SIGNED_URL_EXPIRES = int(os.getenv("STORAGE_SIGNED_URL_EXPIRES", 7 * 24 * 3600))
+
+_VERSIONED_ARXIV_PDF = re.compile(
+    r"/\d{4}\.\d{4,5}v\d+(\.pdf)?$|/[\w.-]+/\d{7}v\d+(\.pdf)?$"
+)
+
+
+def is_versioned_pdf_url(pdf_url: str) -> bool:
+    """True for arXiv PDF URLs pinned to a version (e.g. `.../2504.19565v3`)."""
+    return bool(pdf_url and _VERSIONED_ARXIV_PDF.search(pdf_url))
+
+
+class SignedUrlCache:
+    """Reuse presigned GET URLs until half their lifetime has passed.
+
+    A presigned URL changes on every signing, which defeats browser and CDN
+    caches; handing out the same URL for a window keeps repeat page loads
+    cacheable while still rotating well before expiry.
+    """
+
+    def __init__(
+        self, expires_in: int = SIGNED_URL_EXPIRES, max_entries: int = 10000
+    ):
+        self.expires_in = expires_in
+        self.max_entries = max_entries
+        self._urls: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, file_key: str, sign: Callable[[str, int], str]) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._urls.get(file_key)
+            if cached and cached[1] > now:
+                return cached[0]
+        url = sign(file_key, self.expires_in)
+        with self._lock:
+            if len(self._urls) >= self.max_entries:
+                self._urls.pop(next(iter(self._urls)))
+            self._urls[file_key] = (url, now + self.expires_in / 2)
+        return url
+
+    def invalidate(self, file_key: str) -> None:
+        with self._lock:
+            self._urls.pop(file_key, None)
+
+
+class UploadSigner:
+    """Presign direct PUT uploads with SigV4.
+
+    SigV2 (the default for custom S3 endpoints, and what the Synology
+    preset uses) signs only the content type, so a client could upload any
+    size or Cache-Control. SigV4 signs every header bound into the URL.
+    Signing is local; the botocore client is built on first use.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        key_id: str,
+        application_key: str,
+        bucket_name: str,
+        region_name: Optional[str] = None,
+        s3_config: Optional[Dict[str, Any]] = None,
+    ):
+        self.endpoint_url = endpoint_url
+        self.key_id = key_id
+        self.application_key = application_key
+        self.bucket_name = bucket_name
+        self.region_name = region_name
+        self.s3_config = s3_config
+        self._client = None
+
+    def presign_put(
+        self,
+        file_key: str,
+        content_type: str,
+        content_length: int,
+        expires_in: int,
+        cache_control: Optional[str] = None,
+    ) -> str:
+        if self._client is None:
+            import botocore.session
+            from botocore.config import Config
+
+            self._client = botocore.session.get_session().create_client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                aws_access_key_id=self.key_id,
+                aws_secret_access_key=self.application_key,
+                region_name=self.region_name,
+                config=Config(signature_version="s3v4", s3=self.s3_config),
+            )
+        return self._client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket_name,
+                "Key": file_key,
+                "ContentType": content_type,
+                "ContentLength": content_length,
+                **({"CacheControl": cache_control} if cache_control else {}),
+            },
+            ExpiresIn=expires_in,
+        )
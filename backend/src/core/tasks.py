@@ -0,0 +1,134 @@
+import os
+import asyncio
+import time
+from typing import Any, Coroutine, Dict, Optional
+
+import logfire
+from opentelemetry.metrics import CallbackOptions, Observation
+
+from .logger import SingletonLogger
+
+_failed_counter = logfire.metric_counter(
+    "background.failed", unit="1", description="Background tasks that raised"
+)
+_rejected_counter = logfire.metric_counter(
+    "background.rejected",
+    unit="1",
+    description="Background tasks dropped because the queue was full or closed",
+)
+
+
+class TaskRegistry:
+    """Supervised fire-and-forget tasks for work that outlives a request.
+
+    Every task is referenced until it finishes (so it cannot be garbage
+    collected mid-flight), runs under a global concurrency limit, and has
+    its exceptions logged and counted. Tasks are named; submitting a name
+    that is already queued or running reuses the existing task. `drain()`
+    waits for outstanding work up to a deadline and cancels the rest.
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_queued: int = 1000):
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._running = 0
+        self._failed = 0
+        self._rejected = 0
+        self._closed = False
+
+    @classmethod
+    def from_env(cls) -> "TaskRegistry":
+        return cls(
+            max_concurrency=int(os.getenv("BACKGROUND_MAX_CONCURRENCY", 4)),
+            max_queued=int(os.getenv("BACKGROUND_MAX_QUEUED", 1000)),
+        )
+
+    def submit(self, name: str, coro: Coroutine[Any, Any, Any]) -> Optional[asyncio.Task]:
+        """Schedule `coro` as task `name`; return None if it was dropped."""
+        existing = self._tasks.get(name)
+        if existing is not None:
+            coro.close()
+            return existing
+        if self._closed or len(self._tasks) >= self.max_queued:
+            coro.close()
+            self._rejected += 1
+            _rejected_counter.add(1)
+            SingletonLogger().get_logger().warning(
+                f"Dropped background task {name} "
+                f"({'shutting down' if self._closed else 'queue full'})"
+            )
+            return None
+        task = asyncio.create_task(self._run(name, coro), name=name)
+        self._tasks[name] = task
+        task.add_done_callback(lambda t: self._forget(name, t))
+        return task
+
+    async def _run(self, name: str, coro: Coroutine[Any, Any, Any]) -> None:
+        try:
+            async with self._semaphore:
+                self._running += 1
+                try:
+                    await coro
+                finally:
+                    self._running -= 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._failed += 1
+            _failed_counter.add(1)
+            SingletonLogger().get_logger().warning(
+                f"Background task {name} failed: {e}"
+            )
+        finally:
+            # Cancelled before it started running
+            coro.close()
+
+    def _forget(self, name: str, task: asyncio.Task) -> None:
+        if self._tasks.get(name) is task:
+            del self._tasks[name]
+
+    async def drain(self, timeout: float) -> int:
+        """Stop accepting tasks, wait up to `timeout` seconds, cancel the rest.
+
+        Returns how many tasks had to be cancelled.
+        """
+        self._closed = True
+        pending = set(self._tasks.values())
+        if not pending:
+            return 0
+        started = time.perf_counter()
+        _, pending = await asyncio.wait(pending, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        SingletonLogger().get_logger().info(
+            f"Drained background tasks in {time.perf_counter() - started:.1f}s "
+            f"({len(pending)} cancelled)"
+        )
+        return len(pending)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._tasks) - self._running,
+            "running": self._running,
+            "failed": self._failed,
+            "rejected": self._rejected,
+        }
+
+    def _observe(self, key: str):
+        def callback(options: CallbackOptions):
+            yield Observation(self.stats()[key])
+
+        return callback
+
+
+# Shared by the whole process; drained by the app lifespan
+task_registry = TaskRegistry.from_env()
+
+for _key in ("queued", "running"):
+    logfire.metric_gauge_callback(
+        f"background.{_key}", [task_registry._observe(_key)], unit="1"
+    )
@@ -1,39 +1,108 @@
 import os
 from contextlib import asynccontextmanager
 import asyncio
+import itertools
 import time
-from sqlalchemy.exc import DBAPIError
 from datetime import datetime
-from typing import AsyncIterator
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple, TypeVar
 
-from sqlalchemy import func
+from sqlalchemy import func, inspect, text
 from sqlalchemy.engine import URL
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from ..errors import DatabaseConnectionError
+from .resilience import CircuitBreaker, backoff_delay, breaker, is_connection_error
+from .routing import current_user_id, read_your_writes
+from .telemetry import AdaptivePoolSizer, InstrumentedPool, PoolTelemetry
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional comma-separated read replicas for read-only units of work
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
 
 # Pool configuration: allow overrides via env vars
 POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
 MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
 POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+# Recycle connections before server/proxy idle timeouts silently drop them
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+# Adaptive sizing: tune max_overflow between DB_MAX_OVERFLOW and the limit
+POOL_ADAPTIVE = os.getenv("DB_POOL_ADAPTIVE", "false").lower() in ("1", "true", "yes")
+POOL_MAX_OVERFLOW_LIMIT = int(os.getenv("DB_POOL_MAX_OVERFLOW_LIMIT", MAX_OVERFLOW * 4))
+POOL_TARGET_WAIT_MS = float(os.getenv("DB_POOL_TARGET_WAIT_MS", 50))
+POOL_ADAPT_INTERVAL = float(os.getenv("DB_POOL_ADAPT_INTERVAL", 10))
+
+# Retries for idempotent reads (see `run_read`)
+SESSION_RETRIES = int(os.getenv("DB_SESSION_RETRIES", 2))
+SESSION_RETRY_DELAY = float(os.getenv("DB_SESSION_RETRY_DELAY", 0.2))
+SESSION_RETRY_MAX_DELAY = float(os.getenv("DB_SESSION_RETRY_MAX_DELAY", 2.0))
 
 connect_args = (
     {"check_same_thread": False} if DATABASE_URL and "sqlite" in DATABASE_URL else {}
 )
 
-engine = create_async_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    pool_pre_ping=True,
-    pool_size=POOL_SIZE,
-    max_overflow=MAX_OVERFLOW,
-    pool_timeout=POOL_TIMEOUT,
-)
 
-session_pool: async_sessionmaker[AsyncSession] = async_sessionmaker(
-    bind=engine, autocommit=False, autoflush=False, expire_on_commit=False
-)
+
+def _create_engine(url: Optional[str]):
+    return create_async_engine(
+        url,
+        connect_args=connect_args,
+        pool_pre_ping=True,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        poolclass=InstrumentedPool,
+    )
+
+
+def _sessionmaker(bind) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=bind, autocommit=False, autoflush=False, expire_on_commit=False
+    )
+
+
+engine = _create_engine(DATABASE_URL)
+
+session_pool: async_sessionmaker[AsyncSession] = _sessionmaker(engine)
+
+# Each replica gets its own breaker so a lagging/down replica never trips the
+# primary's; reads fall back to the primary while all replicas are open
+replica_engines = [_create_engine(url) for url in DATABASE_REPLICA_URLS]
+replica_pools: List[Tuple[async_sessionmaker[AsyncSession], CircuitBreaker]] = [
+    (_sessionmaker(e), CircuitBreaker.from_env()) for e in replica_engines
+]
+_replica_cycle = itertools.count()
+
+pool_telemetry = [PoolTelemetry(engine, "primary")] + [
+    PoolTelemetry(e, f"replica-{i}") for i, e in enumerate(replica_engines)
+]
+
+
+def pool_sizers() -> List[AdaptivePoolSizer]:
+    """Adaptive sizers for every pool, or none unless DB_POOL_ADAPTIVE is set."""
+    if not POOL_ADAPTIVE:
+        return []
+    return [
+        AdaptivePoolSizer(
+            telemetry,
+            min_overflow=MAX_OVERFLOW,
+            max_overflow=max(MAX_OVERFLOW, POOL_MAX_OVERFLOW_LIMIT),
+            target_wait=POOL_TARGET_WAIT_MS / 1000,
+            interval=POOL_ADAPT_INTERVAL,
+        )
+        for telemetry in pool_telemetry
+    ]
 
 
 class Base(DeclarativeBase):
@@ -53,13 +122,44 @@ class TimestampMixin:
     )
 
 
+T = TypeVar("T")
+
+
+def _read_target() -> Tuple[async_sessionmaker[AsyncSession], CircuitBreaker]:
+    """Pick a replica for a read-only session, or the primary.
+
+    The primary is used when no replicas are configured, when the current
+    user wrote within the read-your-writes window, or when every replica's
+    breaker is open.
+    """
+    if replica_pools and not read_your_writes.is_sticky(current_user_id.get()):
+        start = next(_replica_cycle)
+        for i in range(len(replica_pools)):
+            factory, guard = replica_pools[(start + i) % len(replica_pools)]
+            try:
+                guard.check()
+            except DatabaseConnectionError:
+                continue
+            return factory, guard
+    breaker.check()
+    return session_pool, breaker
+
+
 @asynccontextmanager
-async def get_session() -> AsyncIterator[AsyncSession]:
+async def get_session(readonly: bool = False) -> AsyncIterator[AsyncSession]:
     """
-    Context manager to get a database session.
-    Provides a session from the connection pool. The session automatically
-    handles transaction lifecycle - commits on success, rolls back on exceptions.
-    The session is properly closed after use to return it to the pool.
+    Context manager to get a database session guarded by the circuit breaker.
+    Provides a session from the connection pool; uncommitted work is rolled
+    back and the connection returned to the pool on exit.
+
+    With `readonly=True` the session may be served by a read replica (see
+    `_read_target`). Sessions that write mark the current user for
+    read-your-writes, so their next reads go to the primary.
+
+    Connection-level failures (lost/invalidated connections, pool timeouts)
+    are counted by the breaker and raised as `DatabaseConnectionError`; while
+    the breaker is open it is raised immediately, without touching the pool.
+    A context manager cannot re-run its body, so retries live in `run_read`.
 
     Usage:
     ```
@@ -68,20 +168,71 @@ async def get_session() -> AsyncIterator[AsyncSession]:
         await session.commit()  # Explicit commit if needed
     ```
     """
-    # Simple retry logic for transient connection closure errors
-    retries = int(os.getenv("DB_SESSION_RETRIES", 2))
-    delay = float(os.getenv("DB_SESSION_RETRY_DELAY", 0.2))
-
-    last_exc = None
-    for attempt in range(retries + 1):
-        try:
-            async with session_pool() as session:
+    if readonly:
+        factory, guard = _read_target()
+    else:
+        factory, guard = session_pool, breaker
+        guard.check()
+    try:
+        async with factory() as session:
+            try:
                 yield session
-                return
-        except DBAPIError as e:
-            last_exc = e
-            # Wait a bit before retrying
-            if attempt < retries:
-                await asyncio.sleep(delay)
-                continue
-            raise
\ No newline at end of file
+            finally:
+                if session.info.get("wrote"):
+                    read_your_writes.mark(current_user_id.get())
+    except Exception as e:
+        if is_connection_error(e):
+            guard.record_failure()
+            raise DatabaseConnectionError(str(e)) from e
+        guard.record_success()
+        raise
+    except BaseException:
+        # Cancelled mid-session: no verdict on the database, but a half-open
+        # trial must not stay claimed forever
+        guard.release()
+        raise
+    guard.record_success()
+
+
+async def run_read(
+    work: Callable[[AsyncSession], Awaitable[T]],
+    retries: int = SESSION_RETRIES,
+    primary: bool = False,
+) -> T:
+    """Run an idempotent read `work(session)`, retrying on connection loss.
+
+    Each attempt gets a fresh read-only session (and so a fresh, pre-pinged
+    pooled connection, possibly on a replica) after a jittered exponential
+    backoff. Only use this for units of work that are safe to repeat and do
+    not write; writes should use `get_session`.
+
+    `primary=True` never uses a replica. Use it for reads that must see
+    writes from any worker, such as token and revocation checks. The
+    read-your-writes window is per process.
+    """
+    attempt = 0
+    while True:
+        try:
+            async with get_session(readonly=not primary) as session:
+                return await work(session)
+        except DatabaseConnectionError:
+            # Do not keep hammering once the breaker has opened
+            if attempt >= retries or breaker.state != breaker.CLOSED:
+                raise
+        await asyncio.sleep(
+            backoff_delay(attempt, SESSION_RETRY_DELAY, SESSION_RETRY_MAX_DELAY)
+        )
+        attempt += 1
+
+
+async def get_alembic_revision(conn: AsyncConnection) -> Optional[str]:
+    """Return the revision recorded by Alembic, or None if never migrated."""
+
+    def _revision(sync_conn) -> Optional[str]:
+        if not inspect(sync_conn).has_table("alembic_version"):
+            return None
+        return sync_conn.execute(
+            text("SELECT version_num FROM alembic_version")
+        ).scalar()
+
+    return await conn.run_sync(_revision)
@@ -0,0 +1,126 @@
+import os
+import random
+import asyncio
+import time
+import threading
+
+from sqlalchemy.exc import DBAPIError, DisconnectionError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from ..errors import DatabaseConnectionError
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    """True if `exc` means the connection (not the statement) failed.
+
+    Covers invalidated pooled connections, network errors and timeouts
+    while connecting, and pool checkout timeouts. Statement-level errors
+    (constraint violations, bad SQL, a statement timing out on a live
+    connection) are not connection errors.
+    """
+    if isinstance(exc, (PoolTimeoutError, DisconnectionError)):
+        return True
+    if isinstance(exc, DBAPIError):
+        if exc.connection_invalidated:
+            return True
+        exc = exc.orig if exc.orig is not None else exc
+        exc = exc.__cause__ or exc
+        # The statement ran on a working connection and was slow
+        if isinstance(exc, asyncio.TimeoutError):
+            return False
+    # Connect timeouts are raised unwrapped (TimeoutError is an OSError)
+    return isinstance(exc, (ConnectionError, OSError))
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+class CircuitBreaker:
+    """Fail fast while the database is unreachable.
+
+    After `failure_threshold` consecutive connection failures the breaker
+    opens and `check()` raises `DatabaseConnectionError` immediately instead
+    of letting every request wait out the pool timeout. Once `reset_timeout`
+    seconds have passed a single trial request is let through (half-open);
+    its success closes the breaker, its failure re-opens it. A trial that
+    ends without an outcome (cancelled) is released, and one that has not
+    reported back within `trial_timeout` seconds is replaced by a new one.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        trial_timeout: float = 30.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.trial_timeout = trial_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        return cls(
+            failure_threshold=int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", 5)),
+            reset_timeout=float(os.getenv("DB_BREAKER_RESET_TIMEOUT", 30)),
+            trial_timeout=float(os.getenv("DB_BREAKER_TRIAL_TIMEOUT", 30)),
+        )
+
+    def check(self) -> None:
+        """Raise DatabaseConnectionError if requests should not reach the DB."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise DatabaseConnectionError(
+                        f"Database unavailable (circuit open, retry in {remaining:.0f}s)"
+                    )
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            now = time.monotonic()
+            trial_age = now - self._trial_started_at
+            if self._trial_in_flight and trial_age < self.trial_timeout:
+                raise DatabaseConnectionError(
+                    "Database unavailable (circuit half-open, probing)"
+                )
+            self._trial_in_flight = True
+            self._trial_started_at = now
+
+    def release(self) -> None:
+        """Give up the half-open trial without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+# Shared by every session in the process
+breaker = CircuitBreaker.from_env()
@@ -0,0 +1,73 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# User the current request acts for; set by the auth dependencies so the
+# session layer can apply read-your-writes without threading user ids around
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+
+
+class ReadYourWrites:
+    """Remember which users wrote recently so their reads stay on the primary.
+
+    Replicas lag the primary; a user who just changed their profile or
+    logged in must not read a stale copy of it. For `window` seconds after
+    a user's write, their read-only sessions are routed to the primary.
+    Tracking is per process and bounded to `max_users` (oldest dropped).
+    """
+
+    def __init__(self, window: float = 5.0, max_users: int = 100000):
+        self.window = window
+        self.max_users = max_users
+        self._writes: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ReadYourWrites":
+        return cls(window=float(os.getenv("DB_READ_YOUR_WRITES_WINDOW", 5)))
+
+    def mark(self, user_id: Optional[int]) -> None:
+        if user_id is None:
+            return
+        with self._lock:
+            self._writes.pop(user_id, None)
+            self._writes[user_id] = time.monotonic() + self.window
+            if len(self._writes) > self.max_users:
+                self._writes.popitem(last=False)
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._writes.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._writes[user_id]
+                return False
+            return True
+
+
+read_your_writes = ReadYourWrites.from_env()
+
+
+@event.listens_for(Session, "after_flush")
+def _flagged_flush(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flagged_execute(orm_execute_state) -> None:
+    # Core-style insert()/update()/delete() through session.execute skip flush
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info["wrote"] = True
@@ -0,0 +1,272 @@
+import os
+import asyncio
+import time
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+import logfire
+from opentelemetry.metrics import CallbackOptions, Observation
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+
+from ..core.logger import SingletonLogger
+
+# Connections held longer than this are logged with the route holding them
+LONG_HOLD_SECONDS = float(os.getenv("DB_POOL_LONG_HOLD_SECONDS", 1.0))
+# Checkout waits kept for the adaptive sizer; older ones are dropped
+WAIT_SAMPLES = int(os.getenv("DB_POOL_WAIT_SAMPLES", 2048))
+
+# ASGI scope of the request being served, set by RouteContextMiddleware
+current_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "current_scope", default=None
+)
+
+
+def route_name() -> str:
+    """Route template of the current request (e.g. `POST /api/v1/papers/`)."""
+    scope = current_scope.get()
+    if not scope:
+        return "background"
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+class RouteContextMiddleware:
+    """Pure ASGI middleware exposing the request scope to pool telemetry."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
+
+
+# Queue wait of the checkout in progress. SQLAlchemy runs pool code in a
+# greenlet sharing the calling task's context, so this is per task (and per
+# thread for sync use), unlike a thread-local.
+_checkout_wait: ContextVar[Optional[List[float]]] = ContextVar(
+    "checkout_wait", default=None
+)
+
+
+class _TimedQueue(AsyncAdaptedQueue):
+    """Pool queue adding the time spent in `get` to the current checkout."""
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        started = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            waited = _checkout_wait.get()
+            if waited is not None:
+                waited[0] += time.perf_counter() - started
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Async queue pool that reports how long each checkout waited.
+
+    Only time spent waiting on the queue counts; opening a new (overflow)
+    connection does not. Also exposes `overflow_cap`, the overflow limit
+    the adaptive sizer tunes at runtime.
+    """
+
+    _queue_class = _TimedQueue
+    telemetry: Optional["PoolTelemetry"] = None
+
+    # QueuePool has no public setter for max_overflow. `_do_get` reads
+    # `_max_overflow` on every checkout in SQLAlchemy 2.0.x (pinned to <2.1
+    # in pyproject.toml), so this is the only place touching it.
+    @property
+    def overflow_cap(self) -> int:
+        return self._max_overflow
+
+    @overflow_cap.setter
+    def overflow_cap(self, value: int) -> None:
+        self._max_overflow = value
+
+    def _do_get(self):
+        if _checkout_wait.get() is not None:
+            # QueuePool retries by calling _do_get again; same checkout
+            return super()._do_get()
+        waited = [0.0]
+        token = _checkout_wait.set(waited)
+        try:
+            return super()._do_get()
+        finally:
+            _checkout_wait.reset(token)
+            if self.telemetry is not None:
+                self.telemetry.record_wait(waited[0])
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting for it
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+
+_wait_histogram = logfire.metric_histogram(
+    "db.pool.wait_time",
+    unit="ms",
+    description="Time spent waiting for a pooled connection",
+)
+_hold_histogram = logfire.metric_histogram(
+    "db.pool.hold_time",
+    unit="ms",
+    description="Time a connection stayed checked out",
+)
+_long_held_counter = logfire.metric_counter(
+    "db.pool.long_held", unit="1", description="Connections held past the threshold"
+)
+
+
+class PoolTelemetry:
+    """Pool metrics for one engine, exported through logfire/OTel.
+
+    - `db.pool.checked_out`, `db.pool.overflow`, `db.pool.max_overflow`
+      gauges read from the live pool.
+    - `db.pool.wait_time` histogram of checkout waits.
+    - `db.pool.hold_time` histogram and `db.pool.long_held` counter per
+      route, plus a warning naming the route for each long hold.
+    """
+
+    _all: List["PoolTelemetry"] = []
+
+    def __init__(self, engine, name: str):
+        self.engine = engine
+        self.name = name
+        self._recent_waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._lock = threading.Lock()
+
+        engine.sync_engine.pool.telemetry = self
+        # Pool events registered on the engine; pool.recreate() carries them over
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "checkin", self._on_checkin)
+        PoolTelemetry._all.append(self)
+
+    @property
+    def pool(self):
+        return self.engine.sync_engine.pool
+
+    def record_wait(self, seconds: float) -> None:
+        _wait_histogram.record(seconds * 1000, {"pool": self.name})
+        with self._lock:
+            self._recent_waits.append(seconds)
+
+    def drain_waits(self) -> List[float]:
+        """Return and reset waits recorded since the last call.
+
+        At most WAIT_SAMPLES of the most recent waits are kept, so nothing
+        grows when no sizer is draining them.
+        """
+        with self._lock:
+            waits = list(self._recent_waits)
+            self._recent_waits.clear()
+        return waits
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = (time.perf_counter(), route_name())
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        checked_out = connection_record.info.pop("checked_out_at", None)
+        if checked_out is None:
+            return
+        started, route = checked_out
+        held = time.perf_counter() - started
+        attributes = {"pool": self.name, "route": route}
+        _hold_histogram.record(held * 1000, attributes)
+        if held >= LONG_HOLD_SECONDS:
+            _long_held_counter.add(1, attributes)
+            SingletonLogger().get_logger().warning(
+                f"DB connection held {held:.2f}s by {route} (pool={self.name})"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": pool.overflow_cap,
+        }
+
+    @classmethod
+    def _observe(cls, key: str):
+        def callback(options: CallbackOptions):
+            for telemetry in cls._all:
+                yield Observation(telemetry.stats()[key], {"pool": telemetry.name})
+
+        return callback
+
+
+for _key in ("checked_out", "overflow", "max_overflow"):
+    logfire.metric_gauge_callback(
+        f"db.pool.{_key}", [PoolTelemetry._observe(_key)], unit="1"
+    )
+
+
+class AdaptivePoolSizer:
+    """Grow or shrink a pool's overflow cap from observed checkout waits.
+
+    Every `interval` seconds the p95 wait since the last tick is compared
+    with `target_wait`: above it the overflow cap grows by `step` (up to
+    `max_overflow`), and when waits are negligible and less than half the
+    overflow is in use it shrinks by `step` (down to `min_overflow`). The
+    base `pool_size` is left alone so idle connections stay warm.
+    """
+
+    def __init__(
+        self,
+        telemetry: PoolTelemetry,
+        min_overflow: int,
+        max_overflow: int,
+        target_wait: float = 0.05,
+        interval: float = 10.0,
+        step: int = 2,
+    ):
+        self.telemetry = telemetry
+        self.min_overflow = min_overflow
+        self.max_overflow = max_overflow
+        self.target_wait = target_wait
+        self.interval = interval
+        self.step = step
+
+    def adjust(self) -> Optional[int]:
+        """Apply one resize decision; return the new cap if it changed."""
+        waits = sorted(self.telemetry.drain_waits())
+        pool = self.telemetry.pool
+        current = pool.overflow_cap
+        if current < 0:
+            return None  # unlimited overflow, nothing to tune
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+        new = current
+        if p95 > self.target_wait:
+            new = min(self.max_overflow, current + self.step)
+        elif p95 < self.target_wait / 4 and max(0, pool.overflow()) < current / 2:
+            new = max(self.min_overflow, current - self.step)
+        if new == current:
+            return None
+        pool.overflow_cap = new
+        SingletonLogger().get_logger().info(
+            f"Resized {self.telemetry.name} pool overflow {current} -> {new} "
+            f"(p95 wait {p95 * 1000:.0f}ms)"
+        )
+        return new
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.adjust()
+            except Exception as e:
+                SingletonLogger().get_logger().warning(f"Pool resize failed: {e}")
@@ -14,6 +14,7 @@ from .profile import (
     ProfileIncompleteError,
 )
 from .database import DatabaseConnectionError
+from .shared import LockTimeoutError
 
 __all__ = [
     # auth
@@ -31,4 +32,6 @@ __all__ = [
     "ProfileIncompleteError",
     # database
     "DatabaseConnectionError",
+    # shared
+    "LockTimeoutError",
 ]
@@ -0,0 +1,6 @@
+class LockTimeoutError(Exception):
+    """Raised when a lock shared between workers could not be acquired in time."""
+
+    def __init__(self, message: str = "Timed out waiting for shared lock."):
+        self.message = message
+        super().__init__(self.message)
@@ -1,3 +1,4 @@
+import os
 import time
 from typing import Any, Dict, List, Optional
 
@@ -5,11 +6,21 @@ import requests
 import xml.etree.ElementTree as ET
 from io import BytesIO
 import asyncio
-import fitz  # PyMuPDF
-from ..core.storage.supabase import SupabaseStorage
+from ..core.storage.base import StorageProvider
+from ..core.storage.cache import get_disk_cache
+from ..core.storage.registry import get_storage
+from ..core.storage.urls import (
+    CACHE_CONTROL_DEFAULT,
+    CACHE_CONTROL_IMMUTABLE,
+    is_versioned_pdf_url,
+)
 from ..core.logger import SingletonLogger
+from ..core.shared import get_shared_backend
+from ..errors import LockTimeoutError
+from .paper_version import resolve_pdf_url, resolve_pdf_urls
 
-storage = SupabaseStorage.from_env()
+# Upper bound on one render; also how long other workers wait for it
+THUMBNAIL_LOCK_TTL = float(os.getenv("THUMBNAIL_LOCK_TTL", 120))
 
 
 class ArxivClient:
@@ -195,6 +206,36 @@ class ArxivClient:
         return elem.text.strip() if elem is not None and elem.text else None
 
 
+async def fetch_pdf(pdf_url: str) -> Optional[bytes]:
+    """Download a PDF, reading through the node-local disk cache if enabled.
+
+    Returns the PDF bytes, or None on failure.
+    """
+    logger = SingletonLogger().get_logger()
+    cache = get_disk_cache()
+    cache_key = f"pdf:{pdf_url}"
+    if cache is not None:
+        cached = await cache.get_async(cache_key)
+        if cached is not None:
+            logger.debug(f"PDF cache hit for {pdf_url}")
+            return cached
+
+    # Download PDF without blocking event loop
+    try:
+        logger.debug(f"Downloading PDF: {pdf_url}")
+        resp = await asyncio.to_thread(requests.get, pdf_url, timeout=60)
+        resp.raise_for_status()
+        pdf_bytes = resp.content
+        logger.debug(f"Downloaded {len(pdf_bytes)} bytes from {pdf_url}")
+    except requests.RequestException as e:
+        logger.warning(f"Failed to download PDF: {pdf_url} error={e}")
+        return None
+
+    if cache is not None:
+        await cache.put_async(cache_key, pdf_bytes)
+    return pdf_bytes
+
+
 async def generate_first_page_thumbnail(
     pdf_url: str,
     user_id: int,
@@ -207,36 +248,62 @@ async def generate_first_page_thumbnail(
     """
     if not pdf_url:
         return None
+    # Unversioned arXiv URLs render the latest recorded version, under its own key
+    pdf_url = await resolve_pdf_url(pdf_url)
     # Build deterministic filename and key for caching
     logger = SingletonLogger().get_logger()
     filename = pdf_url.split("/")[-1] + ".png"
-    key = SupabaseStorage.build_key(user_id, folder, filename)
+    key = StorageProvider.build_key(user_id, folder, filename)
 
     # If thumbnail already exists, return it immediately
     try:
-        exists = await storage.file_exists(key)
+        exists = await get_storage().file_exists(key)
         if exists:
-            url = storage.get_file_url(key)
+            url = get_storage().get_file_url(key)
             logger.debug(f"Thumbnail already exists for {pdf_url}: {url}")
             return url
     except Exception as e:
         logger.warning(f"Existence check failed for {key}: {e}")
 
-    # Download PDF without blocking event loop
+    # Single-flight across workers: only one renders a given thumbnail
     try:
-        logger.debug(f"Downloading PDF for thumbnail: {pdf_url}")
-        resp = await asyncio.to_thread(requests.get, pdf_url, timeout=60)
-        resp.raise_for_status()
-        pdf_bytes = resp.content
-        logger.debug(f"Downloaded {len(pdf_bytes)} bytes from {pdf_url}")
-    except requests.RequestException as e:
-        logger.warning(f"Failed to download PDF for thumbnail: {pdf_url} error={e}")
+        async with get_shared_backend().lock(
+            f"thumbnail:{key}", ttl=THUMBNAIL_LOCK_TTL, wait=THUMBNAIL_LOCK_TTL
+        ):
+            # Another worker may have finished it while we waited
+            try:
+                if await get_storage().file_exists(key):
+                    return get_storage().get_file_url(key)
+            except Exception as e:
+                logger.warning(f"Existence check failed for {key}: {e}")
+            return await _render_and_upload_thumbnail(
+                pdf_url, user_id, target_width, folder, filename, key
+            )
+    except LockTimeoutError:
+        logger.warning(f"Timed out waiting for thumbnail lock on {key}")
+        return None
+
+
+async def _render_and_upload_thumbnail(
+    pdf_url: str,
+    user_id: int,
+    target_width: int,
+    folder: str,
+    filename: str,
+    key: str,
+) -> Optional[str]:
+    logger = SingletonLogger().get_logger()
+    pdf_bytes = await fetch_pdf(pdf_url)
+    if pdf_bytes is None:
         return None
 
     # Render first page in a worker thread to avoid blocking
     try:
 
         def _render_first_page(data: bytes, target_w: int) -> bytes:
+            # Imported lazily: PyMuPDF is heavy and only thumbnail work needs it
+            import fitz  # PyMuPDF
+
             doc = fitz.open(stream=data, filetype="pdf")
             if doc.page_count == 0:
                 return b""
@@ -262,14 +329,18 @@ async def generate_first_page_thumbnail(
     # Upload bytes using existing deterministic key
     try:
         logger.debug(f"Uploading thumbnail to storage: key={key}")
-        uploaded_key = await storage.upload_bytes(
+        uploaded_key = await get_storage().upload_bytes(
             content=image_bytes,
             user_id=user_id,
             folder=folder,
             filename=filename,
             content_type="image/png",
+            # A versioned arXiv PDF never changes, and neither does its thumbnail
+            cache_control=CACHE_CONTROL_IMMUTABLE
+            if is_versioned_pdf_url(pdf_url)
+            else CACHE_CONTROL_DEFAULT,
         )
-        url = storage.get_file_url(uploaded_key)
+        url = get_storage().get_file_url(uploaded_key)
         logger.info(f"Thumbnail uploaded: {url}")
         return url
     except Exception as e:
@@ -285,7 +356,30 @@ async def get_existing_thumbnail_url(
     """Return public URL for existing cached thumbnail if present, else None."""
     if not pdf_url:
         return None
+    pdf_url = await resolve_pdf_url(pdf_url)
     filename = pdf_url.split("/")[-1] + ".png"
-    key = SupabaseStorage.build_key(user_id, folder, filename)
-    exists = await storage.file_exists(key)
-    return storage.get_file_url(key) if exists else None
+    key = StorageProvider.build_key(user_id, folder, filename)
+    exists = await get_storage().file_exists(key)
+    return get_storage().get_file_url(key) if exists else None
+
+
+async def get_existing_thumbnail_urls(
+    pdf_urls: List[str],
+    user_id: int,
+    folder: str = "thumbnails",
+) -> Dict[str, Optional[str]]:
+    """Batch variant of `get_existing_thumbnail_url` keyed by PDF URL.
+
+    Existence is resolved with one storage listing per prefix instead of one
+    HEAD request per entry.
+    """
+    resolved = await resolve_pdf_urls([u for u in pdf_urls if u])
+    keys = {
+        pdf_url: StorageProvider.build_key(user_id, folder, url.split("/")[-1] + ".png")
+        for pdf_url, url in resolved.items()
+    }
+    if not keys:
+        return {}
+    exists = await get_storage().exists_many(keys.values())
+    urls = get_storage().get_file_urls([k for k in keys.values() if exists.get(k)])
+    return {pdf_url: urls.get(key) for pdf_url, key in keys.items()}
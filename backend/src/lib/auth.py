@@ -6,15 +6,16 @@ from typing import Any, Dict, Union
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy import select, desc
+from sqlalchemy import desc, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError, DBAPIError
-from ..database.db import session_pool
+from ..database.db import run_read
+from ..database.routing import current_user_id, read_your_writes
 from ..errors import DatabaseConnectionError
 from ..model.user import User
-from ..model.profile import Profile
 from ..model.login_session import LoginSession
 from ..utils.token import decodeJWT
+from .profile_cache import profile_cache
 from ..core.logger import SingletonLogger
 
 
@@ -30,22 +31,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
-async def build_token_payload(user: User, session: AsyncSession) -> Dict[str, Any]:
+async def build_token_payload(user: User) -> Dict[str, Any]:
     """
     Build JWT token payload with user and profile information.
 
     Args:
         user: User object
-        session: Database session to fetch profile
 
     Returns:
         Dict containing user data (excluding password)
     """
-    # Get user profile
-    profile_result = await session.execute(
-        select(Profile).where(Profile.user_id == user.id)
-    )
-    profile = profile_result.scalar_one_or_none()
+    # Served from the profile cache; usually no database round trip
+    profile = await profile_cache.get(user.id)
 
     payload = {
         "sub": str(user.id),
@@ -173,35 +170,40 @@ async def get_current_user(
         SingletonLogger().get_logger().error("JWT decode error")
         raise credentials_exception
 
-    # Verify token is active in login_session table
-    try:
-        async with session_pool() as session:
-            session_result = await session.execute(
-                select(LoginSession)
-                .filter_by(
-                    user_id=int(user_id),
-                    access_token=credentials.credentials,
-                    is_active=True,
-                )
-                .order_by(desc(LoginSession.created_at))
+    current_user_id.set(int(user_id))
+
+    # Verify token is active in login_session table (idempotent read, retried).
+    # On the primary: a replica may not have seen a login or logout yet
+    async def _active_session(session: AsyncSession):
+        session_result = await session.execute(
+            select(LoginSession)
+            .filter_by(
+                user_id=int(user_id),
+                access_token=credentials.credentials,
+                is_active=True,
             )
-            session_record = session_result.scalar_one_or_none()
+            .order_by(desc(LoginSession.created_at))
+        )
+        return session_result.scalar_one_or_none()
 
-            if not session_record:
-                SingletonLogger().get_logger().error(
-                    f"Token not found in login_session or inactive for user {user_id}"
-                )
-                raise HTTPException(
-                    status_code=401,
-                    detail="Token is not active or has been revoked",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
+    try:
+        session_record = await run_read(_active_session, primary=True)
     except (DBAPIError, SQLAlchemyError) as db_err:
         SingletonLogger().get_logger().exception(
             f"Database connection error while validating token for user {user_id}: {db_err}"
         )
         raise DatabaseConnectionError(str(db_err))
 
+    if not session_record:
+        SingletonLogger().get_logger().error(
+            f"Token not found in login_session or inactive for user {user_id}"
+        )
+        raise HTTPException(
+            status_code=401,
+            detail="Token is not active or has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     return int(user_id)
 
 
@@ -269,29 +271,34 @@ def token_required(func):
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        # Verify token exists in login_session and is active
+        current_user_id.set(int(user_id))
+
+        # Verify token exists in login_session and is active (on the primary,
+        # see get_current_user)
+        async def _active_session(session: AsyncSession):
+            result = await session.execute(
+                select(LoginSession)
+                .filter_by(user_id=int(user_id), access_token=token, is_active=True)
+                .order_by(desc(LoginSession.created_at))
+            )
+            return result.scalar_one_or_none()
+
         try:
-            async with session_pool() as session:
-                result = await session.execute(
-                    select(LoginSession)
-                    .filter_by(user_id=int(user_id), access_token=token, is_active=True)
-                    .order_by(desc(LoginSession.created_at))
-                )
-                session_record = result.scalar_one_or_none()
-
-                if not session_record:
-                    logger.error("Invalid or inactive access token.")
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="Invalid or inactive access token.",
-                        headers={"WWW-Authenticate": "Bearer"},
-                    )
+            session_record = await run_read(_active_session, primary=True)
         except (DBAPIError, SQLAlchemyError) as db_err:
             logger.exception(
                 f"Database connection error while checking token for user {user_id}: {db_err}"
             )
             raise DatabaseConnectionError(str(db_err))
 
+        if not session_record:
+            logger.error("Invalid or inactive access token.")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or inactive access token.",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
         # Inject user_id into kwargs
         kwargs["user_id"] = int(user_id)
         return await func(*args, **kwargs)
@@ -327,20 +334,26 @@ async def store_token_in_session(
     Returns:
         LoginSession: The created login session record
     """
-    login_session = LoginSession(
-        user_id=user_id,
-        login_method=login_method,
-        is_active=True,
-        access_token=access_token,
-        refresh_token=refresh_token,
-        device_info=device_info,
-        ip_address=ip_address,
-        user_agent=user_agent,
-        token_expires_at=token_expires_at,
+    # RETURNING hands back the generated id and timestamps with the insert
+    result = await session.execute(
+        insert(LoginSession)
+        .values(
+            user_id=user_id,
+            login_method=login_method,
+            is_active=True,
+            access_token=access_token,
+            refresh_token=refresh_token,
+            device_info=device_info,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            token_expires_at=token_expires_at,
+        )
+        .returning(LoginSession)
     )
-    session.add(login_session)
+    login_session = result.scalar_one()
     await session.commit()
-    await session.refresh(login_session)
+    # Keep this user's next reads (profile, saved papers) on the primary
+    read_your_writes.mark(user_id)
     SingletonLogger().get_logger().info(
         f"Token stored in login_session for user {user_id}"
     )
@@ -0,0 +1,158 @@
+from typing import List, Sequence
+
+from sqlalchemy import Integer, String, Text, column, func, insert, select, true, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..model.message import Message
+from ..model.source import Source
+from ..schema.message import MessageCreate, MessageCreated
+from ..core.logger import SingletonLogger
+
+SOURCE_COLUMNS = ["message_id", "source_text", "source_type", "source_url"]
+
+
+def _message_values(message: MessageCreate) -> dict:
+    return message.model_dump(exclude={"sources"})
+
+
+async def store_message_with_sources(
+    session: AsyncSession, message: MessageCreate, commit: bool = True
+) -> MessageCreated:
+    """
+    Insert a chat message together with all of its sources in one statement.
+
+    The message insert runs as a data-modifying CTE and its generated id feeds a
+    multi-row ``INSERT ... SELECT`` over a VALUES list of sources, so a message
+    with N sources costs a single round trip instead of N + 1 inserts plus
+    refreshes. Source ids are drawn from the sequence next to each row's input
+    position (``ord``), and the statement returns both, because neither
+    RETURNING nor sequence assignment is guaranteed to follow the input order.
+
+    Args:
+        session: Database session
+        message: Message payload including its sources
+        commit: Commit the transaction after the insert (default True)
+
+    Returns:
+        MessageCreated: The new message id and source ids (in input order)
+    """
+    message_insert = insert(Message).values(**_message_values(message))
+
+    if not message.sources:
+        result = await session.execute(message_insert.returning(Message.id))
+        created = MessageCreated(message_id=result.scalar_one())
+    else:
+        inserted = message_insert.returning(Message.id).cte("inserted_message")
+        rows = values(
+            column("ord", Integer),
+            column("source_text", Text),
+            column("source_type", String),
+            column("source_url", String),
+            name="source_rows",
+        ).data(
+            [
+                (i, s.source_text, s.source_type, s.source_url)
+                for i, s in enumerate(message.sources)
+            ]
+        )
+        numbered = select(
+            func.nextval(func.pg_get_serial_sequence(Source.__tablename__, "id")).label(
+                "id"
+            ),
+            rows.c.ord,
+            rows.c.source_text,
+            rows.c.source_type,
+            rows.c.source_url,
+        ).cte("numbered_sources")
+        inserted_sources = (
+            insert(Source)
+            .from_select(
+                ["id", *SOURCE_COLUMNS],
+                select(
+                    numbered.c.id,
+                    inserted.c.id,
+                    numbered.c.source_text,
+                    numbered.c.source_type,
+                    numbered.c.source_url,
+                )
+                .select_from(inserted)
+                .join(numbered, true()),
+            )
+            .returning(Source.id, Source.message_id)
+            .cte("inserted_sources")
+        )
+        stmt = select(
+            inserted_sources.c.message_id, numbered.c.id, numbered.c.ord
+        ).join_from(inserted_sources, numbered, numbered.c.id == inserted_sources.c.id)
+        result = sorted((await session.execute(stmt)).all(), key=lambda r: r.ord)
+        created = MessageCreated(
+            message_id=result[0].message_id,
+            source_ids=[r.id for r in result],
+        )
+
+    if commit:
+        await session.commit()
+    SingletonLogger().get_logger().debug(
+        f"Stored message {created.message_id} with {len(created.source_ids)} sources"
+    )
+    return created
+
+
+async def store_messages_bulk(
+    session: AsyncSession, messages: Sequence[MessageCreate], commit: bool = True
+) -> List[MessageCreated]:
+    """
+    Bulk insert many messages and their sources, e.g. when backfilling history.
+
+    Messages are inserted with one batched multi-row ``INSERT ... RETURNING``
+    (SQLAlchemy "insertmanyvalues" over asyncpg) and all sources with one
+    batched ``executemany``, independent of how many rows are written.
+
+    Args:
+        session: Database session
+        messages: Messages to insert; ``parent_message_id`` must reference
+            already persisted messages
+        commit: Commit the transaction after the inserts (default True)
+
+    Returns:
+        List[MessageCreated]: One entry per input message, in input order
+    """
+    if not messages:
+        return []
+
+    result = await session.execute(
+        insert(Message).returning(Message.id, sort_by_parameter_order=True),
+        [_message_values(m) for m in messages],
+    )
+    message_ids = list(result.scalars().all())
+
+    source_rows = [
+        {"message_id": message_id, **s.model_dump()}
+        for message_id, m in zip(message_ids, messages)
+        for s in m.sources
+    ]
+    source_ids: List[int] = []
+    if source_rows:
+        result = await session.execute(
+            insert(Source).returning(Source.id, sort_by_parameter_order=True),
+            source_rows,
+        )
+        source_ids = list(result.scalars().all())
+
+    created: List[MessageCreated] = []
+    offset = 0
+    for message_id, m in zip(message_ids, messages):
+        created.append(
+            MessageCreated(
+                message_id=message_id,
+                source_ids=source_ids[offset : offset + len(m.sources)],
+            )
+        )
+        offset += len(m.sources)
+
+    if commit:
+        await session.commit()
+    SingletonLogger().get_logger().info(
+        f"Bulk stored {len(message_ids)} messages with {len(source_rows)} sources"
+    )
+    return created
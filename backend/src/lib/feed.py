@@ -0,0 +1,601 @@
+import os
+import asyncio
+import hashlib
+import heapq
+import json
+import math
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import logfire
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from .arxiv import (
+    ArxivClient,
+    generate_first_page_thumbnail,
+    get_existing_thumbnail_urls,
+)
+from ..core.logger import SingletonLogger
+from ..core.shared import get_shared_backend
+from ..core.tasks import task_registry
+from ..database.db import get_session, run_read
+from ..errors import LockTimeoutError
+from ..model.feed_snapshot import FeedSnapshot
+from ..model.profile import Profile
+from ..schema.arxiv import ArxivEntry, entries_from_results
+from .paper_version import parse_arxiv_id, track_versions
+
+# Thumbnails rendered while the client waits vs. warmed in the background
+INLINE_THUMBNAIL_WIDTH = 1024
+WARM_THUMBNAIL_WIDTH = 400
+
+# Date sorts whose per-topic results can be merged locally, by entry field
+MERGE_FIELDS = {"submittedDate": "published", "lastUpdatedDate": "updated"}
+# Per-topic fetch depth is rounded up to this so nearby pages share a cache entry
+TOPIC_PAGE_SIZE = int(os.getenv("FEED_TOPIC_PAGE_SIZE", 50))
+
+# Per-topic index of recently updated entries behind the delta feed
+INDEX_SIZE = int(os.getenv("FEED_INDEX_SIZE", 500))
+INDEX_TTL = 24 * 3600
+
+# Home feeds precomputed by FeedMaterializer: the newest entries per topic set
+SNAPSHOT_SIZE = int(os.getenv("FEED_SNAPSHOT_SIZE", 100))
+SNAPSHOT_SORT_BY = os.getenv("FEED_SNAPSHOT_SORT_BY", "submittedDate")
+SNAPSHOT_SORT_ORDER = os.getenv("FEED_SNAPSHOT_SORT_ORDER", "descending")
+SNAPSHOT_INTERVAL = float(os.getenv("FEED_SNAPSHOT_INTERVAL", 900))
+# Older snapshots are ignored and the feed is built live
+SNAPSHOT_MAX_AGE = float(os.getenv("FEED_SNAPSHOT_MAX_AGE", SNAPSHOT_INTERVAL * 3))
+
+
+def normalize_topics(topics: Iterable[str]) -> List[str]:
+    """Strip, drop empty and case-insensitively duplicate topics, then sort.
+
+    Topics are OR-combined, so order does not matter; sorting gives equal
+    topic sets the same upstream query and cache key.
+    """
+    seen: Dict[str, str] = {}
+    for topic in topics:
+        cleaned = topic.strip() if topic else ""
+        if cleaned and cleaned.lower() not in seen:
+            seen[cleaned.lower()] = cleaned
+    return [seen[k] for k in sorted(seen)]
+
+
+def topic_key(topics: List[str]) -> str:
+    """Stable key of a normalized topic set."""
+    return hashlib.sha1("\n".join(topics).lower().encode()).hexdigest()
+
+
+def _base_id(arxiv_id: Optional[str]) -> str:
+    """arXiv id without its version suffix, so new versions replace old ones."""
+    parsed = parse_arxiv_id(arxiv_id)
+    return parsed[0] if parsed else arxiv_id or ""
+
+
+def merge_feeds(
+    feeds: List[List[Dict[str, Any]]], field: str, descending: bool = True
+) -> List[Dict[str, Any]]:
+    """K-way merge of feeds already sorted by `field`, dropping repeated ids.
+
+    A paper listed under several topics (or versions) is kept once, at its
+    first position.
+    """
+    merged: List[Dict[str, Any]] = []
+    seen = set()
+    for entry in heapq.merge(
+        *feeds, key=lambda e: e.get(field) or "", reverse=descending
+    ):
+        base_id = _base_id(entry.get("arxiv_id"))
+        if base_id in seen:
+            continue
+        if base_id:
+            seen.add(base_id)
+        merged.append(entry)
+    return merged
+
+
+def _position(entry: Dict[str, Any]) -> Tuple[str, str]:
+    return (entry.get("updated") or "", _base_id(entry.get("arxiv_id")))
+
+
+def make_cursor(entry: Dict[str, Any]) -> str:
+    updated, base_id = _position(entry)
+    return f"{updated}|{base_id}"
+
+
+def parse_cursor(
+    since: Optional[str], index: List[Dict[str, Any]]
+) -> Optional[Tuple[str, str]]:
+    """Position after which entries count as new.
+
+    `since` is a cursor returned by the delta feed, an `updated`/`published`
+    timestamp, or the id of the last entry seen (looked up in `index`).
+    Returns None when it cannot be placed, meaning "send the latest".
+    """
+    if not since:
+        return None
+    if "|" in since:
+        updated, base_id = since.split("|", 1)
+        return updated, base_id
+    if re.match(r"^\d{4}-\d{2}-\d{2}", since):
+        return since, ""
+    base_id = _base_id(since)
+    for entry in index:
+        if _base_id(entry.get("arxiv_id")) == base_id:
+            return _position(entry)
+    return None
+
+
+class FeedEngine:
+    """Build topic feeds: fetch, validate and attach thumbnails.
+
+    Date-sorted feeds are fetched per topic and merged locally, so the
+    cache is keyed by single topics rather than by topic combinations.
+    Relevance-sorted feeds cannot be merged that way and use one OR query.
+    Upstream arXiv calls are cached in the shared backend for `cache_ttl`
+    seconds, identical concurrent requests share one call, and calls are
+    limited to `max_concurrency` at once and spaced `min_interval` seconds
+    apart. The blocking HTTP client runs in a worker thread.
+    """
+
+    def __init__(
+        self,
+        client: ArxivClient,
+        cache_ttl: float = 300.0,
+        max_concurrency: int = 4,
+        min_interval: float = 0.0,
+    ):
+        self.client = client
+        self.cache_ttl = cache_ttl
+        self.min_interval = min_interval
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._interval_lock = asyncio.Lock()
+        self._next_call_at = 0.0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls, client: ArxivClient) -> "FeedEngine":
+        return cls(
+            client,
+            cache_ttl=float(os.getenv("FEED_CACHE_TTL", 300)),
+            max_concurrency=int(os.getenv("ARXIV_MAX_CONCURRENCY", 4)),
+            min_interval=float(os.getenv("ARXIV_MIN_INTERVAL", 0)),
+        )
+
+    async def build(
+        self,
+        topics: List[str],
+        start: int = 0,
+        max_results: int = 10,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None,
+        user_id: Optional[int] = None,
+        include_thumbnails: bool = False,
+        max_thumbnail_concurrency: int = 3,
+        thumbnail_timeout_sec: int = 20,
+    ) -> List[ArxivEntry]:
+        """Feed for a normalized topic set (see `normalize_topics`)."""
+        with logfire.span(
+            "arxiv feed", topics=len(topics), start=start, max_results=max_results
+        ) as span:
+            results = await self.snapshot_page(
+                topics, start, max_results, sort_by, sort_order
+            )
+            span.set_attribute("snapshot", results is not None)
+            if results is None:
+                results = await self.fetch(
+                    topics, start, max_results, sort_by, sort_order
+                )
+            entries = entries_from_results(results)
+            span.set_attribute("entries", len(entries))
+            if user_id is not None and entries:
+                missing = await self._attach_thumbnails(
+                    entries,
+                    user_id,
+                    include_thumbnails,
+                    max_thumbnail_concurrency,
+                    thumbnail_timeout_sec,
+                )
+                span.set_attribute("thumbnails_missing", missing)
+            return entries
+
+    async def fetch(
+        self,
+        topics: List[str],
+        start: int = 0,
+        max_results: int = 10,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Raw arXiv results for the topic set, through the cache."""
+        if not topics:
+            return []
+        field = MERGE_FIELDS.get(sort_by or "")
+        if field is None:
+            return await self._query(topics, start, max_results, sort_by, sort_order)
+
+        # Each topic's first `start + max_results` entries cover the page
+        depth = math.ceil((start + max_results) / TOPIC_PAGE_SIZE) * TOPIC_PAGE_SIZE
+        feeds = await asyncio.gather(
+            *(self._query([t], 0, depth, sort_by, sort_order) for t in topics)
+        )
+        merged = merge_feeds(feeds, field, descending=sort_order != "ascending")
+        return merged[start : start + max_results]
+
+    async def _query(
+        self,
+        topics: List[str],
+        start: int,
+        max_results: int,
+        sort_by: Optional[str],
+        sort_order: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """One upstream query, cached and shared by concurrent callers."""
+        params = [topics, start, max_results, sort_by, sort_order]
+        key = "feed:" + hashlib.sha1(json.dumps(params).encode()).hexdigest()
+
+        cached = await get_shared_backend().get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_and_store(key, *params))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # One caller going away must not cancel the call for the others
+        return await asyncio.shield(future)
+
+    async def snapshot_page(
+        self,
+        topics: List[str],
+        start: int,
+        max_results: int,
+        sort_by: Optional[str],
+        sort_order: Optional[str],
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Page from the precomputed snapshot, or None to build it live.
+
+        Only requests in the snapshot's sort order and within its size are
+        served; a missing or stale snapshot, or a database error, falls back.
+        """
+        if (
+            not topics
+            or (sort_by, sort_order) != (SNAPSHOT_SORT_BY, SNAPSHOT_SORT_ORDER)
+            or start + max_results > SNAPSHOT_SIZE
+        ):
+            return None
+
+        async def _load(session):
+            result = await session.execute(
+                select(FeedSnapshot.entries, FeedSnapshot.fetched_at).where(
+                    FeedSnapshot.topic_key == topic_key(topics)
+                )
+            )
+            return result.first()
+
+        try:
+            row = await run_read(_load)
+        except Exception as e:
+            SingletonLogger().get_logger().warning(f"Feed snapshot read failed: {e}")
+            return None
+        if row is None:
+            return None
+        entries, fetched_at = row
+        age = datetime.now(timezone.utc) - fetched_at
+        if age > timedelta(seconds=SNAPSHOT_MAX_AGE):
+            return None
+        return json.loads(entries)[start : start + max_results]
+
+    async def topic_index(self, topic: str) -> List[Dict[str, Any]]:
+        """Recently updated entries of one topic, newest first.
+
+        Kept in the shared backend and topped up from upstream at most every
+        `cache_ttl` seconds; only pages newer than the index are fetched.
+        """
+        key = f"feed-index:{topic.lower()}"
+        raw = await get_shared_backend().get(key)
+        index = json.loads(raw) if raw else {"refreshed_at": 0, "entries": []}
+        if time.time() - index["refreshed_at"] < self.cache_ttl:
+            return index["entries"]
+
+        try:
+            async with get_shared_backend().lock(key, ttl=60, wait=10):
+                raw = await get_shared_backend().get(key)
+                if raw:
+                    index = json.loads(raw)
+                    if time.time() - index["refreshed_at"] < self.cache_ttl:
+                        return index["entries"]
+                newest = _position(index["entries"][0]) if index["entries"] else None
+                by_id = {_base_id(e.get("arxiv_id")): e for e in index["entries"]}
+                depth = TOPIC_PAGE_SIZE
+                while True:
+                    page = await self._query(
+                        [topic], 0, depth, "lastUpdatedDate", "descending"
+                    )
+                    for entry in page:
+                        by_id[_base_id(entry.get("arxiv_id"))] = entry
+                    # Stop once the page reaches entries already indexed
+                    if (
+                        newest is None
+                        or len(page) < depth
+                        or _position(page[-1]) <= newest
+                        or depth >= INDEX_SIZE
+                    ):
+                        break
+                    depth = min(depth * 2, INDEX_SIZE)
+                entries = sorted(by_id.values(), key=_position, reverse=True)
+                index = {"refreshed_at": time.time(), "entries": entries[:INDEX_SIZE]}
+                await get_shared_backend().set(
+                    key, json.dumps(index).encode(), ttl=INDEX_TTL
+                )
+        except LockTimeoutError:
+            pass  # another worker is refreshing; serve what is indexed
+        return index["entries"]
+
+    async def delta(
+        self,
+        topics: List[str],
+        since: Optional[str] = None,
+        max_results: int = 50,
+        user_id: Optional[int] = None,
+    ) -> Tuple[List[ArxivEntry], Optional[str], bool, bool]:
+        """Entries new or updated after `since`, oldest first.
+
+        Returns the entries, the cursor to pass next time, whether more
+        entries are waiting and whether the client must resync. Without
+        `since` the latest `max_results` entries are returned; the same
+        happens, flagged as a reset, when `since` cannot be placed or lies
+        before the indexed window, since entries may have been missed.
+        """
+        with logfire.span("arxiv feed delta", topics=len(topics)) as span:
+            indexes = await asyncio.gather(*(self.topic_index(t) for t in topics))
+            # Total order, ties broken by id, so the cursor never skips or repeats
+            merged = sorted(
+                merge_feeds(list(indexes), "updated"), key=_position, reverse=True
+            )
+            cursor = parse_cursor(since, merged)
+            # A full index has dropped its oldest entries, so a cursor older
+            # than what it still holds may have missed some of them
+            reset = bool(since) and (
+                cursor is None
+                or any(
+                    len(index) >= INDEX_SIZE and _position(index[-1]) > cursor
+                    for index in indexes
+                )
+            )
+            if cursor is None or reset:
+                new = merged[:max_results][::-1]
+                has_more = False
+            else:
+                new = [e for e in merged if _position(e) > cursor][::-1]
+                has_more = len(new) > max_results
+                new = new[:max_results]
+            span.set_attribute("entries", len(new))
+            span.set_attribute("reset", reset)
+
+            entries = entries_from_results(new)
+            if user_id is not None and entries:
+                await self._attach_thumbnails(entries, user_id, False, 0, 0)
+            next_cursor = make_cursor(new[-1]) if new else since
+            return entries, next_cursor, has_more, reset
+
+    async def _fetch_and_store(
+        self,
+        key: str,
+        topics: List[str],
+        start: int,
+        max_results: int,
+        sort_by: Optional[str],
+        sort_order: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        async with self._semaphore:
+            if self.min_interval > 0:
+                async with self._interval_lock:
+                    delay = self._next_call_at - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    self._next_call_at = time.monotonic() + self.min_interval
+            results = await asyncio.to_thread(
+                self.client.feed_by_topics,
+                topics=topics,
+                start=start,
+                max_results=max_results,
+                sort_by=sort_by,
+                sort_order=sort_order,
+            )
+        if results:
+            task_registry.submit(f"versions:{key}", track_versions(results))
+        # The client returns [] on upstream errors; do not pin that in the cache
+        if results and self.cache_ttl > 0:
+            await get_shared_backend().set(
+                key, json.dumps(results).encode(), ttl=self.cache_ttl
+            )
+        return results
+
+    async def _attach_thumbnails(
+        self,
+        entries: List[ArxivEntry],
+        user_id: int,
+        include_thumbnails: bool,
+        max_concurrency: int,
+        timeout: float,
+    ) -> int:
+        """Fill `thumbnail_url` from storage in one batch, then render the rest.
+
+        With `include_thumbnails` missing thumbnails are rendered before
+        returning; otherwise they are warmed in the background. Returns how
+        many entries are still without a thumbnail.
+        """
+        try:
+            cached = await get_existing_thumbnail_urls(
+                pdf_urls=[e.pdf_url for e in entries if e.pdf_url],
+                user_id=user_id,
+                folder="thumbnails",
+            )
+        except Exception as e:
+            SingletonLogger().get_logger().warning(f"Thumbnail lookup failed: {e}")
+            cached = {}
+        for e in entries:
+            if e.pdf_url and cached.get(e.pdf_url):
+                e.thumbnail_url = cached[e.pdf_url]
+
+        missing = [e for e in entries if e.pdf_url and not e.thumbnail_url]
+        if not missing:
+            return 0
+        if not include_thumbnails:
+            warm_thumbnails(missing, user_id)
+            return len(missing)
+
+        sem = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def render(e: ArxivEntry) -> Optional[str]:
+            async with sem:
+                try:
+                    return await asyncio.wait_for(
+                        generate_first_page_thumbnail(
+                            pdf_url=e.pdf_url,
+                            user_id=user_id,
+                            target_width=INLINE_THUMBNAIL_WIDTH,
+                            folder="thumbnails",
+                        ),
+                        timeout=timeout,
+                    )
+                except Exception:
+                    return None
+
+        urls = await asyncio.gather(*(render(e) for e in missing))
+        for e, url in zip(missing, urls):
+            if url:
+                e.thumbnail_url = url
+        return sum(1 for url in urls if not url)
+
+
+# Shared by the feed endpoints and the materializer
+feed_engine = FeedEngine.from_env(ArxivClient())
+
+
+def warm_thumbnails(entries: List[ArxivEntry], user_id: int) -> None:
+    """Queue missing thumbnails on the background task registry.
+
+    One task per thumbnail, so concurrency is bounded process-wide and a
+    thumbnail already being warmed is not queued twice.
+    """
+    for e in entries:
+        if not e.pdf_url or e.thumbnail_url:
+            continue
+        task_registry.submit(
+            f"thumbnail:{user_id}:{e.pdf_url}",
+            generate_first_page_thumbnail(
+                pdf_url=e.pdf_url,
+                user_id=user_id,
+                target_width=WARM_THUMBNAIL_WIDTH,
+                folder="thumbnails",
+            ),
+        )
+
+
+class FeedMaterializer:
+    """Precompute home feeds from `Profile.topic_preferences`.
+
+    Every `interval` seconds, users are grouped by normalized topic set and
+    each distinct set is fetched once (newest `SNAPSHOT_SIZE` entries) into
+    `feed_snapshot`, which `FeedEngine.snapshot_page` serves with one
+    indexed read. Snapshots no profile refers to any more are deleted.
+    With several workers a shared lock lets one of them run at a time, and
+    sets refreshed within half an interval are skipped.
+    """
+
+    def __init__(self, engine: FeedEngine, interval: float = SNAPSHOT_INTERVAL):
+        self.engine = engine
+        self.interval = interval
+
+    async def run_once(self) -> int:
+        """Refresh stale snapshots; return how many were written."""
+        try:
+            async with get_shared_backend().lock(
+                "feed-materializer", ttl=self.interval, wait=0
+            ):
+                return await self._materialize()
+        except LockTimeoutError:
+            return 0
+
+    async def _materialize(self) -> int:
+        async def _load(session):
+            preferences = await session.execute(
+                select(Profile.topic_preferences)
+                .where(Profile.topic_preferences.is_not(None))
+                .distinct()
+            )
+            fresh = await session.execute(
+                select(FeedSnapshot.topic_key).where(
+                    FeedSnapshot.fetched_at
+                    > datetime.now(timezone.utc) - timedelta(seconds=self.interval / 2)
+                )
+            )
+            return preferences.scalars().all(), set(fresh.scalars().all())
+
+        preferences, fresh = await run_read(_load)
+        topic_sets: Dict[str, List[str]] = {}
+        for preference in preferences:
+            topics = normalize_topics(preference.split(","))
+            if topics:
+                topic_sets[topic_key(topics)] = topics
+
+        written = 0
+        for key, topics in topic_sets.items():
+            if key in fresh:
+                continue
+            try:
+                results = await self.engine.fetch(
+                    topics, 0, SNAPSHOT_SIZE, SNAPSHOT_SORT_BY, SNAPSHOT_SORT_ORDER
+                )
+            except Exception as e:
+                SingletonLogger().get_logger().warning(
+                    f"Feed snapshot fetch failed for {topics}: {e}"
+                )
+                continue
+            if not results:
+                continue
+            stmt = insert(FeedSnapshot).values(
+                topic_key=key,
+                topics=",".join(topics),
+                entries=json.dumps(results),
+                fetched_at=datetime.now(timezone.utc),
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[FeedSnapshot.topic_key],
+                set_={
+                    "topics": stmt.excluded.topics,
+                    "entries": stmt.excluded.entries,
+                    "fetched_at": stmt.excluded.fetched_at,
+                    "updated_at": func.now(),
+                },
+            )
+            async with get_session() as session:
+                await session.execute(stmt)
+                await session.commit()
+            written += 1
+
+        async with get_session() as session:
+            await session.execute(
+                delete(FeedSnapshot).where(
+                    FeedSnapshot.topic_key.not_in(list(topic_sets))
+                )
+            )
+            await session.commit()
+        SingletonLogger().get_logger().info(
+            f"Materialized {written} of {len(topic_sets)} home feeds"
+        )
+        return written
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                SingletonLogger().get_logger().warning(f"Feed materializer failed: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,197 @@
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from ..core.logger import SingletonLogger
+from ..core.tasks import task_registry
+from ..database.db import get_session, run_read
+from ..model.paper import Paper
+from ..model.paper_version import PaperVersion
+
+# New-style (2401.12345) and old-style (hep-th/9901001) ids, optionally
+# versioned, bare or at the end of an abs/pdf URL
+_ARXIV_ID = re.compile(
+    r"(?:^|/)((?:[a-z][a-z-]*(?:\.[a-z]{2})?/\d{7})|\d{4}\.\d{4,5})(?:v(\d+))?(\.pdf)?/?$",
+    re.IGNORECASE,
+)
+
+# Latest version per paper seen by this process, bounded LRU
+_KNOWN_MAX = 100000
+_known: "OrderedDict[str, int]" = OrderedDict()
+
+
+def parse_arxiv_id(value: Optional[str]) -> Optional[Tuple[str, Optional[int]]]:
+    """Split an arXiv id or URL into (id without version, version or None)."""
+    match = _ARXIV_ID.search(value or "")
+    if not match:
+        return None
+    return match.group(1), int(match.group(2)) if match.group(2) else None
+
+
+def _remember(arxiv_id: str, version: int) -> None:
+    _known.pop(arxiv_id, None)
+    _known[arxiv_id] = version
+    if len(_known) > _KNOWN_MAX:
+        _known.popitem(last=False)
+
+
+async def record_versions(results: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """Record the latest version of each paper in arXiv `results`.
+
+    Only papers newer than what this process already knows reach the
+    database. Returns the papers whose recorded version moved forward
+    (id -> new version); a paper seen for the first time is not a new
+    version, as nothing derived from an older one can be cached yet.
+    """
+    seen: Dict[str, int] = {}
+    updated: Dict[str, Optional[str]] = {}
+    for result in results:
+        parsed = parse_arxiv_id(result.get("arxiv_id"))
+        if parsed is None or parsed[1] is None:
+            continue
+        arxiv_id, version = parsed
+        if version > max(seen.get(arxiv_id, 0), _known.get(arxiv_id, 0)):
+            seen[arxiv_id] = version
+            updated[arxiv_id] = result.get("updated")
+    if not seen:
+        return {}
+
+    async with get_session() as session:
+        rows = await session.execute(
+            select(PaperVersion.arxiv_id, PaperVersion.version).where(
+                PaperVersion.arxiv_id.in_(list(seen))
+            )
+        )
+        recorded = dict(rows.all())
+        newer = {a: v for a, v in seen.items() if recorded.get(a, 0) < v}
+        if newer:
+            stmt = insert(PaperVersion).values(
+                [
+                    {"arxiv_id": a, "version": v, "updated": updated[a]}
+                    for a, v in newer.items()
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PaperVersion.arxiv_id],
+                set_={
+                    "version": stmt.excluded.version,
+                    "updated": stmt.excluded.updated,
+                    "updated_at": func.now(),
+                },
+                # Never move backwards if another worker recorded a later one
+                where=PaperVersion.version < stmt.excluded.version,
+            )
+            await session.execute(stmt)
+            await session.commit()
+
+    for arxiv_id, version in seen.items():
+        _remember(arxiv_id, max(version, recorded.get(arxiv_id, 0)))
+    return {a: v for a, v in newer.items() if a in recorded}
+
+
+async def latest_versions(arxiv_ids: Iterable[str]) -> Dict[str, int]:
+    """Latest recorded version per paper id, for the ids that have one."""
+    arxiv_ids = list(dict.fromkeys(arxiv_ids))
+    found = {a: _known[a] for a in arxiv_ids if a in _known}
+    missing = [a for a in arxiv_ids if a not in found]
+    if missing:
+
+        async def _load(session):
+            rows = await session.execute(
+                select(PaperVersion.arxiv_id, PaperVersion.version).where(
+                    PaperVersion.arxiv_id.in_(missing)
+                )
+            )
+            return rows.all()
+
+        for arxiv_id, version in await run_read(_load):
+            _remember(arxiv_id, version)
+            found[arxiv_id] = version
+    return found
+
+
+async def resolve_pdf_urls(pdf_urls: List[str]) -> Dict[str, str]:
+    """Pin unversioned arXiv PDF URLs to the latest recorded version.
+
+    Derived artifacts (cached PDFs, thumbnails) are keyed by the resolved
+    URL, so they are reused while the version is unchanged and rebuilt
+    under a new key once a new version is recorded. URLs that are already
+    versioned, not arXiv, or of unknown papers are returned unchanged.
+    """
+    resolved = {url: url for url in pdf_urls}
+    unversioned: Dict[str, Tuple[str, bool]] = {}
+    for url in pdf_urls:
+        match = _ARXIV_ID.search(url or "")
+        if match and not match.group(2):
+            unversioned[url] = (match.group(1), bool(match.group(3)))
+    if not unversioned:
+        return resolved
+    try:
+        versions = await latest_versions({a for a, _ in unversioned.values()})
+    except Exception as e:
+        SingletonLogger().get_logger().warning(f"Paper version lookup failed: {e}")
+        return resolved
+    for url, (arxiv_id, has_suffix) in unversioned.items():
+        version = versions.get(arxiv_id)
+        if version is not None:
+            base = url[: -len(".pdf")] if has_suffix else url.rstrip("/")
+            resolved[url] = f"{base}v{version}" + (".pdf" if has_suffix else "")
+    return resolved
+
+
+async def resolve_pdf_url(pdf_url: str) -> str:
+    return (await resolve_pdf_urls([pdf_url]))[pdf_url]
+
+
+async def refresh_saved_papers(new_versions: Dict[str, int]) -> None:
+    """Regenerate thumbnails of saved papers that track the latest version.
+
+    Papers saved with a versioned PDF URL keep their thumbnail; those with
+    an unversioned URL get a render of the new version in the background.
+    """
+    if not new_versions:
+        return
+    # Imported here: lib.arxiv resolves URLs through this module
+    from .arxiv import generate_first_page_thumbnail
+
+    async def _load(session):
+        rows = await session.execute(
+            select(Paper.id, Paper.user_id, Paper.pdf_url).where(
+                or_(
+                    *(
+                        or_(Paper.arxiv_id == a, Paper.arxiv_id.like(f"{a}v%"))
+                        for a in new_versions
+                    )
+                )
+            )
+        )
+        return rows.all()
+
+    async def _refresh(paper_id: int, user_id: int, pdf_url: str) -> None:
+        url = await generate_first_page_thumbnail(
+            pdf_url=pdf_url, user_id=user_id, target_width=400
+        )
+        if url:
+            async with get_session() as session:
+                await session.execute(
+                    update(Paper).where(Paper.id == paper_id).values(thumbnail_url=url)
+                )
+                await session.commit()
+
+    for paper_id, user_id, pdf_url in await run_read(_load):
+        parsed = parse_arxiv_id(pdf_url)
+        if parsed is not None and parsed[1] is None:
+            task_registry.submit(
+                f"paper-thumbnail:{paper_id}", _refresh(paper_id, user_id, pdf_url)
+            )
+
+
+async def track_versions(results: List[Dict[str, Any]]) -> None:
+    """Record versions from fresh arXiv results; best-effort."""
+    try:
+        await refresh_saved_papers(await record_versions(results))
+    except Exception as e:
+        SingletonLogger().get_logger().warning(f"Paper version tracking failed: {e}")
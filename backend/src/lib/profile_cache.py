@@ -0,0 +1,145 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+
+from ..core.logger import SingletonLogger
+from ..core.shared import get_shared_backend
+from ..core.storage.registry import get_storage
+from ..core.storage.urls import SIGNED_URL_EXPIRES
+from ..database.db import run_read
+from ..model.profile import Profile
+from ..schema.profile import ProfileResponse
+
+
+class CachedProfile(ProfileResponse):
+    """A profile as kept in the cache: the response plus the raw avatar key."""
+
+    avatar: Optional[str] = None
+
+    def response(self) -> ProfileResponse:
+        return ProfileResponse.model_construct(
+            **self.model_dump(exclude={"avatar"})
+        )
+
+
+def to_cached(profile: Profile) -> CachedProfile:
+    """Snapshot a Profile row, resolving its avatar URL once."""
+    return CachedProfile(
+        id=profile.id,
+        user_id=profile.user_id,
+        phone=profile.phone,
+        bio=profile.bio,
+        avatar=profile.avatar,
+        avatar_url=(
+            get_storage().get_file_url(profile.avatar) if profile.avatar else None
+        ),
+        topic_preferences=profile.topic_preferences,
+    )
+
+
+class ProfileCache:
+    """Read-through profile cache: a per-process LRU over the shared backend.
+
+    Reads hit the local LRU first, then the shared backend (Redis when
+    REDIS_URL is set), then the database. Writers call `put()` with the
+    committed row, which refreshes both layers; `invalidate()` drops a
+    user. Other workers may keep serving their local copy for up to
+    `local_ttl` seconds after a write, so keep it short.
+    """
+
+    def __init__(
+        self, max_entries: int = 10000, local_ttl: float = 5.0, ttl: float = 300.0
+    ):
+        self.max_entries = max_entries
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self._local: "OrderedDict[int, Tuple[CachedProfile, float]]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "ProfileCache":
+        return cls(
+            max_entries=int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", 10000)),
+            local_ttl=float(os.getenv("PROFILE_CACHE_LOCAL_TTL", 5)),
+            # Cached avatar URLs may be presigned; never outlive them
+            ttl=min(
+                float(os.getenv("PROFILE_CACHE_TTL", 300)), SIGNED_URL_EXPIRES / 2
+            ),
+        )
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"profile:{user_id}"
+
+    def _remember(self, cached: CachedProfile) -> None:
+        self._local.pop(cached.user_id, None)
+        self._local[cached.user_id] = (cached, time.monotonic() + self.local_ttl)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, user_id: int) -> Optional[CachedProfile]:
+        """The user's profile, or None if they have none."""
+        entry = self._local.get(user_id)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self._local.move_to_end(user_id)
+                return entry[0]
+            del self._local[user_id]
+
+        try:
+            raw = await get_shared_backend().get(self._key(user_id))
+        except Exception as e:
+            SingletonLogger().get_logger().warning(
+                f"Profile cache read failed for user_id={user_id}: {e}"
+            )
+            raw = None
+        if raw is not None:
+            cached = CachedProfile.model_validate_json(raw)
+            self._remember(cached)
+            return cached
+
+        async def _load(session):
+            result = await session.execute(
+                select(Profile).where(Profile.user_id == user_id)
+            )
+            return result.scalar_one_or_none()
+
+        profile = await run_read(_load)
+        if profile is None:
+            return None
+        cached = to_cached(profile)
+        await self._store(cached)
+        return cached
+
+    async def put(self, profile: Profile) -> CachedProfile:
+        """Write-through after a committed change; returns the new snapshot."""
+        cached = to_cached(profile)
+        await self._store(cached)
+        return cached
+
+    async def invalidate(self, user_id: int) -> None:
+        self._local.pop(user_id, None)
+        try:
+            await get_shared_backend().delete(self._key(user_id))
+        except Exception as e:
+            SingletonLogger().get_logger().warning(
+                f"Profile cache invalidation failed for user_id={user_id}: {e}"
+            )
+
+    async def _store(self, cached: CachedProfile) -> None:
+        self._remember(cached)
+        try:
+            await get_shared_backend().set(
+                self._key(cached.user_id),
+                cached.model_dump_json().encode(),
+                ttl=self.ttl,
+            )
+        except Exception as e:
+            SingletonLogger().get_logger().warning(
+                f"Profile cache write failed for user_id={cached.user_id}: {e}"
+            )
+
+
+profile_cache = ProfileCache.from_env()
@@ -2,8 +2,10 @@ from .chat_session import Session
 from .login_session import LoginSession
 from .message import Message
 from .source import Source
+from .feed_snapshot import FeedSnapshot
 from .profile import Profile
 from .paper import Paper
+from .paper_version import PaperVersion
 from .user import User
 from .user_settings import UserSettings
 
@@ -12,8 +14,10 @@ __all__ = [
     "LoginSession",
     "Message",
     "Source",
+    "FeedSnapshot",
     "Profile",
     "Paper",
+    "PaperVersion",
     "User",
     "UserSettings",
 ]
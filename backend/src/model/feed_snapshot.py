@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import DateTime, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from ..database.db import Base, TimestampMixin
+
+
+class FeedSnapshot(Base, TimestampMixin):
+    """SQLAlchemy model for a precomputed feed of one normalized topic set."""
+
+    __tablename__ = "feed_snapshot"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    topic_key: Mapped[str] = mapped_column(
+        String(40), nullable=False, unique=True, index=True
+    )  # sha1 of the normalized topic set
+    topics: Mapped[str] = mapped_column(String(1024), nullable=False)
+    entries: Mapped[str] = mapped_column(Text, nullable=False)  # JSON, ranked
+    fetched_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"FeedSnapshot(id={self.id}, topics={self.topics}, fetched_at={self.fetched_at})"
@@ -0,0 +1,19 @@
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from ..database.db import Base, TimestampMixin
+
+
+class PaperVersion(Base, TimestampMixin):
+    """SQLAlchemy model for the latest known version of an arXiv paper."""
+
+    __tablename__ = "paper_version"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    arxiv_id: Mapped[str] = mapped_column(
+        String(50), nullable=False, unique=True, index=True
+    )  # without version suffix
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated: Mapped[str | None] = mapped_column(String(50), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"PaperVersion(arxiv_id={self.arxiv_id}, version={self.version})"
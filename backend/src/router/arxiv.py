@@ -1,19 +1,32 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 
 from ..controller.arxiv import (
     search_arxiv,
     feed_topics,
     feed_topic_string,
+    feed_delta,
     create_pdf_thumbnail,
 )
-from ..schema.arxiv import ArxivEntry, ThumbnailRequest, ThumbnailResponse
+from ..schema.arxiv import (
+    ArxivEntry,
+    ArxivEntryList,
+    FeedDelta,
+    ThumbnailRequest,
+    ThumbnailResponse,
+)
 from ..lib.auth import get_current_user
 
 
 router = APIRouter()
 
 
+def _json(content: bytes) -> Response:
+    # Returning a Response skips FastAPI's response_model re-validation and
+    # its generic encoder; response_model still documents the shape
+    return Response(content=content, media_type="application/json")
+
+
 @router.get(
     "/search",
     response_model=List[ArxivEntry],
@@ -27,13 +40,14 @@ async def search(
     _: int = Depends(get_current_user),
 ):
     """Search arXiv by query (uses `all:` semantics)."""
-    return await search_arxiv(
+    entries = await search_arxiv(
         search_query=search_query,
         start=start,
         max_results=max_results,
         sort_by=sort_by,
         sort_order=sort_order,
     )
+    return _json(ArxivEntryList.dump_json(entries, by_alias=True))
 
 
 @router.get("/feed", response_model=List[ArxivEntry])
@@ -49,7 +63,7 @@ async def feed(
     user_id: int = Depends(get_current_user),
 ):
     """Fetch arXiv feed by topics (OR-combined)."""
-    return await feed_topics(
+    entries = await feed_topics(
         topics=topics,
         start=start,
         max_results=max_results,
@@ -60,6 +74,7 @@ async def feed(
         thumbnail_timeout_sec=thumbnail_timeout_sec,
         user_id=user_id,
     )
+    return _json(ArxivEntryList.dump_json(entries, by_alias=True))
 
 
 @router.get("/feed/string", response_model=List[ArxivEntry])
@@ -75,7 +90,7 @@ async def feed_string(
     user_id: int = Depends(get_current_user),
 ):
     """Fetch arXiv feed by a comma-separated topic string."""
-    return await feed_topic_string(
+    entries = await feed_topic_string(
         topics_csv=topics_csv,
         start=start,
         max_results=max_results,
@@ -86,6 +101,27 @@ async def feed_string(
         thumbnail_timeout_sec=thumbnail_timeout_sec,
         user_id=user_id,
     )
+    return _json(ArxivEntryList.dump_json(entries, by_alias=True))
+
+
+@router.get("/feed/delta", response_model=FeedDelta)
+async def feed_since(
+    topics: List[str] = Query(..., description="List of topics, OR-combined"),
+    since: Optional[str] = Query(
+        None,
+        description="Cursor from the previous call, a timestamp or the last seen arXiv id",
+    ),
+    max_results: int = 50,
+    user_id: int = Depends(get_current_user),
+):
+    """Entries new or updated since `since`, oldest first; pass back `cursor`."""
+    delta = await feed_delta(
+        topics=topics,
+        since=since,
+        max_results=max_results,
+        user_id=user_id,
+    )
+    return _json(delta.model_dump_json(by_alias=True).encode())
 
 
 @router.post("/thumbnail", response_model=ThumbnailResponse)
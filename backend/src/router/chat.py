@@ -0,0 +1,32 @@
+from typing import List
+
+from fastapi import APIRouter, Depends
+
+from ..controller.chat import add_message, import_messages
+from ..schema.message import MessageCreated, MessageRequest
+from ..lib.auth import get_current_user
+
+
+router = APIRouter()
+
+
+@router.post("/sessions/{session_id}/messages", response_model=MessageCreated)
+async def create_message(
+    session_id: int,
+    payload: MessageRequest,
+    user_id: int = Depends(get_current_user),
+):
+    """Store a message and its sources in one of the user's chat sessions."""
+    return await add_message(user_id, session_id, payload)
+
+
+@router.post(
+    "/sessions/{session_id}/messages/bulk", response_model=List[MessageCreated]
+)
+async def create_messages(
+    session_id: int,
+    payload: List[MessageRequest],
+    user_id: int = Depends(get_current_user),
+):
+    """Store many messages at once, e.g. when restoring a conversation."""
+    return await import_messages(user_id, session_id, payload)
@@ -4,8 +4,17 @@ from ..controller.profile import (
     create_profile,
     update_profile,
     upload_avatar,
+    create_avatar_upload_url,
+    confirm_avatar_upload,
+)
+from ..schema.profile import (
+    AvatarConfirmRequest,
+    AvatarUploadRequest,
+    AvatarUploadResponse,
+    ProfileCreate,
+    ProfileResponse,
+    ProfileUpdate,
 )
-from ..schema.profile import ProfileCreate, ProfileUpdate, ProfileResponse
 from ..lib.auth import get_current_user
 
 router = APIRouter()
@@ -39,3 +48,19 @@ async def upload_user_avatar(
 ):
     """Upload user avatar"""
     return await upload_avatar(user_id, file)
+
+
+@router.post("/avatar/upload-url", response_model=AvatarUploadResponse)
+async def request_avatar_upload_url(
+    payload: AvatarUploadRequest, user_id: int = Depends(get_current_user)
+):
+    """Get a presigned URL to upload an avatar directly to storage"""
+    return await create_avatar_upload_url(user_id, payload)
+
+
+@router.post("/avatar/confirm", response_model=ProfileResponse)
+async def confirm_user_avatar(
+    payload: AvatarConfirmRequest, user_id: int = Depends(get_current_user)
+):
+    """Confirm a direct avatar upload and set it on the profile"""
+    return await confirm_avatar_upload(user_id, payload)
@@ -1,5 +1,5 @@
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 class ArxivEntry(BaseModel):
@@ -23,6 +23,30 @@ class ArxivEntry(BaseModel):
         populate_by_name = True
 
 
+def entries_from_results(results: List[Dict[str, Any]]) -> List[ArxivEntry]:
+    """Build entries from `ArxivClient` output without re-validating it.
+
+    The parser (and caches of its output) already produce the exact field
+    types, so `model_construct` skips validation; never use this for
+    client-supplied data.
+    """
+    return [ArxivEntry.model_construct(**r) for r in results]
+
+
+# Serializes a whole list in one pydantic-core call; dump with by_alias=True
+# so `abstract` stays `summary` on the wire
+ArxivEntryList = TypeAdapter(List[ArxivEntry])
+
+
+class FeedDelta(BaseModel):
+    entries: List[ArxivEntry] = []
+    cursor: Optional[str] = None
+    has_more: bool = False
+    # The cursor could not be placed or fell out of the indexed window; the
+    # entries are the latest ones and the client should refresh its feed
+    reset: bool = False
+
+
 class ThumbnailRequest(BaseModel):
     pdf_url: str
     target_width: Optional[int] = 400
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class SourceCreate(BaseModel):
+    source_text: Optional[str] = None
+    source_type: Optional[str] = None
+    source_url: Optional[str] = None
+
+
+class MessageRequest(BaseModel):
+    content: dict
+    parent_message_id: Optional[int] = None
+    model_used: Optional[str] = None
+    confidence_score: Optional[float] = None
+    sources: List[SourceCreate] = []
+
+
+class MessageCreate(MessageRequest):
+    session_id: int
+    user_id: Optional[int] = None
+
+
+class MessageCreated(BaseModel):
+    message_id: int
+    source_ids: List[int] = []
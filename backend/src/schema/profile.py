@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
 
 
 class ProfileBase(BaseModel):
@@ -27,3 +27,19 @@ class ProfileResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class AvatarUploadRequest(BaseModel):
+    content_type: str
+    content_length: int = Field(..., gt=0, description="Exact size of the image in bytes")
+
+
+class AvatarUploadResponse(BaseModel):
+    upload_url: str
+    file_key: str
+    expires_in: int
+    headers: Dict[str, str]
+
+
+class AvatarConfirmRequest(BaseModel):
+    file_key: str
@@ -0,0 +1,11 @@
+import os
+
+import pytest
+
+# Importing the app's modules builds (but never connects) the engine
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
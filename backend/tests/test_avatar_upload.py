@@ -0,0 +1,179 @@
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi import HTTPException
+
+from src.controller import profile as controller
+from src.core.storage.urls import CACHE_CONTROL_IMMUTABLE, UploadSigner
+from src.database.db import engine
+from src.model.profile import Profile
+from src.schema.profile import AvatarConfirmRequest, AvatarUploadRequest
+
+
+class FakeStorage:
+    def __init__(self, objects=None):
+        self.objects = dict(objects or {})
+        self.deleted = []
+
+    async def generate_upload_url(self, file_key, **kwargs):
+        return f"https://storage.example.com/{file_key}?signed"
+
+    async def get_file_info(self, file_key):
+        return self.objects.get(file_key)
+
+    async def delete_file(self, file_key):
+        self.deleted.append(file_key)
+        return self.objects.pop(file_key, None) is not None
+
+    async def list_files(self, prefix):
+        return [k for k in self.objects if k.startswith(prefix)]
+
+    async def delete_many(self, file_keys):
+        return sum([await self.delete_file(k) for k in file_keys])
+
+    def get_file_url(self, file_key):
+        return f"https://cdn.example.com/{file_key}"
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    fake = FakeStorage()
+    monkeypatch.setattr(controller, "get_storage", lambda: fake)
+    monkeypatch.setattr("src.lib.profile_cache.get_storage", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    tasks = []
+
+    def submit(name, coro):
+        coro.close()
+        tasks.append(name)
+
+    monkeypatch.setattr(controller.task_registry, "submit", submit)
+    return tasks
+
+
+def png(size=1024):
+    return {"content_type": "image/png", "size": size, "cache_control": None}
+
+
+def test_upload_url_signs_length_and_cache_control():
+    signer = UploadSigner(
+        "https://s3.example.com", "key", "secret", "bucket", region_name="us-east-1"
+    )
+    url = signer.presign_put(
+        "1/avatar/a.png", "image/png", 2048, 300, CACHE_CONTROL_IMMUTABLE
+    )
+    query = parse_qs(urlparse(url).query)
+    assert query["X-Amz-Algorithm"] == ["AWS4-HMAC-SHA256"]
+    assert query["X-Amz-SignedHeaders"] == [
+        "cache-control;content-length;content-type;host"
+    ]
+
+
+@pytest.mark.anyio
+async def test_upload_url_is_bound_to_a_timestamped_user_key(storage, submitted):
+    before = int(time.time())
+    response = await controller.create_avatar_upload_url(
+        7, AvatarUploadRequest(content_type="image/png", content_length=2048)
+    )
+    assert response.file_key.startswith("7/avatar/")
+    assert response.file_key.endswith(".png")
+    assert controller._upload_issued_at(response.file_key) >= before
+    assert response.headers == {
+        "Content-Type": "image/png",
+        "Content-Length": "2048",
+        "Cache-Control": CACHE_CONTROL_IMMUTABLE,
+    }
+    assert submitted == ["avatar-sweep:7"]
+
+
+@pytest.mark.anyio
+async def test_upload_url_rejects_oversized_avatars(storage, submitted):
+    with pytest.raises(HTTPException) as exc:
+        await controller.create_avatar_upload_url(
+            7,
+            AvatarUploadRequest(
+                content_type="image/png",
+                content_length=controller.AVATAR_MAX_BYTES + 1,
+            ),
+        )
+    assert exc.value.status_code == 413
+
+
+@pytest.mark.anyio
+async def test_confirm_rejects_another_users_key(storage):
+    with pytest.raises(HTTPException) as exc:
+        await controller.confirm_avatar_upload(
+            7, AvatarConfirmRequest(file_key="8/avatar/x.png")
+        )
+    assert exc.value.status_code == 403
+
+
+@pytest.mark.anyio
+async def test_confirm_deletes_an_invalid_upload(storage):
+    storage.objects["7/avatar/big.png"] = png(controller.AVATAR_MAX_BYTES + 1)
+    with pytest.raises(HTTPException) as exc:
+        await controller.confirm_avatar_upload(
+            7, AvatarConfirmRequest(file_key="7/avatar/big.png")
+        )
+    assert exc.value.status_code == 400
+    assert storage.deleted == ["7/avatar/big.png"]
+
+
+@pytest.mark.anyio
+async def test_confirm_deletes_the_upload_without_a_profile(storage, monkeypatch):
+    async def no_profile(session, user_id, avatar_key):
+        return None
+
+    monkeypatch.setattr(controller, "_set_avatar", no_profile)
+    storage.objects["7/avatar/new.png"] = png()
+    with pytest.raises(HTTPException) as exc:
+        await controller.confirm_avatar_upload(
+            7, AvatarConfirmRequest(file_key="7/avatar/new.png")
+        )
+    assert exc.value.status_code == 404
+    assert storage.deleted == ["7/avatar/new.png"]
+
+
+@pytest.mark.anyio
+async def test_confirm_attaches_the_avatar_and_deletes_the_old_one(
+    storage, monkeypatch
+):
+    async def set_avatar(session, user_id, avatar_key):
+        return Profile(id=1, user_id=user_id, avatar=avatar_key), "7/avatar/old.png"
+
+    monkeypatch.setattr(controller, "_set_avatar", set_avatar)
+    storage.objects["7/avatar/new.png"] = png()
+    storage.objects["7/avatar/old.png"] = png()
+    response = await controller.confirm_avatar_upload(
+        7, AvatarConfirmRequest(file_key="7/avatar/new.png")
+    )
+    assert response.avatar_url == "https://cdn.example.com/7/avatar/new.png"
+    assert storage.deleted == ["7/avatar/old.png"]
+
+
+@pytest.mark.anyio
+async def test_sweep_deletes_only_stale_unconfirmed_uploads(storage):
+    async with engine.begin() as conn:
+        await conn.run_sync(Profile.__table__.create, checkfirst=True)
+        await conn.execute(Profile.__table__.delete())
+        await conn.execute(
+            Profile.__table__.insert().values(
+                user_id=7, avatar="7/avatar/1000-current.png"
+            )
+        )
+    fresh = f"7/avatar/{int(time.time())}-fresh.png"
+    for key in (
+        "7/avatar/1000-current.png",
+        "7/avatar/1000-abandoned.png",
+        "7/avatar/legacy-upload.png",
+        fresh,
+    ):
+        storage.objects[key] = png()
+
+    assert await controller.sweep_avatar_uploads(7) == 1
+    assert storage.deleted == ["7/avatar/1000-abandoned.png"]
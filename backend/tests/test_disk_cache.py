@@ -0,0 +1,91 @@
+import os
+
+from src.core.storage.cache import DiskCache
+
+
+def test_put_then_get_round_trips(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1024)
+    cache.put("a", b"hello")
+    assert cache.get("a") == b"hello"
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_written_by_another_worker_are_hits(tmp_path):
+    first = DiskCache(str(tmp_path), max_bytes=1024)
+    second = DiskCache(str(tmp_path), max_bytes=1024)
+    first.put("a", b"shared")
+    assert second.get("a") == b"shared"
+
+    second.invalidate("a")
+    assert first.get("a") is None
+
+
+def test_truncated_entries_are_dropped(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1024)
+    cache.put("a", b"complete")
+    _, data_path, meta_path = cache._paths("a")
+    with open(data_path, "wb") as fh:
+        fh.write(b"trunc")
+    assert cache.get("a") is None
+    assert not os.path.exists(data_path)
+    assert not os.path.exists(meta_path)
+
+
+def test_budget_covers_entries_from_every_worker(tmp_path):
+    first = DiskCache(str(tmp_path), max_bytes=100, rescan_interval=0)
+    second = DiskCache(str(tmp_path), max_bytes=100, rescan_interval=0)
+    first.put("old", b"x" * 60)
+    second.put("new", b"y" * 60)
+
+    # The second worker saw both entries and evicted the older one
+    assert first.get("old") is None
+    assert first.get("new") == b"y" * 60
+    assert second.stats()["bytes"] == 60
+
+
+def test_same_size_corruption_is_dropped(tmp_path):
+    DiskCache(str(tmp_path), max_bytes=1024).put("a", b"complete")
+    reader = DiskCache(str(tmp_path), max_bytes=1024)
+    _, data_path, _ = reader._paths("a")
+    with open(data_path, "wb") as fh:
+        fh.write(b"corrupt!")
+    assert reader.get("a") is None
+    assert not os.path.exists(data_path)
+
+
+def test_checksum_is_verified_once_per_version(tmp_path, monkeypatch):
+    writer = DiskCache(str(tmp_path), max_bytes=1024)
+    writer.put("a", b"v1")
+    reader = DiskCache(str(tmp_path), max_bytes=1024)
+    calls = []
+    checksum = DiskCache._checksum
+    monkeypatch.setattr(
+        reader, "_checksum", lambda path: calls.append(path) or checksum(path)
+    )
+
+    assert reader.get("a") == reader.get("a") == b"v1"
+    assert len(calls) == 1
+
+    writer.put("a", b"v2")
+    assert reader.get("a") == b"v2"
+    assert len(calls) == 2
+
+
+def test_entry_rewritten_mid_read_is_kept(tmp_path, monkeypatch):
+    writer = DiskCache(str(tmp_path), max_bytes=1024)
+    writer.put("a", b"old")
+    reader = DiskCache(str(tmp_path), max_bytes=1024)
+    _, data_path, meta_path = reader._paths("a")
+    stale = reader._read_meta(meta_path)
+    writer.put("a", b"new!")
+
+    # The reader saw the sidecar just before the other worker replaced it
+    reads = [stale]
+    read_meta = DiskCache._read_meta
+    monkeypatch.setattr(
+        reader, "_read_meta", lambda path: reads.pop() if reads else read_meta(path)
+    )
+    assert reader.get("a") is None
+    assert os.path.exists(data_path)
+    assert reader.get("a") == b"new!"
@@ -0,0 +1,74 @@
+import pytest
+
+from src.lib import feed
+from src.lib.feed import FeedEngine, make_cursor
+
+
+def entry(n: int) -> dict:
+    return {"arxiv_id": f"2401.{n:05d}v1", "updated": f"2024-01-01T00:00:{n:02d}Z"}
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    # Newest first, like the per-topic index
+    index = [entry(n) for n in range(10, 0, -1)]
+    engine = FeedEngine(client=None)
+
+    async def topic_index(topic):
+        return index
+
+    monkeypatch.setattr(engine, "topic_index", topic_index)
+    return engine
+
+
+def ids(entries) -> list:
+    return [e.arxiv_id for e in entries]
+
+
+@pytest.mark.anyio
+async def test_pages_forward_from_a_cursor(engine):
+    since = make_cursor(entry(3))
+    entries, cursor, has_more, reset = await engine.delta(["cs.AI"], since, 4)
+    assert ids(entries) == [entry(n)["arxiv_id"] for n in (4, 5, 6, 7)]
+    assert has_more and not reset
+
+    entries, cursor, has_more, reset = await engine.delta(["cs.AI"], cursor, 4)
+    assert ids(entries) == [entry(n)["arxiv_id"] for n in (8, 9, 10)]
+    assert not has_more and not reset
+
+    entries, cursor_after, has_more, reset = await engine.delta(["cs.AI"], cursor, 4)
+    assert entries == [] and cursor_after == cursor and not reset
+
+
+@pytest.mark.anyio
+async def test_last_seen_id_is_a_cursor(engine):
+    entries, _, _, reset = await engine.delta(["cs.AI"], "2401.00009v2", 4)
+    assert ids(entries) == [entry(10)["arxiv_id"]]
+    assert not reset
+
+
+@pytest.mark.anyio
+async def test_cursor_before_a_full_window_resets(engine, monkeypatch):
+    monkeypatch.setattr(feed, "INDEX_SIZE", 10)
+    since = "2023-12-31T00:00:00Z"
+    entries, cursor, has_more, reset = await engine.delta(["cs.AI"], since, 3)
+    assert reset and not has_more
+    assert ids(entries) == [entry(n)["arxiv_id"] for n in (8, 9, 10)]
+    assert cursor == make_cursor(entry(10))
+
+
+@pytest.mark.anyio
+async def test_cursor_before_a_partial_window_pages(engine):
+    # The index has not filled up yet, so nothing older was dropped
+    entries, _, has_more, reset = await engine.delta(
+        ["cs.AI"], "2023-12-31T00:00:00Z", 3
+    )
+    assert ids(entries) == [entry(n)["arxiv_id"] for n in (1, 2, 3)]
+    assert has_more and not reset
+
+
+@pytest.mark.anyio
+async def test_unknown_id_resets(engine):
+    entries, _, _, reset = await engine.delta(["cs.AI"], "1999.99999", 2)
+    assert reset
+    assert ids(entries) == [entry(n)["arxiv_id"] for n in (9, 10)]
@@ -0,0 +1,144 @@
+import gzip
+import json
+
+import pytest
+
+from src.core import http
+from src.core.http import (
+    CompressionMiddleware,
+    ETagMiddleware,
+    _BufferedResponse,
+    negotiate_encoding,
+)
+
+BODY = json.dumps({"entries": ["x" * 40] * 100}).encode()
+
+
+def json_app(body: bytes = BODY, chunks: int = 1):
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        size = len(body) // chunks + 1
+        for i in range(chunks):
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": body[i * size : (i + 1) * size],
+                    "more_body": i < chunks - 1,
+                }
+            )
+
+    # Same stacking as main.py: ETags hash the body before it is compressed
+    return CompressionMiddleware(ETagMiddleware(app))
+
+
+async def call(app, headers=(), method="GET"):
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "headers": [(k.encode(), v.encode()) for k, v in headers],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    response_headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    return start["status"], response_headers, body
+
+
+def test_buffered_response_is_abstract():
+    with pytest.raises(TypeError):
+        _BufferedResponse(json_app())
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("gzip", "gzip"),
+        ("gzip;q=0", None),
+        ("deflate, gzip;q=0.5", "gzip"),
+        ("*", next(iter(http._COMPRESSORS))),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_negotiate_encoding(accept, expected):
+    assert negotiate_encoding(accept) == expected
+
+
+@pytest.mark.anyio
+async def test_etag_and_not_modified():
+    app = json_app()
+    status, headers, body = await call(app)
+    assert status == 200 and body == BODY
+    assert headers["cache-control"] == "private, no-cache"
+    etag = headers["etag"]
+
+    status, headers, body = await call(app, [("if-none-match", etag)])
+    assert status == 304 and body == b""
+    assert headers["etag"] == etag
+    assert "content-length" not in headers
+
+    status, _, _ = await call(app, [("if-none-match", '"stale"')])
+    assert status == 200
+
+
+@pytest.mark.anyio
+async def test_compressed_variant_has_its_own_etag():
+    app = json_app()
+    _, plain, _ = await call(app)
+    status, headers, body = await call(
+        app, [("accept-encoding", "gzip;q=1, br;q=0")]
+    )
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == plain["etag"][:-1] + '-gzip"'
+    assert int(headers["content-length"]) == len(body)
+    assert gzip.decompress(body) == BODY
+
+    # Revalidating the gzip variant echoes its tag
+    status, headers, body = await call(
+        app, [("accept-encoding", "gzip"), ("if-none-match", headers["etag"])]
+    )
+    assert status == 304 and body == b""
+    assert headers["etag"] == plain["etag"][:-1] + '-gzip"'
+    assert "content-encoding" not in headers
+
+
+@pytest.mark.anyio
+async def test_small_and_streamed_bodies_are_sent_as_is():
+    status, headers, body = await call(
+        json_app(b'{"ok": true}'), [("accept-encoding", "gzip")]
+    )
+    assert status == 200 and body == b'{"ok": true}'
+    assert "content-encoding" not in headers
+
+    status, headers, body = await call(
+        json_app(chunks=3), [("accept-encoding", "gzip")]
+    )
+    assert body == BODY
+    assert "etag" not in headers and "content-encoding" not in headers
+
+
+@pytest.mark.anyio
+async def test_only_get_responses_get_etags():
+    _, headers, _ = await call(json_app(), method="POST")
+    assert "etag" not in headers
@@ -0,0 +1,65 @@
+from collections import OrderedDict
+
+import pytest
+
+from src.database.db import engine
+from src.lib import paper_version
+from src.lib.paper_version import latest_versions, parse_arxiv_id, resolve_pdf_urls
+from src.model.paper_version import PaperVersion
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("2401.12345", ("2401.12345", None)),
+        ("2401.12345v3", ("2401.12345", 3)),
+        ("https://arxiv.org/abs/2401.12345v2", ("2401.12345", 2)),
+        ("https://arxiv.org/pdf/2401.12345v2.pdf", ("2401.12345", 2)),
+        ("https://arxiv.org/pdf/0704.0001/", ("0704.0001", None)),
+        ("hep-th/9901001v1", ("hep-th/9901001", 1)),
+        ("https://arxiv.org/abs/math.GT/0309136", ("math.GT/0309136", None)),
+        ("https://example.com/paper.pdf", None),
+        (None, None),
+    ],
+)
+def test_parse_arxiv_id(value, expected):
+    assert parse_arxiv_id(value) == expected
+
+
+@pytest.fixture
+async def versions(monkeypatch):
+    monkeypatch.setattr(paper_version, "_known", OrderedDict({"2401.00001": 4}))
+    async with engine.begin() as conn:
+        await conn.run_sync(PaperVersion.__table__.create, checkfirst=True)
+        await conn.execute(PaperVersion.__table__.delete())
+        await conn.execute(
+            PaperVersion.__table__.insert(),
+            [
+                {"arxiv_id": "2401.00001", "version": 3},
+                {"arxiv_id": "2401.00002", "version": 2},
+            ],
+        )
+
+
+@pytest.mark.anyio
+async def test_latest_versions_accepts_a_one_shot_iterable(versions):
+    ids = (a for a in ["2401.00001", "2401.00002", "2401.00003", "2401.00002"])
+    # The process-local value wins over the (older) recorded one
+    assert await latest_versions(ids) == {"2401.00001": 4, "2401.00002": 2}
+    assert paper_version._known["2401.00002"] == 2
+
+
+@pytest.mark.anyio
+async def test_resolve_pins_unversioned_urls(versions):
+    urls = [
+        "https://arxiv.org/pdf/2401.00002.pdf",
+        "https://arxiv.org/abs/2401.00002",
+        "https://arxiv.org/pdf/2401.00002v1.pdf",
+        "https://arxiv.org/pdf/2401.00003.pdf",
+    ]
+    assert await resolve_pdf_urls(urls) == {
+        urls[0]: "https://arxiv.org/pdf/2401.00002v2.pdf",
+        urls[1]: "https://arxiv.org/abs/2401.00002v2",
+        urls[2]: urls[2],
+        urls[3]: urls[3],
+    }
@@ -0,0 +1,88 @@
+import sqlite3
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.telemetry import (
+    WAIT_SAMPLES,
+    AdaptivePoolSizer,
+    InstrumentedPool,
+    PoolTelemetry,
+)
+
+
+@pytest.fixture
+def telemetry():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=InstrumentedPool, max_overflow=4
+    )
+    telemetry = PoolTelemetry(engine, "test")
+    yield telemetry
+    PoolTelemetry._all.remove(telemetry)
+
+
+def test_recent_waits_are_bounded_without_a_sizer(telemetry):
+    for _ in range(WAIT_SAMPLES + 100):
+        telemetry.record_wait(0.001)
+    assert len(telemetry.drain_waits()) == WAIT_SAMPLES
+    assert telemetry.drain_waits() == []
+
+
+def test_sizer_grows_and_shrinks_the_overflow_cap(telemetry):
+    sizer = AdaptivePoolSizer(
+        telemetry, min_overflow=2, max_overflow=8, target_wait=0.05, step=2
+    )
+    for _ in range(20):
+        telemetry.record_wait(0.2)
+    assert sizer.adjust() == 6
+    assert telemetry.pool.overflow_cap == 6
+    assert telemetry.stats()["max_overflow"] == 6
+
+    assert sizer.adjust() == 4
+    assert sizer.adjust() == 2
+    assert sizer.adjust() is None
+
+
+class Recorder:
+    def __init__(self):
+        self.waits = []
+
+    def record_wait(self, seconds):
+        self.waits.append(seconds)
+
+
+def slow_pool(**kwargs) -> InstrumentedPool:
+    def connect():
+        time.sleep(0.05)
+        return sqlite3.connect(":memory:")
+
+    pool = InstrumentedPool(connect, **kwargs)
+    pool.telemetry = Recorder()
+    return pool
+
+
+def test_connecting_is_not_counted_as_waiting():
+    pool = slow_pool(pool_size=1, max_overflow=1)
+    first, second = pool.connect(), pool.connect()  # second one is overflow
+    assert len(pool.telemetry.waits) == 2
+    assert max(pool.telemetry.waits) < 0.01
+    first.close()
+    second.close()
+
+
+def test_retried_checkout_is_recorded_once(monkeypatch):
+    pool = slow_pool(pool_size=1, max_overflow=1)
+    inc_overflow = pool._inc_overflow
+    lost = []
+
+    def race_once():
+        # Another checkout took the last overflow slot; QueuePool retries
+        if not lost:
+            lost.append(True)
+            return False
+        return inc_overflow()
+
+    monkeypatch.setattr(pool, "_inc_overflow", race_once)
+    pool.connect().close()
+    assert lost and len(pool.telemetry.waits) == 1
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from src.database import db
+from src.database.resilience import CircuitBreaker, is_connection_error
+from src.errors import DatabaseConnectionError
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+    with pytest.raises(DatabaseConnectionError):
+        breaker.check()
+
+
+def test_half_open_lets_one_trial_through_and_success_closes():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    open_breaker(breaker)
+    breaker.check()
+    assert breaker.state == breaker.HALF_OPEN
+    with pytest.raises(DatabaseConnectionError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+    breaker.check()
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0)
+    open_breaker(breaker)
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+
+
+def test_stale_trial_is_replaced_after_trial_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0, trial_timeout=0.05)
+    open_breaker(breaker)
+    breaker.check()
+    with pytest.raises(DatabaseConnectionError):
+        breaker.check()
+    time.sleep(0.06)
+    breaker.check()
+
+
+@pytest.mark.anyio
+async def test_cancelled_session_releases_the_trial(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    monkeypatch.setattr(db, "breaker", breaker)
+    open_breaker(breaker)
+    entered = asyncio.Event()
+
+    async def trial():
+        async with db.get_session():
+            entered.set()
+            await asyncio.sleep(60)
+
+    task = asyncio.create_task(trial())
+    await entered.wait()
+    with pytest.raises(DatabaseConnectionError):
+        breaker.check()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # No verdict from the cancelled trial; the next request probes again
+    assert breaker.state == breaker.HALF_OPEN
+    breaker.check()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+
+
+def test_statement_timeout_is_not_a_connection_error():
+    wrapped = DBAPIError("SELECT 1", {}, TimeoutError())
+    assert not is_connection_error(wrapped)
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        TimeoutError(),
+        ConnectionRefusedError(),
+        DBAPIError("SELECT 1", {}, ConnectionResetError()),
+        DBAPIError("SELECT 1", {}, Exception(), connection_invalidated=True),
+    ],
+)
+def test_connection_failures_are_connection_errors(exc):
+    assert is_connection_error(exc)
+
+
+def test_statement_errors_are_not_connection_errors():
+    assert not is_connection_error(DBAPIError("SELECT 1", {}, ValueError()))
+    assert not is_connection_error(ValueError())
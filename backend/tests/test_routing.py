@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import db
+from src.database.resilience import CircuitBreaker
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    factory = async_sessionmaker(db.engine, info={"target": "replica"})
+    monkeypatch.setattr(db, "replica_pools", [(factory, CircuitBreaker())])
+
+
+async def target(session):
+    return session.info.get("target", "primary")
+
+
+@pytest.mark.anyio
+async def test_reads_go_to_a_replica(replica):
+    assert await db.run_read(target) == "replica"
+
+
+@pytest.mark.anyio
+async def test_primary_reads_skip_replicas(replica):
+    assert await db.run_read(target, primary=True) == "primary"
@@ -0,0 +1,67 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from src.core.storage.base import StorageProvider
+from src.core.storage.s3 import AsyncS3Storage
+
+
+class FakeClient:
+    def __init__(self, missing=False):
+        self.missing = missing
+
+    async def head_bucket(self, Bucket):
+        if self.missing:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadBucket")
+
+
+@pytest.fixture
+def supabase_env(monkeypatch):
+    monkeypatch.setenv(
+        "S3_STORAGE_URL", "https://abc.storage.supabase.co/storage/v1/s3"
+    )
+    monkeypatch.setenv("S3_STORAGE_BUCKET_NAME", "arxiver")
+    monkeypatch.setenv("S3_ACCESS_KEY_ID", "key")
+    monkeypatch.setenv("S3_SECRET_ACCESS_KEY", "secret")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service")
+    monkeypatch.setenv("SUPABASE_API_KEY", "api")
+
+
+def storage_with(monkeypatch, client) -> AsyncS3Storage:
+    storage = AsyncS3Storage.supabase_from_env()
+
+    async def get_client():
+        return client
+
+    monkeypatch.setattr(storage, "_get_client", get_client)
+    return storage
+
+
+@pytest.mark.anyio
+async def test_supabase_preset_makes_the_bucket_public(supabase_env, monkeypatch):
+    calls = []
+
+    async def make_public(*args):
+        calls.append(args)
+
+    monkeypatch.setattr(
+        "src.core.storage.s3.make_supabase_bucket_public", make_public
+    )
+    storage = storage_with(monkeypatch, FakeClient())
+    await storage.ensure_bucket()
+    assert calls == [("abc", "arxiver", "service", "api")]
+
+
+@pytest.mark.anyio
+async def test_missing_bucket_is_not_made_public(supabase_env, monkeypatch):
+    calls = []
+    storage = storage_with(monkeypatch, FakeClient(missing=True))
+    storage.on_provision = lambda: calls.append(True)
+    with pytest.raises(ValueError, match="does not exist"):
+        await storage.ensure_bucket()
+    assert calls == []
+
+
+def test_shared_key_and_content_type_helpers():
+    assert AsyncS3Storage.build_key is StorageProvider.build_key
+    assert AsyncS3Storage.is_allowed_content_type("image/png")
+    assert not AsyncS3Storage.is_allowed_content_type("image/gif")
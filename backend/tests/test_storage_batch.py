@@ -0,0 +1,67 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from src.core.storage.batch import exists_many
+
+
+class FakeBucket:
+    """In-memory `list_objects_v2` / `head_object` with small pages."""
+
+    def __init__(self, keys, page_size=3):
+        self.keys = sorted(keys)
+        self.page_size = page_size
+        self.calls = []
+
+    async def __call__(self, operation, **params):
+        self.calls.append(operation)
+        if operation == "head_object":
+            if params["Key"] in self.keys:
+                return {}
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        after = params.get("ContinuationToken") or params.get("StartAfter", "")
+        matching = [
+            k for k in self.keys if k.startswith(params["Prefix"]) and k > after
+        ]
+        page = matching[: self.page_size]
+        truncated = len(matching) > self.page_size
+        response = {"Contents": [{"Key": k} for k in page], "IsTruncated": truncated}
+        if truncated:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+
+def thumbnails(*names):
+    return [f"7/thumbnails/{name}.png" for name in names]
+
+
+@pytest.mark.anyio
+async def test_lists_only_the_wanted_range():
+    stored = thumbnails(*(f"{n:04d}" for n in range(1000)))
+    bucket = FakeBucket(stored)
+    wanted = thumbnails("0500", "0501", "0502", "9999")
+
+    result = await exists_many(bucket, "b", wanted)
+    assert result == {k: not k.endswith("9999.png") for k in wanted}
+    # One page covers the dense range and one HEAD the outlier, instead of
+    # listing all 334 pages of the prefix
+    assert bucket.calls == ["list_objects_v2", "head_object"]
+
+
+@pytest.mark.anyio
+async def test_stops_at_the_last_wanted_key():
+    bucket = FakeBucket(thumbnails(*(f"{n:04d}" for n in range(100))))
+    result = await exists_many(bucket, "b", thumbnails("0010", "0011"))
+    assert all(result.values())
+    assert bucket.calls == ["list_objects_v2"]
+
+
+@pytest.mark.anyio
+async def test_falls_back_to_heads_for_a_sparse_wide_range():
+    stored = thumbnails(*(f"{n:04d}" for n in range(1000)))
+    bucket = FakeBucket(stored)
+    wanted = thumbnails("0000", "0999", "missing")
+
+    result = await exists_many(bucket, "b", wanted)
+    assert result == {k: "missing" not in k for k in wanted}
+    assert bucket.calls.count("list_objects_v2") == 2
+    assert bucket.calls.count("head_object") == 2
@@ -0,0 +1,94 @@
+from typing import Dict, Optional
+
+import pytest
+
+from src.core.storage import tiered
+from src.core.storage.base import StorageProvider
+from src.core.storage.tiered import TieredStorage
+from src.core.tasks import TaskRegistry
+
+
+class MemoryStorage(StorageProvider):
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+
+    async def upload_file(self, file, user_id, folder="avatar"):
+        raise NotImplementedError
+
+    def get_file_url(self, file_key: str) -> Optional[str]:
+        return f"memory://{file_key}"
+
+    async def delete_file(self, file_key: str) -> bool:
+        return self.objects.pop(file_key, None) is not None
+
+    async def upload_bytes(
+        self,
+        content,
+        user_id,
+        folder="thumbnails",
+        filename=None,
+        content_type="image/png",
+        cache_control=None,
+    ):
+        key = self.build_key(user_id, folder, filename)
+        self.objects[key] = content
+        return key
+
+    async def download_file(self, file_key: str) -> Optional[bytes]:
+        return self.objects.get(file_key)
+
+    async def file_exists(self, file_key: str) -> bool:
+        return file_key in self.objects
+
+    async def upload_stream(self, stream, user_id, **kwargs):
+        raise NotImplementedError
+
+    async def download_stream(self, file_key, chunk_size=0):
+        raise NotImplementedError
+
+    async def generate_upload_url(self, file_key, *args, **kwargs):
+        raise NotImplementedError
+
+    async def get_file_info(self, file_key: str):
+        return {} if file_key in self.objects else None
+
+    async def list_files(self, prefix: str):
+        return [k for k in self.objects if k.startswith(prefix)]
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = TaskRegistry()
+    monkeypatch.setattr(tiered, "task_registry", registry)
+    return registry
+
+
+@pytest.fixture
+def storage():
+    fast, slow = MemoryStorage(), MemoryStorage()
+    slow.objects["1/papers/a.pdf"] = b"pdf"
+    return TieredStorage({"fast": fast, "slow": slow}, default_tiers=["fast", "slow"])
+
+
+@pytest.mark.anyio
+async def test_existence_checks_do_not_promote(storage, registry):
+    assert await storage.file_exists("1/papers/a.pdf")
+    assert await storage.exists_many(["1/papers/a.pdf"]) == {"1/papers/a.pdf": True}
+    assert registry.stats()["queued"] == 0
+    assert storage.backends["fast"].objects == {}
+
+
+@pytest.mark.anyio
+async def test_download_promotes_through_the_registry(storage, registry):
+    assert await storage.download_file("1/papers/a.pdf") == b"pdf"
+    assert await registry.drain(timeout=1) == 0
+    assert storage.backends["fast"].objects == {"1/papers/a.pdf": b"pdf"}
+    assert storage.get_file_url("1/papers/a.pdf") == "memory://1/papers/a.pdf"
+
+
+@pytest.mark.anyio
+async def test_writes_replicate_through_the_registry(storage, registry):
+    key = await storage.upload_bytes(b"png", 1, folder="thumbnails", filename="t.png")
+    assert registry.stats()["queued"] + registry.stats()["running"] == 1
+    assert await registry.drain(timeout=1) == 0
+    assert storage.backends["slow"].objects[key] == b"png"